@@ -0,0 +1,278 @@
+# mongodb_apt_bulk_ingest.py
+# 국토교통부 아파트 매매/전월세 CSV 디렉터리 일괄 적재 (파싱: 프로세스 풀 / 쓰기: bulk_write 스레드)
+#
+# 사용법:
+#   python 01.mongodb_apt_bulk_ingest.py data/                     # data/ 아래 모든 매매·전월세 CSV
+#   python 01.mongodb_apt_bulk_ingest.py data/ --processes 8 --writers 4
+#   python 01.mongodb_apt_bulk_ingest.py data/ --force             # 이미 적재한 파일도 다시 적재
+#
+# 파일별 완료 상태를 ingest_files 컬렉션에 기록하므로, 다시 실행하면 완료된 파일(크기/수정시각 동일)은 건너뜁니다.
+
+import argparse
+import multiprocessing
+import os
+import queue
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime, timezone
+from pathlib import Path
+
+from pymongo import MongoClient
+from pymongo.errors import ServerSelectionTimeoutError
+
+from real_estate_utils import (read_sale_documents, read_rent_documents, sale_operation, rent_operation,
+                               write_operations, ensure_fingerprint_index, ensure_query_indexes)
+
+# =========================================================
+# 1️⃣ 환경 설정
+# =========================================================
+MONGO_URI = "mongodb://localhost:27017/"
+DB_NAME = "real_estate_db"
+FILES_COLLECTION = "ingest_files"
+
+PARSE_PROCESSES = os.cpu_count() or 1  # CSV 파싱 프로세스 수
+WRITER_THREADS = 4                     # bulk_write 스레드 수
+CHUNK_SIZE = 5000                      # 파서 → 쓰기 스레드로 넘기는 문서 묶음 크기
+QUEUE_SIZE = 32                        # 대기 중인 묶음 최대 개수 (메모리 상한)
+SENTINEL_PUT_TIMEOUT = 1.0             # 종료 신호를 넣을 때 쓰기 스레드 생존 여부를 다시 확인하는 간격(초)
+
+# 파일 종류별 설정 (파일 이름에 포함된 단어로 구분)
+FILE_KINDS = {
+    "rent": {"keyword": "전월세", "collection": "apartment_rent_transactions",
+             "reader": read_rent_documents, "to_operation": rent_operation},
+    "sale": {"keyword": "매매", "collection": "apartment_transactions",
+             "reader": read_sale_documents, "to_operation": sale_operation},
+}
+
+
+# =========================================================
+# 2️⃣ 파일 탐색 / 완료 기록
+# =========================================================
+def detect_kind(path: Path):
+    for kind, config in FILE_KINDS.items():
+        if config["keyword"] in path.name:
+            return kind
+    return None
+
+
+def discover_files(root) -> list:
+    """root 아래 모든 매매/전월세 CSV를 [(경로, 종류)] 로 반환"""
+    files = []
+    for path in sorted(Path(root).rglob("*.csv")):
+        kind = detect_kind(path)
+        if kind:
+            files.append((path, kind))
+    return files
+
+
+def file_key(path: Path, root) -> dict:
+    """같은 파일인지 판단하는 값 (상대 경로 + 크기 + 수정 시각)"""
+    stat = path.stat()
+    return {"path": path.relative_to(root).as_posix(), "size": stat.st_size, "mtime": int(stat.st_mtime)}
+
+
+def load_completed(db) -> set:
+    return {(doc["path"], doc["size"], doc["mtime"])
+            for doc in db[FILES_COLLECTION].find({"status": "done"}, {"path": 1, "size": 1, "mtime": 1})}
+
+
+class FileTracker:
+    """파일별로 파싱이 끝났고 모든 묶음이 저장됐는지 추적해 ingest_files에 기록 (쓰기 스레드와 공유)"""
+
+    def __init__(self, db, keys: dict):
+        self.db = db
+        self.keys = keys  # 파일 경로 문자열 → file_key()
+        self.state = {path: {"chunks": 0, "expected": None, "counts": [0, 0, 0, 0], "error": None}
+                      for path in keys}
+        self.lock = threading.Lock()
+
+    def chunk_written(self, path: str, counts):
+        with self.lock:
+            state = self.state[path]
+            state["chunks"] += 1
+            state["counts"] = [a + b for a, b in zip(state["counts"], counts)]
+            self._finish_if_complete(path)
+
+    def parsed(self, path: str, rows: int, chunks: int):
+        with self.lock:
+            self.state[path]["expected"] = chunks
+            self.state[path]["rows"] = rows
+            self._finish_if_complete(path)
+
+    def parse_failed(self, path: str, error: str):
+        with self.lock:
+            self.state[path]["error"] = error
+            self._record(path, "failed")
+
+    def _finish_if_complete(self, path: str):
+        state = self.state[path]
+        if state["expected"] is None or state["chunks"] < state["expected"]:
+            return
+        failed = state["counts"][3]
+        if failed:
+            state["error"] = f"bulk_write 실패 {failed}건"
+        self._record(path, "failed" if failed else "done")
+
+    def _record(self, path: str, status: str):
+        state = self.state[path]
+        inserted, updated, skipped, failed = state["counts"]
+        key = self.keys[path]
+        self.db[FILES_COLLECTION].update_one(
+            {"path": key["path"]},
+            {"$set": {**key, "status": status, "rows": state.get("rows"), "inserted": inserted,
+                      "updated": updated, "skipped": skipped, "failed": failed, "error": state["error"],
+                      "finished_at": datetime.now(timezone.utc)}},
+            upsert=True,
+        )
+        icon = "✅" if status == "done" else "❌"
+        print(f"{icon} [{key['path']}] 삽입: {inserted}건, 업데이트: {updated}건, 스킵: {skipped}건, "
+              f"실패: {failed}건{' - ' + state['error'] if state['error'] else ''}")
+
+
+# =========================================================
+# 3️⃣ CSV 파싱 (프로세스 풀)
+# =========================================================
+_parsed_queue = None
+
+
+def _init_parser(parsed_queue):
+    global _parsed_queue
+    _parsed_queue = parsed_queue
+
+
+def parse_file(path: str, kind: str, chunk_size: int):
+    """CSV 한 파일을 문서로 변환해 chunk_size개씩 대기열에 넣고 (경로, 행 수, 묶음 수) 반환"""
+    read_documents = FILE_KINDS[kind]["reader"]
+    rows = 0
+    chunks = 0
+    chunk = []
+    for doc in read_documents(path):
+        chunk.append(doc)
+        rows += 1
+        if len(chunk) >= chunk_size:
+            _parsed_queue.put((path, kind, chunk))
+            chunks += 1
+            chunk = []
+    if chunk:
+        _parsed_queue.put((path, kind, chunk))
+        chunks += 1
+    return path, rows, chunks
+
+
+# =========================================================
+# 4️⃣ bulk_write 쓰기 스레드
+# =========================================================
+def bulk_writer(db, parsed_queue, tracker: FileTracker):
+    """대기열이 끝날 때까지 묶음을 저장 (스레드가 죽으면 파서가 가득 찬 대기열에서 멈추므로 예외는 출력만)"""
+    while True:
+        item = parsed_queue.get()
+        if item is None:
+            return
+
+        path, kind, documents = item
+        try:
+            config = FILE_KINDS[kind]
+            # updated_at은 파싱 시각이 아니라 쓰기 직전 시각 (월간 집계 증분 갱신 기준)
+            now = datetime.now(timezone.utc)
+            operations = [config["to_operation"](doc, now) for doc in documents]
+            counts = write_operations(db[config["collection"]], operations)
+        except Exception as e:
+            print(f"❗ [{path}] bulk_write 오류: {e}")
+            counts = (0, 0, 0, len(documents))
+
+        try:
+            tracker.chunk_written(path, counts)
+        except Exception as e:
+            print(f"❗ [{path}] 적재 상태 기록 오류: {e}")
+
+
+def stop_writers(parsed_queue, writer_threads: list):
+    """쓰기 스레드마다 종료 신호(None)를 넣고 기다림 (살아 있는 스레드가 없으면 가득 찬 대기열에 넣지 않음)"""
+    for _ in writer_threads:
+        while any(t.is_alive() for t in writer_threads):
+            try:
+                parsed_queue.put(None, timeout=SENTINEL_PUT_TIMEOUT)
+                break
+            except queue.Full:
+                continue
+    for t in writer_threads:
+        t.join()
+
+
+# =========================================================
+# 5️⃣ 실행
+# =========================================================
+def run_ingest(root, processes: int = PARSE_PROCESSES, writers: int = WRITER_THREADS,
+               chunk_size: int = CHUNK_SIZE, force: bool = False):
+    start_time = time.time()
+
+    try:
+        client = MongoClient(MONGO_URI, serverSelectionTimeoutMS=5000)
+        client.admin.command("ping")
+    except ServerSelectionTimeoutError as e:
+        print(f"❌ MongoDB 연결 실패: {e}")
+        return
+
+    db = client[DB_NAME]
+    db[FILES_COLLECTION].create_index("path", unique=True)
+    for config in FILE_KINDS.values():
+        ensure_fingerprint_index(db[config["collection"]])
+        ensure_query_indexes(db[config["collection"]])
+
+    completed = set() if force else load_completed(db)
+    jobs = []
+    keys = {}
+    for path, kind in discover_files(root):
+        key = file_key(path, root)
+        if (key["path"], key["size"], key["mtime"]) in completed:
+            continue
+        jobs.append((str(path), kind))
+        keys[str(path)] = key
+
+    print(f"🚀 CSV {len(jobs)}개 적재 시작 (완료된 파일 {len(completed)}개 건너뜀, "
+          f"파싱 프로세스 {processes}개 / 쓰기 스레드 {writers}개)")
+    if not jobs:
+        client.close()
+        return
+
+    tracker = FileTracker(db, keys)
+    ctx = multiprocessing.get_context("spawn")
+    parsed_queue = ctx.Queue(maxsize=QUEUE_SIZE)
+
+    writer_threads = [threading.Thread(target=bulk_writer, args=(db, parsed_queue, tracker), daemon=True)
+                      for _ in range(writers)]
+    for t in writer_threads:
+        t.start()
+
+    try:
+        with ProcessPoolExecutor(max_workers=processes, mp_context=ctx,
+                                 initializer=_init_parser, initargs=(parsed_queue,)) as pool:
+            futures = {pool.submit(parse_file, path, kind, chunk_size): path for path, kind in jobs}
+            for future in as_completed(futures):
+                path = futures[future]
+                try:
+                    _, rows, chunks = future.result()
+                    tracker.parsed(path, rows, chunks)
+                except Exception as e:
+                    tracker.parse_failed(path, str(e))
+    finally:
+        stop_writers(parsed_queue, writer_threads)
+        client.close()
+
+    print(f"🎉 전체 적재 완료! 소요 시간: {time.time() - start_time:.2f}초")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="아파트 매매/전월세 CSV 디렉터리 → MongoDB 병렬 적재")
+    parser.add_argument("root", help="CSV 파일이 있는 디렉터리 (하위 디렉터리 포함)")
+    parser.add_argument("--processes", type=int, default=PARSE_PROCESSES,
+                        help=f"CSV 파싱 프로세스 수 (기본 CPU 코어 수 {PARSE_PROCESSES})")
+    parser.add_argument("--writers", type=int, default=WRITER_THREADS,
+                        help=f"MongoDB bulk_write 스레드 수 (기본 {WRITER_THREADS})")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE,
+                        help=f"bulk_write 한 번에 보낼 문서 수 (기본 {CHUNK_SIZE})")
+    parser.add_argument("--force", action="store_true", help="이미 적재 완료된 파일도 다시 적재")
+    args = parser.parse_args()
+
+    run_ingest(args.root, args.processes, args.writers, args.chunk_size, args.force)
@@ -1,50 +1,155 @@
+import argparse
+import hashlib
+import itertools
+import json
+import math
+import os
+import threading
 import time
 import requests
 import xml.etree.ElementTree as ET
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from datetime import datetime, timedelta, timezone
+from requests.adapters import HTTPAdapter
 from pymongo import MongoClient, UpdateOne
 
+from rate_limit import AdaptiveRateLimiter
+from real_estate_utils import (CONTRACT_DATE_FIELD, PRICE_PER_M2_FIELD, REGION_FIELD, REGION_NAME_FIELD,
+                               UPDATED_AT_FIELD, price_per_m2, ensure_query_indexes)
+from region_codes import region_name
+
 # ------------------------
 # MongoDB 설정
 # ------------------------
 MONGO_URI = "mongodb://localhost:27017"
 DB_NAME = "realestate"
 COLLECTION = "apt_trade"
+COMPLEX_FIELD = "aptNm"  # 단지·기간 조회 인덱스에 쓰는 단지명 필드
+
+SYNC_STATE_COLLECTION = "apt_trade_sync_state"  # (LAWD_CD, DEAL_YMD)별 마지막 수집 상태
 
 client = MongoClient(MONGO_URI)
 collection = client[DB_NAME][COLLECTION]
+sync_state_collection = client[DB_NAME][SYNC_STATE_COLLECTION]
+
+# ------------------------
+# API 호출 설정
+# ------------------------
+BASE_URL = "https://apis.data.go.kr/1613000/RTMSDataSvcAptTrade/getRTMSDataSvcAptTrade?"
+NUM_OF_ROWS = 1000          # 페이지당 건수 (API 최대 1000)
+MAX_WORKERS = 8             # 동시 요청 수 (keep-alive 연결 풀 크기와 같음)
+REQUESTS_PER_SECOND = 10.0  # 초당 요청 수 상한 (공공데이터포털 트래픽 제한 대비)
+MAX_ATTEMPTS = 3            # 페이지별 최대 시도 횟수
+REQUEST_TIMEOUT = (5, 30)   # (연결, 읽기) 제한 시간(초)
+STREAM_CHUNK_SIZE = 64 * 1024  # 응답을 나눠 읽으며 파싱할 크기(바이트)
+
+# 일일 호출 한도 (개발계정 기준, 자정(KST)에 초기화) - 사용량은 파일에 남겨 여러 번 실행해도 합산
+DAILY_QUOTA = 1000
+QUOTA_FILE = "rtms_quota.json"
+KST = timezone(timedelta(hours=9))
+
+# 한도 초과 응답 코드 (LIMITED_NUMBER_OF_SERVICE_REQUESTS_EXCEEDS_ERROR)
+QUOTA_EXCEEDED_CODE = "22"
+
+# 증분 동기화: 신고(계약 후 30일)·해제 신고가 반영되는 최근 몇 개월은 매번 다시 수집
+# 계약월 + REVISION_MONTHS개월이 지난 뒤 한 번 더 수집하면 그 달은 마감으로 보고 건너뜀
+REVISION_MONTHS = 3
+
+
+class QuotaExceeded(Exception):
+    """일일 호출 한도 소진"""
 
 
 # ------------------------
-# XML 아이템 파싱
+# XML 아이템 파싱 (스트리밍)
 # ------------------------
+def to_int(text):
+    return int(text.replace(",", ""))
+
+
+def to_float(text):
+    return float(text.replace(",", ""))
+
+
+# 숫자로 저장할 필드 (거래금액은 만원 단위, 쉼표 제거) - 코드 값(sggCd, umdCd, bonbun 등)은 앞자리 0 때문에 문자열 유지
+FIELD_TYPES = {
+    "dealAmount": to_int,
+    "dealYear": to_int,
+    "dealMonth": to_int,
+    "dealDay": to_int,
+    "floor": to_int,
+    "buildYear": to_int,
+    "excluUseAr": to_float,
+}
+
+
+def item_to_record(item):
+    """<item> 요소 → 타입이 변환된 문서 (+ 계약일 / ㎡당 가격 / 지역 = 시군구 코드, 지역 이름)"""
+    row = {el.tag: el.text.strip() if el.text else None for el in item}
+    for field, convert in FIELD_TYPES.items():
+        text = row.get(field)
+        if text:
+            try:
+                row[field] = convert(text)
+            except ValueError:
+                pass
+
+    try:
+        row[CONTRACT_DATE_FIELD] = datetime(row["dealYear"], row["dealMonth"], row["dealDay"])
+    except (KeyError, TypeError, ValueError):
+        row[CONTRACT_DATE_FIELD] = None
+    row[PRICE_PER_M2_FIELD] = price_per_m2(row.get("dealAmount"), row.get("excluUseAr"))
+    row[REGION_FIELD] = row.get("sggCd")
+    row[REGION_NAME_FIELD] = region_name(row.get("sggCd"))
+    return row
+
+
+def parse_response(chunks):
+    """응답 바이트 조각을 받는 대로 파싱 → (items, total_count, 결과 코드, body 유무)
+
+    전체 응답 문자열/트리를 들고 있지 않고, </item>이 닫힐 때마다 문서로 바꾼 뒤 요소를 비움
+    """
+    parser = ET.XMLPullParser(events=("end",))
+    items = []
+    total_count = 0
+    code = ""
+    has_body = False
+
+    def drain():
+        nonlocal total_count, code, has_body
+        for _, elem in parser.read_events():
+            tag = elem.tag
+            if tag == "item":
+                items.append(item_to_record(elem))
+                elem.clear()
+            elif tag == "totalCount":
+                total_count = int(elem.text) if elem.text else 0
+            elif tag == "returnReasonCode" or (tag == "resultCode" and not code):
+                # 오류 응답(cmmMsgHeader)의 returnReasonCode를 우선
+                code = elem.text.strip() if elem.text else ""
+            elif tag == "body":
+                has_body = True
+
+    for chunk in chunks:
+        parser.feed(chunk)
+        drain()
+    parser.close()
+    drain()
+    return items, total_count, code, has_body
+
+
 def parse_items(xml_text):
+    """XML 문자열 한 번에 파싱 → (items, total_count)"""
     try:
-        root = ET.fromstring(xml_text)
-    except Exception as e:
+        items, total_count, _, has_body = parse_response([xml_text.encode("utf-8")])
+    except ET.ParseError as e:
         print("❌ XML 파싱 오류:", e)
         print("원본:", xml_text[:300])
         return [], 0
 
-    body = root.find("body")
-    if body is None:
+    if not has_body:
         print("❌ body 없음")
         return [], 0
-
-    # totalCount 확인
-    total_count_elem = root.find(".//totalCount")
-    total_count = int(total_count_elem.text) if total_count_elem is not None else 0
-
-    items_node = body.find("items")
-    if items_node is None:
-        return [], total_count
-
-    items = []
-    for item in items_node.findall("item"):
-        row = {}
-        for el in item:
-            row[el.tag] = el.text.strip() if el.text else None
-        items.append(row)
-
     return items, total_count
 
 
@@ -53,6 +158,7 @@ def parse_items(xml_text):
 # ------------------------
 def save_to_mongodb(items):
     ops = []
+    now = datetime.now(timezone.utc)  # 삽입/갱신 시각 (월간 집계 증분 갱신 기준)
 
     for doc in items:
         unique_filter = {
@@ -65,7 +171,9 @@ def save_to_mongodb(items):
             "dealDay": doc.get("dealDay"),
         }
 
-        update_data = {k: v for k, v in doc.items() if v is not None}
+        # 지역 이름은 코드 표에 없어도 필드를 남김 (없으면 ensure_typed_documents가 예전 문서로 봄)
+        update_data = {k: v for k, v in doc.items() if v is not None or k == REGION_NAME_FIELD}
+        update_data[UPDATED_AT_FIELD] = now
 
         ops.append(
             UpdateOne(unique_filter, {"$set": update_data}, upsert=True)
@@ -76,54 +184,384 @@ def save_to_mongodb(items):
         print(f"Inserted={result.upserted_count}, Updated={result.modified_count}")
 
 
+def retype_existing_documents(target=None):
+    """문자열로 저장돼 있던 기존 문서의 숫자 필드/파생 필드를 서버에서 변환 (중복 판단 필드 타입을 맞추기 위해 1회 실행)"""
+    target = target if target is not None else collection
+
+    def converted(field, to):
+        text = {"$replaceAll": {"input": {"$trim": {"input": f"${field}"}}, "find": ",", "replacement": ""}}
+        number = {"$convert": {"input": text, "to": to, "onError": f"${field}", "onNull": f"${field}"}}
+        return {"$cond": [{"$eq": [{"$type": f"${field}"}, "string"]}, number, f"${field}"]}
+
+    pipeline = [
+        {"$set": {field: converted(field, "double" if convert is to_float else "int")
+                  for field, convert in FIELD_TYPES.items()}},
+        {"$set": {
+            CONTRACT_DATE_FIELD: {"$cond": [
+                {"$and": [{"$isNumber": "$dealYear"}, {"$isNumber": "$dealMonth"}, {"$isNumber": "$dealDay"}]},
+                {"$dateFromParts": {"year": "$dealYear", "month": "$dealMonth", "day": "$dealDay"}},
+                None,
+            ]},
+            PRICE_PER_M2_FIELD: {"$cond": [
+                {"$and": [{"$isNumber": "$dealAmount"}, {"$isNumber": "$excluUseAr"}, {"$gt": ["$excluUseAr", 0]}]},
+                {"$round": [{"$divide": ["$dealAmount", "$excluUseAr"]}, 2]},
+                None,
+            ]},
+            REGION_FIELD: "$sggCd",
+            UPDATED_AT_FIELD: "$$NOW",
+        }},
+    ]
+    result = target.update_many({"$or": [{"dealAmount": {"$type": "string"}},
+                                         {CONTRACT_DATE_FIELD: {"$exists": False}}]}, pipeline)
+    print(f"🔢 기존 문서 타입 변환: {result.modified_count}건")
+
+    # 지역 이름은 코드 표(region_codes)로 찾으므로 시군구 코드별로 한 번씩 채움
+    named = 0
+    for code in target.distinct("sggCd", {REGION_NAME_FIELD: {"$exists": False}}):
+        named += target.update_many(
+            {"sggCd": code, REGION_NAME_FIELD: {"$exists": False}},
+            {"$set": {REGION_NAME_FIELD: region_name(code), UPDATED_AT_FIELD: datetime.now(timezone.utc)}},
+        ).modified_count
+    print(f"🗺️ 지역 이름 기록: {named}건")
+
+
+def ensure_typed_documents(target=None):
+    """문자열 타입 문서가 남아 있으면 수집 전에 변환 (upsert 필터 타입이 달라 같은 거래가 중복 저장되는 것 방지)"""
+    target = target if target is not None else collection
+    if target.find_one({"$or": [{"dealAmount": {"$type": "string"}}, {REGION_NAME_FIELD: {"$exists": False}}]},
+                       {"_id": 1}) is not None:
+        print("⚠️ 문자열로 저장된 기존 문서가 있어 먼저 타입을 변환합니다.")
+        retype_existing_documents(target)
+
+
 # ------------------------
-# 전체 실행
+# 일일 호출 한도
+# ------------------------
+class DailyQuota:
+    """하루 호출 수를 세고 한도를 넘기면 QuotaExceeded (작업 스레드 공유)"""
+
+    def __init__(self, limit=DAILY_QUOTA, path=QUOTA_FILE):
+        self.limit = limit
+        self.path = path
+        self.lock = threading.Lock()
+        self.day, self.used = self._load()
+
+    def _today(self):
+        return datetime.now(KST).strftime("%Y%m%d")
+
+    def _load(self):
+        today = self._today()
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                saved = json.load(f)
+            if saved.get("day") == today:
+                return today, int(saved.get("used", 0))
+        except (OSError, ValueError):
+            pass
+        return today, 0
+
+    def take(self):
+        with self.lock:
+            today = self._today()
+            if today != self.day:
+                self.day, self.used = today, 0
+            if self.used >= self.limit:
+                raise QuotaExceeded(f"일일 호출 한도 {self.limit}회 소진")
+            self.used += 1
+
+    def exhaust(self):
+        """서버가 한도 초과를 알려 온 경우 남은 호출을 0으로"""
+        with self.lock:
+            self.used = max(self.used, self.limit)
+
+    def remaining(self):
+        with self.lock:
+            return max(0, self.limit - self.used)
+
+    def save(self):
+        with self.lock:
+            with open(self.path, "w", encoding="utf-8") as f:
+                json.dump({"day": self.day, "used": self.used}, f)
+
+
+# ------------------------
+# 페이지 요청 (keep-alive 세션 + 속도 제한 + 재시도)
 # ------------------------
-def run(gu_code, deal_ymd, service_key, num_of_rows=200):
-    base_url = (
-        "https://apis.data.go.kr/1613000/RTMSDataSvcAptTrade/getRTMSDataSvcAptTrade?"
+def make_session(pool_size=MAX_WORKERS):
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def fetch_page(session, limiter, quota, gu_code, deal_ymd, service_key, page_no,
+               num_of_rows=NUM_OF_ROWS, base_url=BASE_URL):
+    """페이지 1개 요청 → (items, total_count), 실패 시 MAX_ATTEMPTS회까지 재시도"""
+    # 🔥 파라미터 문자열 조합 방식 (serviceKey를 다시 인코딩하지 않도록)
+    payload = (
+        f"LAWD_CD={gu_code}&"
+        f"DEAL_YMD={deal_ymd}&"
+        f"serviceKey={service_key}&"
+        f"pageNo={page_no}&"
+        f"numOfRows={num_of_rows}"
     )
 
-    page_no = 1
-    total_fetched = 0
-
-    while True:
-        # 🔥 파라미터 문자열 조합 방식 (요청하신 방식 그대로)
-        payload = (
-            f"LAWD_CD={gu_code}&"
-            f"DEAL_YMD={deal_ymd}&"
-            f"serviceKey={service_key}&"
-            f"pageNo={page_no}&"
-            f"numOfRows={num_of_rows}"
+    error = None
+    for attempt in range(1, MAX_ATTEMPTS + 1):
+        quota.take()
+        limiter.acquire()
+        try:
+            # 응답을 다 받기 전에 조각 단위로 파싱 (본문 전체 문자열/트리를 만들지 않음)
+            with session.get(base_url + payload, timeout=REQUEST_TIMEOUT, stream=True) as response:
+                chunks = response.iter_content(STREAM_CHUNK_SIZE)
+                first = next(chunks, b"")
+                if response.status_code == 429:
+                    limiter.on_throttle()
+                    error = "429 Too Many Requests"
+                elif not first.lstrip().startswith(b"<"):
+                    error = f"XML이 아닌 응답: {first[:300].decode('utf-8', 'replace')}"
+                else:
+                    items, total_count, code, has_body = parse_response(itertools.chain([first], chunks))
+                    if code == QUOTA_EXCEEDED_CODE:
+                        quota.exhaust()
+                        raise QuotaExceeded("서버 응답: 일일 호출 한도 초과")
+                    if has_body:
+                        limiter.on_success()
+                        return items, total_count
+                    error = f"오류 응답 (코드 {code})"
+        except requests.RequestException as e:
+            error = f"요청 실패: {e}"
+        except ET.ParseError as e:
+            error = f"XML 파싱 오류: {e}"
+
+        print(f"⚠️ [{gu_code}/{deal_ymd} p{page_no}] {attempt}회 실패 - {error}")
+        if attempt < MAX_ATTEMPTS:
+            time.sleep(2 ** attempt)
+
+    raise RuntimeError(error)
+
+
+# ------------------------
+# 월 계산
+# ------------------------
+def add_months(ymd, months):
+    """'202011' + 3 → '202102'"""
+    index = int(ymd[:4]) * 12 + int(ymd[4:]) - 1 + months
+    return f"{index // 12}{index % 12 + 1:02d}"
+
+
+def month_range(start_ymd, end_ymd):
+    """'202001' ~ '202003' → ['202001', '202002', '202003']"""
+    months = []
+    ymd = start_ymd
+    while ymd <= end_ymd:
+        months.append(ymd)
+        ymd = add_months(ymd, 1)
+    return months
+
+
+def current_ymd():
+    return datetime.now(KST).strftime("%Y%m")
+
+
+# ------------------------
+# 증분 동기화 상태
+# ------------------------
+def page_hash(items):
+    """페이지 내용 해시 (같은 페이지가 그대로면 upsert 생략)"""
+    text = json.dumps(items, ensure_ascii=False, sort_keys=True, default=str)
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=16).hexdigest()
+
+
+class SyncState:
+    """(LAWD_CD, DEAL_YMD)별 totalCount / 마지막 수집 시각 / 페이지 해시를 MongoDB에 기록
+
+    문서 예: {"_id": "11215-202001", "lawd_cd": "11215", "deal_ymd": "202001", "total_count": 812,
+             "page_hashes": [...], "content_hash": "...", "fetched_at": ..., "closed": True}
+    """
+
+    def __init__(self, state_collection=None, revision_months=REVISION_MONTHS):
+        self.collection = state_collection if state_collection is not None else sync_state_collection
+        self.revision_months = revision_months
+
+    @staticmethod
+    def state_id(gu_code, deal_ymd):
+        return f"{gu_code}-{deal_ymd}"
+
+    def load(self, job_keys):
+        ids = [self.state_id(*job_key) for job_key in job_keys]
+        return {(doc["lawd_cd"], doc["deal_ymd"]): doc
+                for doc in self.collection.find({"_id": {"$in": ids}})}
+
+    def record(self, gu_code, deal_ymd, total_count, page_hashes):
+        fetched_at = datetime.now(KST)
+        self.collection.update_one(
+            {"_id": self.state_id(gu_code, deal_ymd)},
+            {"$set": {
+                "lawd_cd": gu_code,
+                "deal_ymd": deal_ymd,
+                "total_count": total_count,
+                "page_hashes": page_hashes,
+                "content_hash": hashlib.blake2b("".join(page_hashes).encode(), digest_size=16).hexdigest(),
+                "fetched_at": fetched_at.astimezone(timezone.utc),
+                # 수정 기간이 끝난 뒤에 받은 데이터면 마감 (이후 동기화에서 제외)
+                "closed": deal_ymd < add_months(fetched_at.strftime("%Y%m"), -self.revision_months),
+            }},
+            upsert=True,
         )
 
-        print(f"▶ API 호출: page {page_no}")
 
-        response = requests.get(base_url + payload)
-        xml_text = response.text.strip()
+def plan_sync(gu_codes, start_ymd, end_ymd=None, sync_state=None, revision_months=REVISION_MONTHS):
+    """다시 받아야 할 (LAWD_CD, DEAL_YMD) 목록
+
+    - 한 번도 받지 않은 달: 수집
+    - 최근 revision_months개월(+ 이번 달): 매번 수집
+    - 마감된 달(수정 기간이 끝난 뒤 받은 적 있음): 건너뜀
+    """
+    this_month = current_ymd()
+    end_ymd = min(end_ymd or this_month, this_month)
+    open_from = add_months(this_month, -revision_months)
+
+    job_keys = [(gu_code, deal_ymd) for gu_code in gu_codes for deal_ymd in month_range(start_ymd, end_ymd)]
+    previous = sync_state.load(job_keys) if sync_state else {}
 
-        # XML이 아닐 경우 오류 출력
-        if not xml_text.startswith("<"):
-            print("❌ XML이 아닌 응답 발생!", xml_text[:300])
-            break
+    plan = []
+    for job_key in job_keys:
+        doc = previous.get(job_key)
+        if doc and doc.get("closed") and job_key[1] < open_from:
+            continue
+        plan.append(job_key)
 
-        items, total_count = parse_items(xml_text)
+    print(f"🗓️ 동기화 계획: {len(job_keys)}개 조합 중 {len(plan)}개 수집 "
+          f"(마감 {len(job_keys) - len(plan)}개 건너뜀, {open_from} 이후는 매번 수집)")
+    return plan
 
-        if not items:
-            print("▶ 데이터 없음 → 종료")
-            break
 
-        save_to_mongodb(items)
+# ------------------------
+# 지역 × 계약월 동시 수집
+# ------------------------
+def crawl(gu_codes, deal_ymds, service_key, workers=MAX_WORKERS, num_of_rows=NUM_OF_ROWS,
+          save=save_to_mongodb, daily_quota=DAILY_QUOTA, base_url=BASE_URL, job_keys=None, sync_state=None):
+    """(LAWD_CD, DEAL_YMD) 조합마다 1페이지로 totalCount를 확인한 뒤 나머지 페이지를 동시에 요청
+
+    - 모든 요청은 workers개 스레드와 같은 크기의 keep-alive 연결 풀을 공유
+    - 일일 한도를 다 쓰면 새 요청을 멈추고 끝나지 않은 조합을 반환
+    - save(items)는 메인 스레드에서 페이지가 도착하는 대로 호출
+    - job_keys를 주면 gu_codes × deal_ymds 대신 그 조합만 수집 (plan_sync 결과)
+    - sync_state를 주면 지난번과 해시가 같은 페이지는 save 생략, 끝난 조합은 상태 기록
+    - 기본 save(save_to_mongodb)면 문자열 타입으로 남은 기존 문서를 먼저 변환 (ensure_typed_documents)
+    """
+    start_time = time.time()
+    if save is save_to_mongodb:
+        ensure_typed_documents()
+    session = make_session(workers)
+    limiter = AdaptiveRateLimiter(rate=REQUESTS_PER_SECOND, max_rate=REQUESTS_PER_SECOND, burst=workers)
+    quota = DailyQuota(daily_quota)
+
+    if job_keys is None:
+        job_keys = [(gu_code, deal_ymd) for gu_code in gu_codes for deal_ymd in deal_ymds]
+
+    # 조합별 진행 상황: 남은 페이지 수, 저장 건수, 실패 여부, 페이지 해시
+    progress = {job_key: {"pending": 1, "saved": 0, "unchanged": 0, "total": None, "failed": False, "hashes": {}}
+                for job_key in job_keys}
+    previous = sync_state.load(progress) if sync_state else {}
+    print(f"🚀 RTMS 수집 시작: {len(progress)}개 조합 (동시 요청 {workers}개, "
+          f"오늘 남은 호출 {quota.remaining()}회)")
+
+    quota_hit = False
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        def submit(job_key, page_no):
+            return pool.submit(fetch_page, session, limiter, quota, *job_key, service_key, page_no,
+                               num_of_rows, base_url)
+
+        futures = {submit(job_key, 1): (job_key, 1) for job_key in progress}
+        while futures:
+            done, _ = wait(futures, return_when=FIRST_COMPLETED)
+            for future in done:
+                job_key, page_no = futures.pop(future)
+                state = progress[job_key]
+                state["pending"] -= 1
+                try:
+                    items, total_count = future.result()
+                except QuotaExceeded as e:
+                    if not quota_hit:
+                        print(f"⛔ {e} → 새 요청 중단")
+                        quota_hit = True
+                        for pending in futures:
+                            pending.cancel()
+                    state["failed"] = True
+                    continue
+                except Exception as e:
+                    print(f"❌ [{job_key[0]}/{job_key[1]} p{page_no}] {e}")
+                    state["failed"] = True
+                    continue
+
+                # 지난번 같은 페이지와 내용이 같으면 upsert 생략
+                digest = state["hashes"][page_no] = page_hash(items)
+                before = previous.get(job_key)
+                if before and before["page_hashes"][page_no - 1:page_no] == [digest]:
+                    state["unchanged"] += len(items)
+                elif items:
+                    try:
+                        save(items)
+                        state["saved"] += len(items)
+                    except Exception as e:
+                        print(f"❌ [{job_key[0]}/{job_key[1]} p{page_no}] 저장 실패: {e}")
+                        state["failed"] = True
+
+                # 1페이지 응답으로 전체 페이지 수를 알게 되면 나머지 페이지를 한꺼번에 요청
+                if page_no == 1:
+                    state["total"] = total_count
+                    pages = math.ceil(total_count / num_of_rows)
+                    if quota_hit:
+                        state["failed"] = state["failed"] or pages > 1
+                    else:
+                        for next_page in range(2, pages + 1):
+                            futures[submit(job_key, next_page)] = (job_key, next_page)
+                            state["pending"] += 1
+
+                # 모든 페이지를 받아 저장까지 끝난 조합은 동기화 상태 기록
+                if sync_state and state["pending"] == 0 and not state["failed"]:
+                    hashes = [state["hashes"][page] for page in sorted(state["hashes"])]
+                    sync_state.record(*job_key, state["total"], hashes)
+
+            # 취소된 요청은 결과 없이 정리
+            for future in [f for f in futures if f.cancelled()]:
+                job_key, _ = futures.pop(future)
+                progress[job_key]["pending"] -= 1
+                progress[job_key]["failed"] = True
+
+    session.close()
+    quota.save()
+
+    unfinished = sorted(job_key for job_key, state in progress.items() if state["failed"])
+    total_saved = sum(state["saved"] for state in progress.values())
+    total_unchanged = sum(state["unchanged"] for state in progress.values())
+    print(f"▶ 총 저장된 데이터: {total_saved} 건 (변경 없음 {total_unchanged} 건), 미완료 조합 {len(unfinished)}개, "
+          f"오늘 남은 호출 {quota.remaining()}회, 소요 시간: {time.time() - start_time:.2f}초")
+    for gu_code, deal_ymd in unfinished:
+        print(f"   - {gu_code}/{deal_ymd}")
+    return unfinished
 
-        total_fetched += len(items)
 
-        # 마지막 페이지 도달 시 종료
-        if page_no * num_of_rows >= total_count:
-            break
+# ------------------------
+# 전체 실행
+# ------------------------
+def run(gu_code, deal_ymd, service_key, num_of_rows=NUM_OF_ROWS):
+    """지역 1곳 × 계약월 1개 수집 (crawl 한 조합짜리)"""
+    return crawl([gu_code], [deal_ymd], service_key, num_of_rows=num_of_rows)
 
-        page_no += 1
 
-    print(f"▶ 총 저장된 데이터: {total_fetched} 건")
+def sync(gu_codes, start_ymd, service_key, end_ymd=None, workers=MAX_WORKERS, daily_quota=DAILY_QUOTA,
+         revision_months=REVISION_MONTHS):
+    """마감되지 않은 달만 수집하고, 내용이 바뀐 페이지만 upsert"""
+    sync_state = SyncState(revision_months=revision_months)
+    plan = plan_sync(gu_codes, start_ymd, end_ymd, sync_state, revision_months)
+    if not plan:
+        return []
+    return crawl(gu_codes, None, service_key, workers=workers, daily_quota=daily_quota,
+                 job_keys=plan, sync_state=sync_state)
 
 
 # ------------------------
@@ -132,7 +570,47 @@ def run(gu_code, deal_ymd, service_key, num_of_rows=200):
 """
 service_key = "<인증키>"
 run("11215", "202001", service_key)
-"""
 
+python 01.mongodb_realEstage.py --lawd-cd 11215 11680 --from 202001 --workers 8   # 증분 동기화
+python 01.mongodb_realEstage.py --lawd-cd 11215 --from 202001 --to 202312 --full     # 상태 무시하고 전부
+python 01.mongodb_realEstage.py --retype-existing   # 문자열로 저장된 기존 문서를 숫자/날짜 타입으로 1회 변환 (수집 전 자동 실행됨)
 
+# 조회 (real_estate_utils.find_transactions, 지역 = 시군구 코드)
+find_transactions(collection, "202301", "202401", region="11680")
+find_transactions(collection, "2023-01-01", complex_name="래미안대치팰리스", complex_field=COMPLEX_FIELD)
+"""
 
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="국토교통부 아파트 매매 실거래가 API → MongoDB 동시 수집")
+    parser.add_argument("--lawd-cd", nargs="+", help="법정동 시군구 코드 5자리 (여러 개 가능)")
+    parser.add_argument("--from", dest="start_ymd", help="시작 계약월 (YYYYMM)")
+    parser.add_argument("--to", dest="end_ymd", help="끝 계약월 (YYYYMM, 기본: 이번 달, --full이면 시작 계약월)")
+    parser.add_argument("--service-key", default=os.environ.get("DATA_GO_KR_SERVICE_KEY"),
+                        help="공공데이터포털 인증키 (기본: 환경변수 DATA_GO_KR_SERVICE_KEY)")
+    parser.add_argument("--workers", type=int, default=MAX_WORKERS, help=f"동시 요청 수 (기본 {MAX_WORKERS})")
+    parser.add_argument("--daily-quota", type=int, default=DAILY_QUOTA,
+                        help=f"일일 호출 한도 (기본 {DAILY_QUOTA})")
+    parser.add_argument("--revision-months", type=int, default=REVISION_MONTHS,
+                        help=f"매번 다시 받을 최근 개월 수 (기본 {REVISION_MONTHS})")
+    parser.add_argument("--full", action="store_true", help="동기화 상태를 보지 않고 지정 기간 전체 수집")
+    parser.add_argument("--retype-existing", action="store_true",
+                        help="문자열로 저장된 기존 문서의 숫자 필드/계약일/㎡당 가격/지역 변환 후 종료")
+    args = parser.parse_args()
+
+    if args.retype_existing:
+        retype_existing_documents()
+        ensure_query_indexes(collection, COMPLEX_FIELD)
+        raise SystemExit
+
+    if not args.lawd_cd or not args.start_ymd:
+        parser.error("--lawd-cd와 --from이 필요합니다")
+    if not args.service_key:
+        parser.error("--service-key 또는 DATA_GO_KR_SERVICE_KEY 환경변수가 필요합니다")
+
+    ensure_query_indexes(collection, COMPLEX_FIELD)
+    if args.full:
+        crawl(args.lawd_cd, month_range(args.start_ymd, args.end_ymd or args.start_ymd), args.service_key,
+              workers=args.workers, daily_quota=args.daily_quota)
+    else:
+        sync(args.lawd_cd, args.start_ymd, args.service_key, args.end_ymd, workers=args.workers,
+             daily_quota=args.daily_quota, revision_months=args.revision_months)
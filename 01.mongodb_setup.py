@@ -5,6 +5,8 @@ from pymongo import MongoClient
 # ✅ 수정: ServerSelectionTimeoutError를 사용하여 연결 오류를 처리합니다.
 from pymongo.errors import ServerSelectionTimeoutError 
 
+from mongo_utils import ensure_symbol_date_index
+
 # MongoDB 연결 정보 (사용자 요청에 따라 localhost:27017)
 MONGO_URI = "mongodb://localhost:27017/"
 DATABASE_NAME = "finance_db"
@@ -36,11 +38,8 @@ def setup_mongodb():
         for type_name, collection_name in COLLECTION_NAMES.items():
             collection = db[collection_name]
             
-            index_name = collection.create_index(
-                [("symbol", 1), ("date", 1)],
-                unique=True,
-                name="symbol_date_unique_index"
-            )
+            # 02.mongodb_update.py와 같은 인덱스 점검 로직 사용 (있으면 재빌드하지 않음)
+            index_name = ensure_symbol_date_index(collection)
             print(f"   - 컬렉션 '{collection_name}'이 준비되었으며, 고유 인덱스 '{index_name}'이 설정되었습니다.")
 
         client.close()
@@ -2,23 +2,56 @@
 # yfinance + MongoDB 통합 업데이트 스크립트 (전역 세션 재사용 버전)
 
 import os
+import argparse
+import socket
 import pandas as pd
 import yfinance as yf
 from datetime import datetime, timedelta
 from pymongo import MongoClient
 from pymongo.errors import ServerSelectionTimeoutError, BulkWriteError
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, wait, as_completed, FIRST_COMPLETED
 from curl_cffi import requests
+from curl_cffi.requests import AsyncSession
+import asyncio
+import multiprocessing
+import queue
+import threading
 import ssl, certifi
 import time
 import numpy as np
 
+from mongo_utils import (dataframe_to_documents, ensure_symbol_date_index, ensure_ingest_state_index,
+                         read_latest_dates, record_ingest_result, rebuild_ingest_state, has_ingest_state,
+                         ensure_checkpoint_index, seed_checkpoints, load_checkpoint_status,
+                         update_checkpoint, symbol_shard, CHECKPOINT_IN_PROGRESS, CHECKPOINT_DONE,
+                         CHECKPOINT_FAILED, timeseries_name, is_timeseries_collection,
+                         ensure_timeseries_collection, filter_new_documents)
+from yahoo_chart import chart_request, chart_json_to_frame
+from rate_limit import (AdaptiveRateLimiter, RetryQueue, FetchFailure, classify_error,
+                        THROTTLED, EMPTY, ERROR)
+from symbol_resolver import SymbolResolver, is_korean_code, KOREAN_SUFFIXES
+
 # =========================================================
 # 1️⃣ 환경 설정
 # =========================================================
 MONGO_URI = "mongodb://localhost:27017/"
 DATABASE_NAME = "finance_db"
 MAX_WORKERS = 4
+STORAGE_MODE = "document"  # document: 심볼-일자별 일반 문서 / timeseries: {컬렉션}_ts 시계열 컬렉션
+BATCH_SIZE = 50          # batch 모드: yf.download 한 번에 묶을 심볼 수
+ASYNC_CONCURRENCY = 32   # async 모드: 동시에 진행할 HTTP 요청 수
+ASYNC_WRITERS = 2        # async 모드: MongoDB 쓰기 작업자 수 (스레드로 실행)
+ASYNC_QUEUE_SIZE = 256   # async 모드: 다운로드 → 쓰기 대기열 최대 길이
+PIPELINE_WRITERS = 2           # pipeline 모드: MongoDB 쓰기 스레드 수
+PIPELINE_QUEUE_SIZE = 64       # pipeline 모드: 다운로드 → 쓰기 대기열 최대 길이 (심볼 단위)
+WRITER_BATCH_SIZE = 20000      # pipeline 모드: 여러 심볼을 모아 한 번에 쓰는 문서 수
+WRITER_FLUSH_SECONDS = 2.0     # pipeline 모드: 배치가 덜 찼어도 이 시간이 지나면 저장
+PIPELINE_METRICS_INTERVAL = 10 # pipeline 모드: 지표 출력 주기(초)
+PROCESS_WORKERS = os.cpu_count() or 1  # process 모드: 작업 프로세스 수 (기본 CPU 코어 수)
+BACKFILL_JOB_ID = "full_backfill"  # backfill 모드: 체크포인트 작업 이름
+RATE_LIMIT_PER_SEC = 5.0       # 시작 요청 속도 (429/빈 응답에 따라 자동 조정)
+RATE_LIMIT_MAX_PER_SEC = 20.0  # 자동 증가 상한
+RETRY_MAX_ATTEMPTS = 4         # 심볼별 최대 시도 횟수 (초과 시 영구 실패로 보고)
 
 COLLECTION_NAMES = {
     "us_stocks": "us_stocks",
@@ -39,19 +72,36 @@ ssl_context = ssl.create_default_context(cafile=certifi.where())
 # ✅ 전역 세션 1회 생성 (모든 Ticker가 공유)
 session = requests.Session(impersonate="chrome", headers=HEADERS, verify=False)
 
+# ✅ 전역 요청 속도 제한기 (모든 작업자가 공유)
+rate_limiter = AdaptiveRateLimiter(rate=RATE_LIMIT_PER_SEC, max_rate=RATE_LIMIT_MAX_PER_SEC)
+
+# ✅ 한국 종목코드 → .KS/.KQ 접미사 캐시 (symbol_suffix.db, 다른 업데이트 스크립트와 공유)
+suffix_resolver = SymbolResolver()
+UNRESOLVED_KOREAN_CODES = set()   # 캐시에 없어 임시로 .KS를 붙인 코드
+
 # =========================================================
 # 2️⃣ 티커 목록
 # =========================================================
 def format_korean_tickers(tickers: list) -> list:
-    """한국 주식 코드에 yfinance용 접미사(.KS/.KQ)를 붙입니다."""
+    """한국 주식 코드에 yfinance용 접미사(.KS/.KQ)를 붙입니다.
+
+    symbol_suffix.db에 확인된 접미사를 사용하고, 두 시장 모두 데이터가 없던 코드는 제외합니다.
+    아직 확인되지 않은 코드는 .KS를 붙이고 UNRESOLVED_KOREAN_CODES에 기록합니다.
+    """
+    cached = suffix_resolver.load_all()
     formatted = []
     for t in tickers:
-        if t.endswith(('.KS', '.KQ')):
-            formatted.append(t)
-        elif len(t) == 6 and t.isdigit():
-            formatted.append(f"{t}.KS")
-        else:
+        code = t[:-3] if t.endswith(KOREAN_SUFFIXES) else t
+        if not is_korean_code(code):
             formatted.append(t)
+            continue
+
+        suffix = cached.get(code)
+        if suffix:
+            formatted.append(f"{code}{suffix}")
+        elif suffix is None:
+            UNRESOLVED_KOREAN_CODES.add(code)
+            formatted.append(t if t != code else f"{code}.KS")
     return formatted
 
 
@@ -4737,156 +4787,836 @@ TICKER_LISTS = {
 # =========================================================
 # 3️⃣ 최신 날짜 조회 함수
 # =========================================================
-def get_latest_dates_from_mongo(db, collection_name, symbols):
-    """MongoDB에서 각 심볼별 최신 날짜를 조회"""
-    collection = db[collection_name]
-    latest_dates = {}
+def bootstrap_ingest_state(db, collection_name) -> bool:
+    """컬렉션의 상태 문서가 하나도 없는데 데이터는 있으면 (최초 전환 / 상태 유실) 데이터 집계로 한 번 복구
 
-    pipeline = [
-        {"$match": {"symbol": {"$in": symbols}}},
-        {"$sort": {"date": -1}},
-        {"$group": {"_id": "$symbol", "max_date": {"$first": "$date"}}}
-    ]
+    요청한 심볼에 상태가 없을 뿐인 경우(새 심볼, 백필 재개 등)는 집계하지 않습니다. 복구했으면 True
+    """
+    if has_ingest_state(db, collection_name) or db[collection_name].estimated_document_count() == 0:
+        return False
+    print(f"[{collection_name}] ingest_state 없음 → 데이터 집계로 복구합니다.")
+    rebuild_ingest_state(db, collection_name)
+    return True
+
+
+def get_latest_dates_from_mongo(db, collection_name, symbols, bootstrap: bool = True):
+    """ingest_state 컬렉션에서 각 심볼별 최신 날짜를 조회 (인덱스 조회 1회)
 
+    bootstrap=False면 상태 복구(bootstrap_ingest_state)를 건너뜀 (부모 프로세스에서 이미 실행한 경우)
+    """
     try:
-        for doc in collection.aggregate(pipeline, allowDiskUse=True):
-            max_date = doc.get('max_date')
-            if isinstance(max_date, datetime):
-                latest_dates[doc['_id']] = max_date.strftime("%Y-%m-%d")
-            elif isinstance(max_date, str):
-                latest_dates[doc['_id']] = max_date
+        if bootstrap:
+            bootstrap_ingest_state(db, collection_name)
+        latest_dates = read_latest_dates(db, collection_name, symbols)
     except Exception as e:
         print(f"[{collection_name}] 최신 날짜 조회 오류: {e}")
+        latest_dates = {}
 
     return latest_dates
 
 
+def record_state(collection, symbol: str, status: str, **kwargs):
+    """ingest_state 기록 (상태 기록 실패가 수집을 중단시키지 않도록 예외는 출력만)"""
+    try:
+        record_ingest_result(collection.database, collection.name, symbol, status, **kwargs)
+    except Exception as e:
+        print(f"[{symbol}] 상태 기록 오류: {e}")
+
+
 # =========================================================
 # 4️⃣ Ticker 데이터 다운로드 및 DB 저장
 # =========================================================
-def fetch_and_insert_ticker(symbol: str, collection, latest_date_map: dict):
-    """단일 티커 데이터를 가져와 MongoDB에 저장"""
+def resolve_start_date(symbol: str, latest_date_map: dict):
+    """DB 최신 날짜 다음 날을 시작일로 반환 (이미 최신이면 None)"""
     today = datetime.now().date()
-    tomorrow = today + timedelta(days=1)
 
     latest_date_str = latest_date_map.get(symbol)
-    start_date = "1900-01-01"
-
-    if latest_date_str:
-        latest_date = datetime.strptime(latest_date_str, "%Y-%m-%d").date()
-        start_date = (latest_date + timedelta(days=1)).strftime("%Y-%m-%d")
-        if latest_date >= today:
-            print(f"[{symbol}] ✅ 최신 상태 (최신 날짜: {latest_date_str})")
-            return
-        print(f"[{symbol}] 업데이트 시작 (시작일: {start_date})")
-    else:
+    if not latest_date_str:
         print(f"[{symbol}] 전체 데이터 다운로드 시작")
+        return "1900-01-01"
+
+    latest_date = datetime.strptime(latest_date_str, "%Y-%m-%d").date()
+    if latest_date >= today:
+        print(f"[{symbol}] ✅ 최신 상태 (최신 날짜: {latest_date_str})")
+        return None
+
+    start_date = (latest_date + timedelta(days=1)).strftime("%Y-%m-%d")
+    print(f"[{symbol}] 업데이트 시작 (시작일: {start_date})")
+    return start_date
+
+
+def insert_documents(symbol: str, collection, documents: list):
+    """변환된 문서를 MongoDB에 삽입 (중복은 유니크 인덱스에서 차단)
+
+    DB 쓰기 오류(중복 외)가 나면 FetchFailure(ERROR)를 반환 (호출 측에서 재시도 / 체크포인트 failed)
+    """
+    if documents and is_timeseries_collection(collection):
+        # 시계열 컬렉션은 유니크 인덱스가 없으므로 저장된 마지막 날짜 이후만 남김
+        try:
+            documents = filter_new_documents(collection, documents)
+        except Exception as e:
+            print(f"[{symbol}] DB 조회 오류: {e}")
+            record_state(collection, symbol, "db_error", error=str(e))
+            return FetchFailure(ERROR, f"DB 조회 오류: {e}")
+
+    if not documents:
+        print(f"[{symbol}] 삽입할 데이터 없음")
+        return None
+
+    try:
+        collection.insert_many(documents, ordered=False)
+        inserted = len(documents)
+        print(f"[{symbol}] {inserted}건 삽입 완료")
+    except BulkWriteError as bwe:
+        write_errors = bwe.details.get("writeErrors", [])
+        duplicates = len([e for e in write_errors if e.get("code") == 11000])
+        inserted = len(documents) - duplicates
+        print(f"[{symbol}] {inserted}건 삽입, {duplicates}건 중복")
+        if len(write_errors) > duplicates:
+            # 중복 외 오류가 있으면 마지막 날짜를 올리지 않음 (다음 실행에서 다시 수집)
+            error = str(write_errors[0].get("errmsg"))
+            record_state(collection, symbol, "db_error", inserted=bwe.details.get("nInserted", 0), error=error)
+            return FetchFailure(ERROR, f"DB 쓰기 오류: {error}")
+    except Exception as e:
+        print(f"[{symbol}] DB 삽입 오류: {e}")
+        record_state(collection, symbol, "db_error", error=str(e))
+        return FetchFailure(ERROR, f"DB 쓰기 오류: {e}")
+
+    record_state(collection, symbol, "ok", inserted=inserted,
+                 last_date=max(doc["date"] for doc in documents))
+    return None
+
+
+def download_failure(e: Exception) -> FetchFailure:
+    """다운로드 예외를 분류하고, 429 응답이면 공유 속도 제한기를 감속시킴"""
+    kind = classify_error(e)
+    if kind == THROTTLED:
+        rate_limiter.on_throttle()
+    return FetchFailure(kind, str(e))
+
+
+def record_fetch_failure(collection, symbols, failure: FetchFailure) -> FetchFailure:
+    """다운로드 실패를 심볼별 ingest_state에 기록하고 failure를 그대로 반환"""
+    for symbol in ([symbols] if isinstance(symbols, str) else symbols):
+        record_state(collection, symbol, failure.kind, error=failure.message)
+    return failure
+
+
+def fetch_ticker_documents(symbol: str, collection, latest_date_map: dict):
+    """단일 티커 데이터를 받아 문서 리스트로 변환 → (documents, failure)
+
+    이미 최신이면 (None, None), 실패하면 (None, FetchFailure) 반환
+    """
+    tomorrow = datetime.now().date() + timedelta(days=1)
 
+    start_date = resolve_start_date(symbol, latest_date_map)
+    if start_date is None:
+        return None, None
+
+    rate_limiter.acquire()
     try:
         stock = yf.Ticker(symbol, session=session)
         df = stock.history(start=start_date, end=tomorrow.strftime("%Y-%m-%d"))
     except Exception as e:
         print(f"[{symbol}] 다운로드 실패: {e}")
-        return
+        return None, record_fetch_failure(collection, symbol, download_failure(e))
 
     if df.empty:
         print(f"[{symbol}] 데이터 없음 또는 잘못된 심볼")
-        return
+        rate_limiter.on_empty()
+        return None, record_fetch_failure(collection, symbol, FetchFailure(EMPTY, "빈 응답"))
+    rate_limiter.on_success()
 
-    df = df.reset_index()
-    documents = []
+    # 컬럼 단위 일괄 변환 (iterrows 루프 대체)
+    return dataframe_to_documents(symbol, df), None
 
-    for _, row in df.iterrows():
-        try:
-            date_obj = pd.to_datetime(row['Date']).to_pydatetime()
-        except Exception:
-            continue
 
-        volume_value = int(row['Volume']) if not pd.isna(row['Volume']) else 0
-        doc = {
-            "symbol": symbol,
-            "date": date_obj,
-            "open": float(row["Open"]),
-            "high": float(row["High"]),
-            "low": float(row["Low"]),
-            "close": float(row["Close"]),
-            "volume": volume_value,
-        }
+def fetch_and_insert_ticker(symbol: str, collection, latest_date_map: dict):
+    """단일 티커 데이터를 가져와 MongoDB에 저장 (실패 시 재시도용 FetchFailure 반환)"""
+    documents, failure = fetch_ticker_documents(symbol, collection, latest_date_map)
+    if documents is not None:
+        failure = insert_documents(symbol, collection, documents)
+    return failure
 
-        if "Dividends" in df.columns:
-            doc["dividends"] = float(row["Dividends"])
-        if "Stock Splits" in df.columns:
-            doc["stock_splits"] = float(row["Stock Splits"])
 
-        documents.append(doc)
+def split_download_frame(df: pd.DataFrame, symbol: str) -> pd.DataFrame:
+    """yf.download(group_by="ticker") 결과에서 한 심볼의 history() 형태 DataFrame을 분리"""
+    if isinstance(df.columns, pd.MultiIndex):
+        if symbol not in df.columns.get_level_values(0):
+            return pd.DataFrame()
+        df = df[symbol]
 
-    if not documents:
-        print(f"[{symbol}] 삽입할 데이터 없음")
-        return
+    # 여러 심볼의 날짜 합집합으로 생긴 빈 행 제거
+    df = df.dropna(subset=["Open", "High", "Low", "Close"], how="all")
+    for column in ("Dividends", "Stock Splits"):
+        if column in df.columns:
+            df = df.assign(**{column: df[column].fillna(0.0)})
+    return df
 
+
+def fetch_and_insert_batch(symbols: list, start_date: str, collection):
+    """시작일이 같은 심볼들을 yf.download 한 번으로 받아 심볼별로 MongoDB에 저장"""
+    tomorrow = datetime.now().date() + timedelta(days=1)
+
+    rate_limiter.acquire()
     try:
-        collection.insert_many(documents, ordered=False)
-        print(f"[{symbol}] {len(documents)}건 삽입 완료")
-    except BulkWriteError as bwe:
-        duplicates = len([e for e in bwe.details.get("writeErrors", []) if e.get("code") == 11000])
-        inserted = len(documents) - duplicates
-        print(f"[{symbol}] {inserted}건 삽입, {duplicates}건 중복")
+        # ignore_tz=False: history()와 같은 시각(거래소 현지 자정)으로 저장되도록 유지
+        df = yf.download(
+            symbols,
+            start=start_date,
+            end=tomorrow.strftime("%Y-%m-%d"),
+            actions=True,
+            auto_adjust=True,
+            group_by="ticker",
+            ignore_tz=False,
+            threads=False,
+            progress=False,
+            session=session,
+        )
     except Exception as e:
-        print(f"[{symbol}] DB 삽입 오류: {e}")
+        print(f"[배치 {len(symbols)}개, 시작일 {start_date}] 다운로드 실패: {e}")
+        return record_fetch_failure(collection, symbols, download_failure(e))
+
+    if df is None or df.empty:
+        print(f"[배치 {len(symbols)}개, 시작일 {start_date}] 데이터 없음")
+        rate_limiter.on_empty()
+        return record_fetch_failure(collection, symbols, FetchFailure(EMPTY, "빈 응답"))
+    rate_limiter.on_success()
+
+    write_failures = {}
+    for symbol in symbols:
+        symbol_df = split_download_frame(df, symbol)
+        if symbol_df.empty:
+            print(f"[{symbol}] 데이터 없음 또는 잘못된 심볼")
+            record_fetch_failure(collection, symbol, FetchFailure(EMPTY, "빈 응답"))
+            continue
+        failure = insert_documents(symbol, collection, dataframe_to_documents(symbol, symbol_df))
+        if failure is not None:
+            write_failures[symbol] = failure
+
+    if write_failures:
+        # 심볼별 db_error 상태는 insert_documents에서 기록됨. 배치를 재시도 (저장된 심볼은 유니크 인덱스로 중복 스킵)
+        failed = sorted(write_failures)
+        print(f"[배치 {len(symbols)}개, 시작일 {start_date}] DB 쓰기 실패 {len(failed)}개: {', '.join(failed)}")
+        return FetchFailure(ERROR, f"DB 쓰기 실패 {len(failed)}개 ({', '.join(failed)}): "
+                                   f"{write_failures[failed[0]].message}")
+    return None
+
+
+def group_symbols_by_start_date(symbols: list, latest_date_map: dict, batch_size: int) -> list:
+    """증분 시작일이 같은 심볼끼리 묶어 batch_size 크기의 (시작일, 심볼 목록) 배치로 나눔"""
+    groups = {}
+    for symbol in symbols:
+        start_date = resolve_start_date(symbol, latest_date_map)
+        if start_date is not None:
+            groups.setdefault(start_date, []).append(symbol)
+
+    batches = []
+    for start_date, grouped in groups.items():
+        for i in range(0, len(grouped), batch_size):
+            batches.append((start_date, grouped[i:i + batch_size]))
+    return batches
 
 
 # =========================================================
 # 5️⃣ 병렬 실행 및 세션 종료
 # =========================================================
-def run_parallel_update():
-    start_time = time.time()
-
+def connect_mongo():
+    """MongoDB 연결 (실패 시 None 반환)"""
     try:
         client = MongoClient(MONGO_URI, serverSelectionTimeoutMS=5000)
         client.admin.command("ping")
-        db = client[DATABASE_NAME]
+        return client
     except ServerSelectionTimeoutError as e:
         print(f"❌ MongoDB 연결 실패: {e}")
-        return
     except Exception as e:
         print(f"❌ MongoDB 초기화 오류: {e}")
+    return None
+
+
+def storage_collection_name(collection_name: str) -> str:
+    """STORAGE_MODE에 따른 실제 저장 컬렉션 이름"""
+    if STORAGE_MODE == "timeseries":
+        return timeseries_name(collection_name)
+    return collection_name
+
+
+def prepare_collection(db, collection_name: str):
+    """컬렉션의 (symbol, date) 유니크 인덱스를 준비하고 컬렉션을 반환"""
+    ensure_ingest_state_index(db)
+    if STORAGE_MODE == "timeseries":
+        return ensure_timeseries_collection(db, storage_collection_name(collection_name))
+
+    collection = db[collection_name]
+
+    # 올바른 인덱스가 있으면 그대로 사용 (매 실행마다 재빌드하지 않음)
+    ensure_symbol_date_index(collection)
+    return collection
+
+
+def run_jobs_with_retries(executor, jobs: list, retry_queue: RetryQueue):
+    """(key, 함수, 인자) 작업을 실행하고, FetchFailure를 반환한 작업은 백오프 후 다시 제출"""
+    pending = {executor.submit(func, *args): (key, func, args) for key, func, args in jobs}
+
+    while pending or len(retry_queue):
+        for key, (func, args) in retry_queue.pop_ready():
+            pending[executor.submit(func, *args)] = (key, func, args)
+
+        if not pending:
+            time.sleep(retry_queue.next_ready_in())
+            continue
+
+        done, _ = wait(pending, timeout=retry_queue.next_ready_in(), return_when=FIRST_COMPLETED)
+        for future in done:
+            key, func, args = pending.pop(future)
+            try:
+                failure = future.result()
+            except Exception as e:
+                print(f"❗ 스레드 예외 발생: {e}")
+                failure = FetchFailure(ERROR, str(e))
+
+            if failure is not None:
+                retry_queue.push(key, (func, args), failure)
+
+
+def prepare_collections(db):
+    """모든 대상 컬렉션의 인덱스 준비 + ingest_state 복구 (process 모드에서는 부모가 풀 생성 전에 한 번 실행)"""
+    for type_name in TICKER_LISTS:
+        collection = prepare_collection(db, COLLECTION_NAMES[type_name])
+        bootstrap_ingest_state(db, collection.name)
+
+
+def update_collections(db, mode: str, batch_size: int, retry_queue: RetryQueue,
+                       shard_index: int = 0, shard_count: int = 1, prepared: bool = False) -> int:
+    """TICKER_LISTS 중 담당 샤드의 심볼을 스레드 풀로 수집하고 처리한 심볼 수를 반환
+
+    prepared=True면 인덱스 준비 / ingest_state 복구를 건너뜀 (prepare_collections를 이미 실행한 경우)
+    """
+    total = 0
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+        jobs = []
+        for type_name, symbols in TICKER_LISTS.items():
+            collection_name = COLLECTION_NAMES[type_name]
+            if prepared:
+                collection = db[storage_collection_name(collection_name)]
+            else:
+                collection = prepare_collection(db, collection_name)
+            collection_name = collection.name  # storage 모드에 따라 실제 컬렉션 이름이 달라짐
+
+            if shard_count > 1:
+                symbols = [s for s in symbols if symbol_shard(s, shard_count) == shard_index]
+            total += len(symbols)
+
+            print(f"\n🚀 {collection_name} 업데이트 시작 ({len(symbols)}개 티커)")
+
+            latest_dates = get_latest_dates_from_mongo(db, collection_name, symbols, bootstrap=not prepared)
+            if mode == "batch":
+                batches = group_symbols_by_start_date(symbols, latest_dates, batch_size)
+                print(f"📦 {collection_name}: {len(batches)}개 배치 (배치 크기 {batch_size})")
+                for start_date, batch in batches:
+                    key = f"{batch[0]} 외 {len(batch) - 1}개 ({start_date})"
+                    jobs.append((key, fetch_and_insert_batch, (batch, start_date, collection)))
+            else:
+                for symbol in symbols:
+                    jobs.append((symbol, fetch_and_insert_ticker, (symbol, collection, latest_dates)))
+
+        run_jobs_with_retries(executor, jobs, retry_queue)
+    return total
+
+
+def run_parallel_update(mode: str = "ticker", batch_size: int = BATCH_SIZE):
+    """mode="ticker": 심볼별 history() / mode="batch": 시작일별 yf.download 묶음 요청"""
+    start_time = time.time()
+
+    client = connect_mongo()
+    if client is None:
         return
+    db = client[DATABASE_NAME]
+
+    retry_queue = RetryQueue(max_attempts=RETRY_MAX_ATTEMPTS)
+    update_collections(db, mode, batch_size, retry_queue)
+
+    client.close()
+    session.close()  # ✅ 스크립트 종료 시 세션 닫기
+
+    retry_queue.print_report()
+
+    end_time = time.time()
+    print("\n=======================================================")
+    print(f"🎉 전체 업데이트 완료! 소요 시간: {end_time - start_time:.2f}초")
+    print("=======================================================")
+
+
+# =========================================================
+# 6️⃣ asyncio 수집 엔진 (AsyncSession + 스레드 오프로드 쓰기)
+# =========================================================
+async def fetch_ticker_async(http, semaphore, symbol: str, start_date: str, collection, write_queue):
+    """chart API로 단일 티커를 비동기 다운로드한 뒤 쓰기 대기열에 넣음"""
+    tomorrow = datetime.now().date() + timedelta(days=1)
+    url, params = chart_request(symbol, start_date, tomorrow.strftime("%Y-%m-%d"))
+
+    # 세마포어는 HTTP 요청 구간에만 적용 (대기열 대기 중에는 슬롯을 반납)
+    failure = None
+    async with semaphore:
+        await rate_limiter.acquire_async()
+        try:
+            response = await http.get(url, params=params, timeout=30)
+            response.raise_for_status()
+            df = chart_json_to_frame(response.json(), start_date)
+        except Exception as e:
+            print(f"[{symbol}] 다운로드 실패: {e}")
+            failure = download_failure(e)
+
+    # 실패 기록(pymongo 동기 호출)은 슬롯을 반납한 뒤 스레드에서 실행 (이벤트 루프를 막지 않음)
+    if failure is None and df.empty:
+        print(f"[{symbol}] 데이터 없음 또는 잘못된 심볼")
+        rate_limiter.on_empty()
+        failure = FetchFailure(EMPTY, "빈 응답")
+    if failure is not None:
+        return await asyncio.to_thread(record_fetch_failure, collection, symbol, failure)
+    rate_limiter.on_success()
+
+    await write_queue.put((symbol, collection, df))
+    return None
+
+
+async def fetch_ticker_with_retries(http, semaphore, symbol: str, start_date: str, collection,
+                                    write_queue, retry_queue: RetryQueue):
+    """실패 시 retry_queue의 백오프 시간만큼 기다렸다가 다시 시도"""
+    while True:
+        failure = await fetch_ticker_async(http, semaphore, symbol, start_date, collection, write_queue)
+        if failure is None:
+            return
+        delay = retry_queue.record_failure(symbol, failure)
+        if delay is None:
+            return
+        await asyncio.sleep(delay)
+
+
+def convert_and_insert(symbol: str, collection, df: pd.DataFrame):
+    """문서 변환 + insert_many (쓰기 스레드에서 실행)"""
+    insert_documents(symbol, collection, dataframe_to_documents(symbol, df))
+
+
+async def mongo_writer(write_queue):
+    """대기열에서 꺼낸 데이터를 스레드로 넘겨 변환/저장 (이벤트 루프를 막지 않음)"""
+    while True:
+        item = await write_queue.get()
+        try:
+            if item is None:
+                return
+            await asyncio.to_thread(convert_and_insert, *item)
+        except Exception as e:
+            print(f"❗ 쓰기 예외 발생: {e}")
+        finally:
+            write_queue.task_done()
+
+
+async def _run_async_update(db, concurrency: int, retry_queue: RetryQueue):
+    semaphore = asyncio.Semaphore(concurrency)
+    write_queue = asyncio.Queue(maxsize=ASYNC_QUEUE_SIZE)
+    writers = [asyncio.create_task(mongo_writer(write_queue)) for _ in range(ASYNC_WRITERS)]
+
+    async with AsyncSession(impersonate="chrome", headers=HEADERS, verify=False,
+                            max_clients=concurrency) as http:
+        tasks = []
+        for type_name, symbols in TICKER_LISTS.items():
+            collection_name = COLLECTION_NAMES[type_name]
+            collection = await asyncio.to_thread(prepare_collection, db, collection_name)
+            collection_name = collection.name  # storage 모드에 따라 실제 컬렉션 이름이 달라짐
+
+            print(f"\n🚀 {collection_name} 업데이트 시작 ({len(symbols)}개 티커)")
+
+            latest_dates = await asyncio.to_thread(get_latest_dates_from_mongo, db, collection_name, symbols)
+            for symbol in symbols:
+                start_date = resolve_start_date(symbol, latest_dates)
+                if start_date is not None:
+                    tasks.append(asyncio.create_task(fetch_ticker_with_retries(
+                        http, semaphore, symbol, start_date, collection, write_queue, retry_queue
+                    )))
+
+        for result in await asyncio.gather(*tasks, return_exceptions=True):
+            if isinstance(result, Exception):
+                print(f"❗ 비동기 작업 예외 발생: {result}")
 
+    for _ in writers:
+        await write_queue.put(None)
+    await asyncio.gather(*writers)
+
+
+def run_async_update(concurrency: int = ASYNC_CONCURRENCY):
+    """asyncio 모드: 최대 concurrency개의 요청을 동시에 진행하며 MongoDB 쓰기는 별도 작업자가 처리"""
+    start_time = time.time()
+
+    client = connect_mongo()
+    if client is None:
+        return
+
+    retry_queue = RetryQueue(max_attempts=RETRY_MAX_ATTEMPTS)
+    try:
+        asyncio.run(_run_async_update(client[DATABASE_NAME], concurrency, retry_queue))
+    finally:
+        client.close()
+
+    retry_queue.print_report()
+
+    end_time = time.time()
+    print("\n=======================================================")
+    print(f"🎉 전체 업데이트 완료! 소요 시간: {end_time - start_time:.2f}초")
+    print("=======================================================")
+
+
+# =========================================================
+# 7️⃣ 파이프라인 모드 (다운로드 스레드 → 대기열 → 병합 쓰기 스레드)
+# =========================================================
+class PipelineMetrics:
+    """대기열 깊이와 쓰기 배치 크기 지표"""
+
+    def __init__(self, write_queue):
+        self.write_queue = write_queue
+        self.max_queue_depth = 0
+        self.batches = 0
+        self.documents = 0
+        self.last_batch_size = 0
+        self.max_batch_size = 0
+        self._lock = threading.Lock()
+
+    def sample_queue(self):
+        depth = self.write_queue.qsize()
+        with self._lock:
+            self.max_queue_depth = max(self.max_queue_depth, depth)
+
+    def record_batch(self, size: int):
+        with self._lock:
+            self.batches += 1
+            self.documents += size
+            self.last_batch_size = size
+            self.max_batch_size = max(self.max_batch_size, size)
+
+    def summary(self) -> str:
+        with self._lock:
+            average = self.documents / self.batches if self.batches else 0
+            return (f"📊 대기열 {self.write_queue.qsize()}/{self.write_queue.maxsize} "
+                    f"(최대 {self.max_queue_depth}) | 쓰기 배치 {self.batches}회, "
+                    f"최근 {self.last_batch_size}건, 평균 {average:.0f}건, 최대 {self.max_batch_size}건, "
+                    f"누적 {self.documents}건")
+
+
+def fetch_and_enqueue_ticker(symbol: str, collection, latest_date_map: dict, write_queue, metrics):
+    """단일 티커를 다운로드/변환한 뒤 쓰기 대기열에 넣음 (대기열이 가득 차면 쓰기 스레드를 기다림)"""
+    documents, failure = fetch_ticker_documents(symbol, collection, latest_date_map)
+    if documents:
+        write_queue.put((collection, documents))
+        metrics.sample_queue()
+    return failure
+
+
+def bulk_insert_coalesced(collection, documents: list) -> int:
+    """여러 심볼의 문서를 한 번의 unordered insert_many로 저장하고 심볼별 ingest_state를 기록"""
+    if is_timeseries_collection(collection):
+        documents = filter_new_documents(collection, documents)
+        if not documents:
+            return 0
+
+    errors = {}
+    duplicates = {}
+    try:
+        collection.insert_many(documents, ordered=False)
+        inserted = len(documents)
+    except BulkWriteError as bwe:
+        for err in bwe.details.get("writeErrors", []):
+            symbol = documents[err["index"]]["symbol"]
+            if err.get("code") == 11000:
+                duplicates[symbol] = duplicates.get(symbol, 0) + 1
+            else:
+                errors.setdefault(symbol, str(err.get("errmsg")))
+        inserted = bwe.details.get("nInserted", 0)
+    except Exception as e:
+        print(f"[{collection.name}] 병합 쓰기 오류 ({len(documents)}건): {e}")
+        for symbol in {doc["symbol"] for doc in documents}:
+            record_state(collection, symbol, "db_error", error=str(e))
+        return 0
+
+    per_symbol = {}
+    for doc in documents:
+        stats = per_symbol.setdefault(doc["symbol"], [0, doc["date"]])
+        stats[0] += 1
+        stats[1] = max(stats[1], doc["date"])
+
+    for symbol, (count, last_date) in per_symbol.items():
+        if symbol in errors:
+            record_state(collection, symbol, "db_error", error=errors[symbol])
+        else:
+            record_state(collection, symbol, "ok", inserted=count - duplicates.get(symbol, 0),
+                         last_date=last_date)
+
+    print(f"[{collection.name}] 병합 쓰기: {len(per_symbol)}개 심볼, {inserted}건 삽입, "
+          f"{sum(duplicates.values())}건 중복")
+    return inserted
+
+
+def pipeline_writer(write_queue, metrics, batch_size: int = WRITER_BATCH_SIZE):
+    """대기열의 문서를 컬렉션별로 모아 batch_size 이상 또는 WRITER_FLUSH_SECONDS 경과 시 저장"""
+    buffers = {}
+    buffered = 0
+    deadline = None
+
+    def flush():
+        # 루프 중 / 종료 신호 후 마지막 저장 모두 같은 처리: 예외가 나도 심볼별 실패를 기록하고 스레드는 유지
+        for collection, documents in buffers.values():
+            if not documents:
+                continue
+            try:
+                bulk_insert_coalesced(collection, documents)
+                metrics.record_batch(len(documents))
+            except Exception as e:
+                print(f"❗ 쓰기 스레드 예외 발생: {e}")
+                for symbol in {doc["symbol"] for doc in documents}:
+                    record_state(collection, symbol, "db_error", error=str(e))
+        buffers.clear()
+
+    while True:
+        timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+        try:
+            item = write_queue.get(timeout=timeout)
+        except queue.Empty:
+            item = ()
+
+        if item is None:
+            flush()
+            return
+
+        if item:
+            collection, documents = item
+            buffers.setdefault(collection.name, (collection, []))[1].extend(documents)
+            buffered += len(documents)
+            if deadline is None:
+                deadline = time.monotonic() + WRITER_FLUSH_SECONDS
+
+        if buffered >= batch_size or (deadline is not None and time.monotonic() >= deadline):
+            flush()
+            buffered = 0
+            deadline = None
+
+
+def run_pipeline_update(writers: int = PIPELINE_WRITERS, batch_size: int = WRITER_BATCH_SIZE):
+    """pipeline 모드: 다운로드(MAX_WORKERS 스레드)와 MongoDB 쓰기(writers 스레드)를 겹쳐서 실행"""
+    start_time = time.time()
+
+    client = connect_mongo()
+    if client is None:
+        return
+    db = client[DATABASE_NAME]
+
+    write_queue = queue.Queue(maxsize=PIPELINE_QUEUE_SIZE)
+    metrics = PipelineMetrics(write_queue)
+    writer_threads = [
+        threading.Thread(target=pipeline_writer, args=(write_queue, metrics, batch_size), daemon=True)
+        for _ in range(writers)
+    ]
+    for thread in writer_threads:
+        thread.start()
+
+    stop_monitor = threading.Event()
+
+    def monitor():
+        while not stop_monitor.wait(PIPELINE_METRICS_INTERVAL):
+            metrics.sample_queue()
+            print(metrics.summary())
+
+    threading.Thread(target=monitor, daemon=True).start()
+
+    retry_queue = RetryQueue(max_attempts=RETRY_MAX_ATTEMPTS)
     with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
-        all_futures = []
+        jobs = []
         for type_name, symbols in TICKER_LISTS.items():
             collection_name = COLLECTION_NAMES[type_name]
-            collection = db[collection_name]
-
-            # 기존 인덱스 충돌 시 제거 후 재생성
-            existing_indexes = collection.index_information()
-            for name, info in existing_indexes.items():
-                if info.get("key") == [('symbol', 1), ('date', 1)]:
-                    print(f"⚙️ {collection_name}: 기존 인덱스 제거")
-                    collection.drop_index(name)
-                    break
-
-            collection.create_index(
-                [("symbol", 1), ("date", 1)],
-                unique=True,
-                name="symbol_date_unique_index"
-            )
+            collection = prepare_collection(db, collection_name)
+            collection_name = collection.name  # storage 모드에 따라 실제 컬렉션 이름이 달라짐
 
             print(f"\n🚀 {collection_name} 업데이트 시작 ({len(symbols)}개 티커)")
 
             latest_dates = get_latest_dates_from_mongo(db, collection_name, symbols)
             for symbol in symbols:
-                future = executor.submit(fetch_and_insert_ticker, symbol, collection, latest_dates)
-                all_futures.append(future)
+                jobs.append((symbol, fetch_and_enqueue_ticker,
+                             (symbol, collection, latest_dates, write_queue, metrics)))
+
+        run_jobs_with_retries(executor, jobs, retry_queue)
+
+    for _ in writer_threads:
+        write_queue.put(None)
+    for thread in writer_threads:
+        thread.join()
+    stop_monitor.set()
+
+    client.close()
+    session.close()
+
+    print(metrics.summary())
+    retry_queue.print_report()
+
+    end_time = time.time()
+    print("\n=======================================================")
+    print(f"🎉 전체 업데이트 완료! 소요 시간: {end_time - start_time:.2f}초")
+    print("=======================================================")
+
+
+# =========================================================
+# 8️⃣ 재시작 가능한 전체 백필 (체크포인트 + 심볼 해시 샤딩)
+# =========================================================
+def backfill_symbol(symbol: str, collection, latest_date_map: dict, job_id: str, owner: str):
+    """체크포인트를 in_progress → done / failed 로 갱신하며 단일 심볼을 수집"""
+    db = collection.database
+    update_checkpoint(db, job_id, collection.name, symbol, CHECKPOINT_IN_PROGRESS, owner=owner)
+
+    failure = fetch_and_insert_ticker(symbol, collection, latest_date_map)
+    if failure is None:
+        update_checkpoint(db, job_id, collection.name, symbol, CHECKPOINT_DONE, owner=owner)
+    else:
+        update_checkpoint(db, job_id, collection.name, symbol, CHECKPOINT_FAILED, owner=owner,
+                          error=f"{failure.kind}: {failure.message}")
+    return failure
+
+
+def run_backfill(job_id: str = BACKFILL_JOB_ID, shard_index: int = 0, shard_count: int = 1,
+                 retry_failed: bool = False):
+    """backfill 모드: TICKER_LISTS 전체를 체크포인트와 함께 수집
+
+    - done 심볼은 건너뛰고, 중단 당시 in_progress였던 심볼은 다시 수집
+    - 심볼 안에서는 ingest_state의 마지막 날짜 다음 날부터 이어서 받음
+    - symbol_shard(symbol, shard_count) == shard_index 인 심볼만 처리 (여러 프로세스/호스트 분할)
+    """
+    if not 0 <= shard_index < shard_count:
+        print(f"❌ 잘못된 샤드 설정: {shard_index}/{shard_count}")
+        return
+
+    start_time = time.time()
+
+    client = connect_mongo()
+    if client is None:
+        return
+    db = client[DATABASE_NAME]
+    ensure_checkpoint_index(db)
+
+    owner = f"{socket.gethostname()}:{os.getpid()}"
+    skip_statuses = {CHECKPOINT_DONE} if retry_failed else {CHECKPOINT_DONE, CHECKPOINT_FAILED}
+    retry_queue = RetryQueue(max_attempts=RETRY_MAX_ATTEMPTS)
+
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+        jobs = []
+        for type_name, symbols in TICKER_LISTS.items():
+            collection_name = COLLECTION_NAMES[type_name]
+            collection = prepare_collection(db, collection_name)
+            collection_name = collection.name  # storage 모드에 따라 실제 컬렉션 이름이 달라짐
+
+            shard_symbols = [s for s in symbols if symbol_shard(s, shard_count) == shard_index]
+            seed_checkpoints(db, job_id, collection_name, shard_symbols)
+            status = load_checkpoint_status(db, job_id, collection_name)
+
+            todo = [s for s in shard_symbols if status.get(s) not in skip_statuses]
+            resumed = sum(1 for s in todo if status.get(s) == CHECKPOINT_IN_PROGRESS)
+            print(f"\n🚀 {collection_name} 백필 [샤드 {shard_index}/{shard_count}] "
+                  f"{len(shard_symbols)}개 중 {len(shard_symbols) - len(todo)}개 건너뜀, "
+                  f"{len(todo)}개 수집 (중단된 심볼 {resumed}개 재개)")
+            if not todo:
+                continue
+
+            latest_dates = get_latest_dates_from_mongo(db, collection_name, todo)
+            for symbol in todo:
+                jobs.append((symbol, backfill_symbol, (symbol, collection, latest_dates, job_id, owner)))
+
+        run_jobs_with_retries(executor, jobs, retry_queue)
+
+    client.close()
+    session.close()
+
+    retry_queue.print_report()
+
+    end_time = time.time()
+    print("\n=======================================================")
+    print(f"🎉 백필 [{job_id} 샤드 {shard_index}/{shard_count}] 완료! 소요 시간: {end_time - start_time:.2f}초")
+    print("=======================================================")
+
+
+# =========================================================
+# 9️⃣ 멀티 프로세스 모드 (변환·BSON 인코딩을 모든 코어로 분산)
+# =========================================================
+def _init_process_worker(processes: int, storage_mode: str):
+    """작업 프로세스마다 HTTP 세션과 속도 제한기를 새로 만듦 (전체 요청 속도는 프로세스 수로 나눔)"""
+    global session, rate_limiter, STORAGE_MODE
+    STORAGE_MODE = storage_mode
+    # spawn으로 모듈을 다시 import하며 만들어진 세션은 닫고 교체
+    session.close()
+    session = requests.Session(impersonate="chrome", headers=HEADERS, verify=False)
+    rate_limiter = AdaptiveRateLimiter(
+        rate=RATE_LIMIT_PER_SEC / processes,
+        min_rate=0.5 / processes,
+        max_rate=RATE_LIMIT_MAX_PER_SEC / processes,
+    )
+
+
+def run_shard_worker(shard_index: int, shard_count: int, fetch_mode: str, batch_size: int) -> dict:
+    """한 샤드를 자체 MongoClient / HTTP 세션으로 수집하고 요약을 반환 (인덱스/상태 준비는 부모가 끝냄)"""
+    start_time = time.time()
+
+    client = connect_mongo()
+    if client is None:
+        return {"shard": shard_index, "symbols": 0, "elapsed": 0.0,
+                "failures": {f"샤드 {shard_index}": FetchFailure(ERROR, "MongoDB 연결 실패")}}
+
+    retry_queue = RetryQueue(max_attempts=RETRY_MAX_ATTEMPTS)
+    try:
+        total = update_collections(client[DATABASE_NAME], fetch_mode, batch_size, retry_queue,
+                                   shard_index, shard_count, prepared=True)
+    finally:
+        client.close()
+        session.close()
+
+    return {"shard": shard_index, "symbols": total, "elapsed": time.time() - start_time,
+            "failures": dict(retry_queue.permanent_failures)}
 
-        for future in as_completed(all_futures):
+
+def run_process_update(processes: int = PROCESS_WORKERS, fetch_mode: str = "batch",
+                       batch_size: int = BATCH_SIZE):
+    """process 모드: TICKER_LISTS를 심볼 해시로 processes개 샤드로 나눠 프로세스별로 수집"""
+    start_time = time.time()
+
+    # 인덱스 준비와 ingest_state 복구(전체 집계)는 프로세스마다 동시에 돌지 않도록 여기서 한 번만
+    client = connect_mongo()
+    if client is None:
+        return
+    try:
+        prepare_collections(client[DATABASE_NAME])
+    except Exception as e:
+        print(f"❌ 컬렉션 준비 오류: {e}")
+        return
+    finally:
+        client.close()
+
+    # fork 시 curl 세션/스레드 상태가 복사되지 않도록 spawn 사용
+    context = multiprocessing.get_context("spawn")
+    summaries = []
+    with ProcessPoolExecutor(max_workers=processes, mp_context=context,
+                             initializer=_init_process_worker, initargs=(processes, STORAGE_MODE)) as executor:
+        futures = [
+            executor.submit(run_shard_worker, shard_index, processes, fetch_mode, batch_size)
+            for shard_index in range(processes)
+        ]
+        for future in as_completed(futures):
             try:
-                future.result()
+                summaries.append(future.result())
             except Exception as e:
-                print(f"❗ 스레드 예외 발생: {e}")
+                print(f"❗ 프로세스 예외 발생: {e}")
 
-    client.close()
-    session.close()  # ✅ 스크립트 종료 시 세션 닫기
+    report = RetryQueue()
+    print("\n=======================================================")
+    for summary in sorted(summaries, key=lambda s: s["shard"]):
+        report.permanent_failures.update(summary["failures"])
+        print(f"   - 샤드 {summary['shard']}: {summary['symbols']}개 심볼, "
+              f"실패 {len(summary['failures'])}건, {summary['elapsed']:.2f}초")
+    print(f"📋 프로세스 {len(summaries)}/{processes}개 완료, "
+          f"총 {sum(s['symbols'] for s in summaries)}개 심볼")
+    report.print_report()
 
     end_time = time.time()
     print("\n=======================================================")
@@ -4895,7 +5625,107 @@ def run_parallel_update():
 
 
 # =========================================================
-# 6️⃣ 실행
+# 🔟 ingest_state 복구
+# =========================================================
+def run_rebuild_state():
+    """가격 컬렉션을 집계해 ingest_state를 다시 만듭니다 (상태가 어긋났을 때만 사용)"""
+    client = connect_mongo()
+    if client is None:
+        return
+    db = client[DATABASE_NAME]
+    ensure_ingest_state_index(db)
+
+    for type_name, symbols in TICKER_LISTS.items():
+        collection_name = storage_collection_name(COLLECTION_NAMES[type_name])
+        count = rebuild_ingest_state(db, collection_name)
+        print(f"🔧 {collection_name}: {count}개 심볼 상태 재구성")
+
+    client.close()
+
+
+# =========================================================
+# 1️⃣1️⃣ 한국 종목 접미사 확인
+# =========================================================
+def probe_yahoo_symbols(symbols: list) -> set:
+    """최근 1개월 데이터가 있는 심볼 집합을 반환 (yf.download 묶음 요청 1회)"""
+    rate_limiter.acquire()
+    df = yf.download(symbols, period="1mo", auto_adjust=True, group_by="ticker",
+                     threads=False, progress=False, session=session)
+    if df is None or df.empty:
+        return set()
+    return {symbol for symbol in symbols if not split_download_frame(df, symbol).empty}
+
+
+def resolve_korean_suffixes(batch_size: int = BATCH_SIZE):
+    """접미사를 모르는 한국 종목코드를 묶음으로 확인해 캐시에 저장하고 티커 목록을 다시 만듭니다"""
+    if not UNRESOLVED_KOREAN_CODES:
+        return
+
+    print(f"🔎 접미사 미확인 한국 종목 {len(UNRESOLVED_KOREAN_CODES)}개 확인 중 (.KS → .KQ)")
+    try:
+        resolved = suffix_resolver.prefill(sorted(UNRESOLVED_KOREAN_CODES), probe_yahoo_symbols, batch_size)
+    except Exception as e:
+        print(f"⚠️ 접미사 확인 실패, 미확인 종목은 .KS로 요청합니다: {e}")
+        return
+
+    counts = {suffix: sum(1 for s in resolved.values() if s == suffix) for suffix in (*KOREAN_SUFFIXES, "")}
+    print(f"✅ 코스피 {counts['.KS']}개 / 코스닥 {counts['.KQ']}개 / 데이터 없음 {counts['']}개")
+    UNRESOLVED_KOREAN_CODES.clear()
+    TICKER_LISTS["korean_stocks"] = format_korean_tickers(TICKER_LISTS["korean_stocks"])
+
+
+# =========================================================
+# 1️⃣2️⃣ 실행
 # =========================================================
 if __name__ == "__main__":
-    run_parallel_update()
+    parser = argparse.ArgumentParser(description="yfinance → MongoDB 주가 업데이트")
+    parser.add_argument("--mode", choices=["ticker", "batch", "async", "pipeline", "backfill", "process"],
+                        default="ticker",
+                        help="ticker: 심볼별 요청 / batch: yf.download 묶음 요청 / async: asyncio 동시 요청 / "
+                             "pipeline: 다운로드·쓰기 분리 / backfill: 체크포인트 기반 전체 수집 / "
+                             "process: 멀티 프로세스 샤딩")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE,
+                        help=f"batch 모드에서 한 번에 요청할 심볼 수 (기본 {BATCH_SIZE})")
+    parser.add_argument("--concurrency", type=int, default=ASYNC_CONCURRENCY,
+                        help=f"async 모드의 동시 HTTP 요청 수 (기본 {ASYNC_CONCURRENCY}, 32~64 권장)")
+    parser.add_argument("--writers", type=int, default=PIPELINE_WRITERS,
+                        help=f"pipeline 모드의 MongoDB 쓰기 스레드 수 (기본 {PIPELINE_WRITERS})")
+    parser.add_argument("--writer-batch-size", type=int, default=WRITER_BATCH_SIZE,
+                        help=f"pipeline 모드에서 한 번에 쓰는 문서 수 (기본 {WRITER_BATCH_SIZE})")
+    parser.add_argument("--processes", type=int, default=PROCESS_WORKERS,
+                        help=f"process 모드의 작업 프로세스 수 (기본 CPU 코어 수 {PROCESS_WORKERS})")
+    parser.add_argument("--process-fetch", choices=["ticker", "batch"], default="batch",
+                        help="process 모드에서 각 프로세스가 사용할 다운로드 방식 (기본 batch)")
+    parser.add_argument("--job-id", default=BACKFILL_JOB_ID,
+                        help=f"backfill 모드의 체크포인트 작업 이름 (기본 {BACKFILL_JOB_ID})")
+    parser.add_argument("--shard-index", type=int, default=0,
+                        help="backfill 모드에서 이 프로세스가 맡을 샤드 번호 (0부터)")
+    parser.add_argument("--shard-count", type=int, default=1,
+                        help="backfill 모드의 전체 샤드 수 (프로세스/호스트 수)")
+    parser.add_argument("--retry-failed", action="store_true",
+                        help="backfill 모드에서 failed 상태 심볼도 다시 수집")
+    parser.add_argument("--storage", choices=["document", "timeseries"], default=STORAGE_MODE,
+                        help="document: 기존 컬렉션 / timeseries: {컬렉션}_ts 시계열 컬렉션에 저장")
+    parser.add_argument("--rebuild-state", action="store_true",
+                        help="수집 대신 가격 데이터를 집계해 ingest_state를 재구성 (복구용)")
+    args = parser.parse_args()
+    STORAGE_MODE = args.storage
+
+    # 처음 보는 한국 종목코드만 한 번 확인 (이후 실행과 process 모드 작업 프로세스는 캐시 사용)
+    if not args.rebuild_state:
+        resolve_korean_suffixes(args.batch_size)
+
+    if args.rebuild_state:
+        run_rebuild_state()
+    elif args.mode == "async":
+        run_async_update(concurrency=args.concurrency)
+    elif args.mode == "pipeline":
+        run_pipeline_update(writers=args.writers, batch_size=args.writer_batch_size)
+    elif args.mode == "process":
+        run_process_update(processes=args.processes, fetch_mode=args.process_fetch,
+                           batch_size=args.batch_size)
+    elif args.mode == "backfill":
+        run_backfill(job_id=args.job_id, shard_index=args.shard_index, shard_count=args.shard_count,
+                     retry_failed=args.retry_failed)
+    else:
+        run_parallel_update(mode=args.mode, batch_size=args.batch_size)
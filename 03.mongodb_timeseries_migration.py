@@ -0,0 +1,152 @@
+# mongodb_timeseries_migration.py
+# 기존 주가 컬렉션(us_stocks 등)을 MongoDB 시계열 컬렉션({이름}_ts)으로 복사하는 마이그레이션
+# 사용법: python 03.mongodb_timeseries_migration.py [--collections us_stocks indices] [--chunk-size 10000]
+#        이후 02.mongodb_update.py --storage timeseries 로 업데이트
+
+import argparse
+import time
+from datetime import datetime, timezone
+
+from pymongo import MongoClient
+from pymongo.errors import PyMongoError, ServerSelectionTimeoutError
+
+from mongo_utils import (ensure_timeseries_collection, timeseries_name, rebuild_ingest_state,
+                         ensure_ingest_state_index)
+
+# =========================================================
+# 1️⃣ 환경 설정
+# =========================================================
+MONGO_URI = "mongodb://localhost:27017/"
+DATABASE_NAME = "finance_db"
+CHUNK_SIZE = 10000
+MIGRATION_STATE_COLLECTION = "timeseries_migration_state"   # 심볼별 복사 완료 기록
+
+COLLECTION_NAMES = {
+    "us_stocks": "us_stocks",
+    "korean_stocks": "korean_stocks",
+    "indices": "indices",
+    "currencies": "currencies",
+}
+
+PRICE_FIELDS = {"_id": 0, "symbol": 1, "date": 1, "open": 1, "high": 1, "low": 1, "close": 1,
+                "volume": 1, "dividends": 1, "stock_splits": 1}
+
+
+# =========================================================
+# 2️⃣ 컬렉션 복사
+# =========================================================
+def migrate_collection(db, collection_name: str, chunk_size: int = CHUNK_SIZE) -> tuple:
+    """심볼별로 (symbol, date) 인덱스 순서대로 읽어 시계열 컬렉션에 삽입하고 (복사 건수, 실패 심볼 목록) 반환
+
+    심볼 복사가 끝나면 원본 문서 수와 함께 완료 기록을 남기므로 중단 후 다시 실행해도 됩니다.
+    - 완료 기록이 있고 원본 문서 수가 그대로면 건너뜀
+    - 시계열 컬렉션이 비어 있으면 전부 복사
+    - 일부만 있으면(중단, insert_many 일부 실패) 이미 있는 날짜를 빼고 전부 다시 복사해 중간 빈 구간까지 채움
+    """
+    source = db[collection_name]
+    target = ensure_timeseries_collection(db, timeseries_name(collection_name))
+    state = db[MIGRATION_STATE_COLLECTION]
+    completed = {doc["symbol"]: doc.get("source_count")
+                 for doc in state.find({"collection": collection_name}, {"symbol": 1, "source_count": 1})}
+
+    copied = 0
+    failed = []
+    symbols = source.distinct("symbol")
+    for i, symbol in enumerate(symbols, 1):
+        source_count = source.count_documents({"symbol": symbol})
+        if completed.get(symbol) != source_count:
+            try:
+                copied += _copy_symbol(source, target, symbol, chunk_size)
+            except PyMongoError as e:
+                # 완료 기록을 남기지 않으므로 다음 실행에서 빠진 날짜를 다시 복사
+                print(f"❌ {collection_name} {symbol} 복사 실패: {e}")
+                failed.append(symbol)
+            else:
+                state.replace_one(
+                    {"_id": f"{collection_name}:{symbol}"},
+                    {"collection": collection_name, "symbol": symbol, "source_count": source_count,
+                     "completed_at": datetime.now(timezone.utc)},
+                    upsert=True,
+                )
+
+        if i % 100 == 0:
+            print(f"   - {collection_name}: {i}/{len(symbols)} 심볼, {copied}건 복사")
+
+    return copied, failed
+
+
+def _copy_symbol(source, target, symbol: str, chunk_size: int) -> int:
+    """한 심볼의 원본 문서 중 시계열 컬렉션에 없는 날짜만 복사"""
+    existing = {doc["date"] for doc in target.find({"symbol": symbol}, {"_id": 0, "date": 1})}
+    cursor = source.find({"symbol": symbol}, PRICE_FIELDS).sort("date", 1).batch_size(chunk_size)
+
+    copied = 0
+    chunk = []
+    for doc in cursor:
+        if doc["date"] in existing:
+            continue
+        chunk.append(doc)
+        if len(chunk) >= chunk_size:
+            target.insert_many(chunk, ordered=False)
+            copied += len(chunk)
+            chunk = []
+    if chunk:
+        target.insert_many(chunk, ordered=False)
+        copied += len(chunk)
+    return copied
+
+
+def storage_size(db, collection_name: str) -> int:
+    try:
+        return db.command("collStats", collection_name).get("storageSize", 0)
+    except Exception:
+        return 0
+
+
+# =========================================================
+# 3️⃣ 실행
+# =========================================================
+def run_migration(collection_names: list, chunk_size: int = CHUNK_SIZE):
+    start_time = time.time()
+
+    try:
+        client = MongoClient(MONGO_URI, serverSelectionTimeoutMS=5000)
+        client.admin.command("ping")
+    except ServerSelectionTimeoutError as e:
+        print(f"❌ MongoDB 연결 실패: {e}")
+        return
+
+    db = client[DATABASE_NAME]
+    ensure_ingest_state_index(db)
+
+    for collection_name in collection_names:
+        ts_name = timeseries_name(collection_name)
+        print(f"\n🚚 {collection_name} → {ts_name} 마이그레이션 시작")
+
+        copied, failed = migrate_collection(db, collection_name, chunk_size)
+        rebuild_ingest_state(db, ts_name)
+
+        source_count = db[collection_name].estimated_document_count()
+        target_count = db[ts_name].count_documents({})
+        source_size = storage_size(db, collection_name)
+        target_size = storage_size(db, ts_name)
+        ratio = f"{target_size / source_size * 100:.1f}%" if source_size else "-"
+        print(f"✅ {collection_name}: {copied}건 복사 (원본 {source_count}건 / 시계열 {target_count}건), "
+              f"저장 공간 {source_size / 1e6:.1f}MB → {target_size / 1e6:.1f}MB ({ratio})")
+        if failed:
+            print(f"❗ {collection_name}: 복사 실패 심볼 {len(failed)}개 (다시 실행하면 빠진 날짜만 복사): "
+                  f"{', '.join(failed[:20])}{' ...' if len(failed) > 20 else ''}")
+
+    client.close()
+    print(f"\n🎉 마이그레이션 완료! 소요 시간: {time.time() - start_time:.2f}초")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="주가 컬렉션 → MongoDB 시계열 컬렉션 마이그레이션")
+    parser.add_argument("--collections", nargs="+", default=list(COLLECTION_NAMES.values()),
+                        help="마이그레이션할 컬렉션 (기본: 전체)")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE,
+                        help=f"insert_many 한 번에 넣을 문서 수 (기본 {CHUNK_SIZE})")
+    args = parser.parse_args()
+
+    run_migration(args.collections, args.chunk_size)
@@ -0,0 +1,84 @@
+# real_estate_fingerprint_migration.py
+# 기존 실거래가 문서에 fingerprint(주요 필드 해시)를 채우고, 18~21개 필드 복합 유니크 인덱스를 fingerprint 인덱스로 교체
+# 계약일(contract_date) / ㎡당 가격(price_per_m2) / 지역(region 코드, region_name) 파생 필드와 조회 인덱스도 함께 준비
+# 사용법: python 03.real_estate_fingerprint_migration.py [--keep-old-index]
+
+import argparse
+import time
+
+from pymongo import MongoClient
+from pymongo.errors import ServerSelectionTimeoutError
+
+from real_estate_utils import (SALE_KEY_FIELDS, RENT_KEY_FIELDS, SALE_AMOUNT_FIELD, RENT_AMOUNT_FIELD,
+                               FINGERPRINT_INDEX_NAME, backfill_fingerprints, remove_duplicate_fingerprints,
+                               ensure_fingerprint_index, drop_compound_unique_indexes,
+                               backfill_derived_fields, ensure_query_indexes)
+
+# =========================================================
+# 1️⃣ 환경 설정
+# =========================================================
+MONGO_URI = "mongodb://localhost:27017/"
+DB_NAME = "real_estate_db"
+
+# 컬렉션 이름 → (fingerprint 필드 목록, 중복 정리 시 남길 값, ㎡당 가격 기준 금액 필드)
+COLLECTIONS = {
+    "apartment_transactions": (SALE_KEY_FIELDS, ("cancellation_date",), SALE_AMOUNT_FIELD),
+    "apartment_rent_transactions": (RENT_KEY_FIELDS, (), RENT_AMOUNT_FIELD),
+}
+
+
+# =========================================================
+# 2️⃣ 마이그레이션
+# =========================================================
+def migrate_collection(collection, key_fields: list, merge_fields: tuple, amount_field: str,
+                       drop_old_index: bool = True):
+    # 채우는 동안 기존 문서끼리 같은 fingerprint가 나올 수 있으므로 유니크 인덱스는 정리 후 다시 만듦
+    if FINGERPRINT_INDEX_NAME in collection.index_information():
+        collection.drop_index(FINGERPRINT_INDEX_NAME)
+
+    updated = backfill_fingerprints(collection, key_fields)
+    print(f"   - fingerprint 기록: {updated}건")
+
+    deleted = remove_duplicate_fingerprints(collection, merge_fields)
+    print(f"   - 중복 문서 삭제: {deleted}건")
+
+    ensure_fingerprint_index(collection)
+    print(f"   - 유니크 인덱스 '{FINGERPRINT_INDEX_NAME}' 생성")
+
+    if drop_old_index:
+        for name in drop_compound_unique_indexes(collection):
+            print(f"   - 기존 복합 인덱스 '{name}' 삭제")
+
+    updated = backfill_derived_fields(collection, amount_field)
+    print(f"   - 계약일/㎡당 가격/지역 기록: {updated}건")
+
+    for name in ensure_query_indexes(collection):
+        print(f"   - 조회 인덱스 '{name}' 생성")
+
+
+def run_migration(drop_old_index: bool = True):
+    start_time = time.time()
+
+    try:
+        client = MongoClient(MONGO_URI, serverSelectionTimeoutMS=5000)
+        client.admin.command("ping")
+    except ServerSelectionTimeoutError as e:
+        print(f"❌ MongoDB 연결 실패: {e}")
+        return
+
+    db = client[DB_NAME]
+    for collection_name, (key_fields, merge_fields, amount_field) in COLLECTIONS.items():
+        print(f"\n🔑 {collection_name} fingerprint 마이그레이션 시작")
+        migrate_collection(db[collection_name], key_fields, merge_fields, amount_field, drop_old_index)
+
+    client.close()
+    print(f"\n🎉 마이그레이션 완료! 소요 시간: {time.time() - start_time:.2f}초")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="실거래가 컬렉션 fingerprint 마이그레이션")
+    parser.add_argument("--keep-old-index", action="store_true",
+                        help="기존 여러 필드 복합 유니크 인덱스를 삭제하지 않음")
+    args = parser.parse_args()
+
+    run_migration(drop_old_index=not args.keep_old_index)
@@ -0,0 +1,243 @@
+# real_estate_monthly_aggregates.py
+# 실거래가 컬렉션 → (지역 코드, 법정동, 단지, 면적 구간, 계약월)별 월간 집계 컬렉션을 $merge로 유지 (materialized view)
+# 사용법: python 04.real_estate_monthly_aggregates.py [--sources sale rent api] [--full]
+#
+# 처음 실행하면 전체를 집계하고, 이후에는 지난 실행 뒤에 삽입/변경된 문서(updated_at 기준, 해제 표시 포함)가
+# 속한 (계약월, 지역)과 해제/신고가 계속 반영되는 최근 REVISION_MONTHS개월만 다시 집계합니다.
+# 계약일/㎡당 가격/지역 필드가 필요하므로 기존 데이터는 03.real_estate_fingerprint_migration.py(CSV),
+# 01.mongodb_realEstage.py --retype-existing(API)를 먼저 실행하세요. 중앙값($median)은 MongoDB 7.0 이상.
+
+import argparse
+import time
+from datetime import datetime, timedelta, timezone
+
+from pymongo import MongoClient
+from pymongo.errors import ServerSelectionTimeoutError
+
+from real_estate_utils import (CONTRACT_DATE_FIELD, PRICE_PER_M2_FIELD, REGION_FIELD, REGION_NAME_FIELD,
+                               UPDATED_AT_FIELD)
+
+# =========================================================
+# 1️⃣ 환경 설정
+# =========================================================
+MONGO_URI = "mongodb://localhost:27017/"
+STATE_COLLECTION = "aggregate_state"   # 집계 대상별 마지막 집계 시각
+REVISION_MONTHS = 3                    # 새 문서가 없어도 매번 다시 집계할 최근 개월 수
+# updated_at은 적재 프로그램 시계로 쓰기 직전에 찍히므로, 집계 중에 쓰이던 문서를 놓치지 않도록 겹쳐서 다시 봄
+WATERMARK_OVERLAP = timedelta(minutes=10)
+
+# 면적 구간 (전용면적 ㎡ 상한, 이름) - 상한을 넘으면 OVER_BUCKET
+AREA_BUCKETS = [(60, "~60"), (85, "60~85"), (135, "85~135")]
+OVER_BUCKET = "135~"
+
+# CSV 시군구 열("서울특별시 강남구 대치동")에서 지역 이름을 뺀 나머지 = 법정동 ("대치동", "양평읍 양근리")
+DONG_FROM_SIGUNGU = {"$trim": {"input": {"$substrCP": [
+    "$sigungu",
+    {"$strLenCP": {"$ifNull": [f"${REGION_NAME_FIELD}", ""]}},
+    {"$strLenCP": {"$ifNull": ["$sigungu", ""]}},
+]}}}
+
+# 원본별 설정: DB/컬렉션, 집계 결과 컬렉션, 그룹 키(법정동 식, 단지 필드), 금액 필드, 제외 조건(해제 거래)
+# 시군구 단위는 _id.region(시군구 코드)이고, 그 아래 법정동이 _id.dong
+SOURCES = {
+    "sale": {
+        "db": "real_estate_db", "collection": "apartment_transactions", "target": "apartment_sale_monthly",
+        "dong": DONG_FROM_SIGUNGU, "complex": "complex_name", "area": "exclusive_area",
+        "amount": "transaction_amount", "exclude": {"cancellation_date": {"$in": ["", None]}},
+    },
+    "rent": {
+        "db": "real_estate_db", "collection": "apartment_rent_transactions", "target": "apartment_rent_monthly",
+        "dong": DONG_FROM_SIGUNGU, "complex": "complex_name", "area": "exclusive_area",
+        "amount": "deposit", "exclude": {},
+    },
+    "api": {
+        "db": "realestate", "collection": "apt_trade", "target": "apt_trade_monthly",
+        "dong": "$umdNm", "complex": "aptNm", "area": "excluUseAr",
+        "amount": "dealAmount", "exclude": {"cdealType": {"$nin": ["O"]}},
+    },
+}
+
+
+# =========================================================
+# 2️⃣ 집계 파이프라인
+# =========================================================
+def area_bucket(area_field: str) -> dict:
+    return {"$switch": {
+        "branches": [{"case": {"$lte": [f"${area_field}", upper]}, "then": name} for upper, name in AREA_BUCKETS],
+        "default": OVER_BUCKET,
+    }}
+
+
+def median(expression) -> dict:
+    return {"$median": {"input": expression, "method": "approximate"}}
+
+
+def when(condition, value):
+    """조건에 맞는 문서의 값만 집계 ($median/$avg는 null을 건너뜀)"""
+    return {"$cond": [condition, value, None]}
+
+
+def sale_accumulators(config: dict) -> dict:
+    amount = f"${config['amount']}"
+    return {
+        "count": {"$sum": 1},
+        "price_per_m2_median": median(f"${PRICE_PER_M2_FIELD}"),
+        "price_per_m2_mean": {"$avg": f"${PRICE_PER_M2_FIELD}"},
+        "amount_median": median(amount),
+        "amount_mean": {"$avg": amount},
+    }
+
+
+def rent_accumulators(config: dict) -> dict:
+    jeonse = {"$eq": ["$rent_type", "전세"]}
+    wolse = {"$eq": ["$rent_type", "월세"]}
+    deposit = f"${config['amount']}"
+    return {
+        "count": {"$sum": 1},
+        "jeonse_count": {"$sum": {"$cond": [jeonse, 1, 0]}},
+        "jeonse_deposit_median": median(when(jeonse, deposit)),
+        "jeonse_deposit_mean": {"$avg": when(jeonse, deposit)},
+        "jeonse_price_per_m2_median": median(when(jeonse, f"${PRICE_PER_M2_FIELD}")),
+        "jeonse_price_per_m2_mean": {"$avg": when(jeonse, f"${PRICE_PER_M2_FIELD}")},
+        "wolse_count": {"$sum": {"$cond": [wolse, 1, 0]}},
+        "wolse_deposit_median": median(when(wolse, deposit)),
+        "wolse_deposit_mean": {"$avg": when(wolse, deposit)},
+        "wolse_monthly_rent_median": median(when(wolse, "$monthly_rent")),
+        "wolse_monthly_rent_mean": {"$avg": when(wolse, "$monthly_rent")},
+    }
+
+
+def aggregate_pipeline(config: dict, kind: str, scope: dict, computed_at: datetime) -> list:
+    accumulators = rent_accumulators(config) if kind == "rent" else sale_accumulators(config)
+    return [
+        {"$match": {
+            **scope,
+            **config["exclude"],
+            CONTRACT_DATE_FIELD: {"$type": "date"},
+            config["area"]: {"$type": "number"},
+        }},
+        {"$group": {
+            "_id": {
+                "region": f"${REGION_FIELD}",
+                "dong": config["dong"],
+                "complex": f"${config['complex']}",
+                "area_bucket": area_bucket(config["area"]),
+                "month": {"$dateToString": {"format": "%Y%m", "date": f"${CONTRACT_DATE_FIELD}"}},
+            },
+            REGION_NAME_FIELD: {"$first": f"${REGION_NAME_FIELD}"},
+            **accumulators,
+        }},
+        {"$set": {"computed_at": computed_at}},
+        {"$merge": {"into": config["target"], "on": "_id", "whenMatched": "replace", "whenNotMatched": "insert"}},
+    ]
+
+
+# =========================================================
+# 3️⃣ 다시 집계할 범위 (증분)
+# =========================================================
+def month_start(ymd: str) -> datetime:
+    return datetime(int(ymd[:4]), int(ymd[4:6]), 1)
+
+
+def next_month(ymd: str) -> str:
+    year, month = int(ymd[:4]), int(ymd[4:6])
+    return f"{year + 1}01" if month == 12 else f"{year}{month + 1:02d}"
+
+
+def revision_start(revision_months: int) -> str:
+    now = datetime.now()
+    index = now.year * 12 + now.month - 1 - revision_months
+    return f"{index // 12}{index % 12 + 1:02d}"
+
+
+def touched_months(source, since: datetime) -> dict:
+    """since 이후 삽입/변경된 문서의 계약월 → 지역 목록 (updated_at 인덱스 사용)"""
+    pipeline = [
+        {"$match": {UPDATED_AT_FIELD: {"$gte": since}, CONTRACT_DATE_FIELD: {"$type": "date"}}},
+        {"$group": {"_id": {"$dateToString": {"format": "%Y%m", "date": f"${CONTRACT_DATE_FIELD}"}},
+                    "regions": {"$addToSet": f"${REGION_FIELD}"}}},
+    ]
+    return {doc["_id"]: doc["regions"] for doc in source.aggregate(pipeline, allowDiskUse=True)}
+
+
+def build_scope(months: dict, recent_from: str):
+    """(원본 필터, 결과 컬렉션 필터) - 최근 개월은 전체 지역, 그 전 달은 새 문서가 있던 지역만"""
+    source_scopes = [{CONTRACT_DATE_FIELD: {"$gte": month_start(recent_from)}}]
+    target_scopes = [{"_id.month": {"$gte": recent_from}}]
+    for ymd, regions in sorted(months.items()):
+        if ymd >= recent_from:
+            continue
+        source_scopes.append({CONTRACT_DATE_FIELD: {"$gte": month_start(ymd), "$lt": month_start(next_month(ymd))},
+                              REGION_FIELD: {"$in": regions}})
+        target_scopes.append({"_id.month": ymd, "_id.region": {"$in": regions}})
+    return {"$or": source_scopes}, {"$or": target_scopes}
+
+
+# =========================================================
+# 4️⃣ 실행
+# =========================================================
+def refresh_source(client, kind: str, full: bool = False, revision_months: int = REVISION_MONTHS):
+    config = SOURCES[kind]
+    db = client[config["db"]]
+    source = db[config["collection"]]
+    target = db[config["target"]]
+    state = db[STATE_COLLECTION]
+
+    if source.find_one({}, {"_id": 1}) is None:
+        print(f"   - {config['collection']}: 문서 없음")
+        return
+
+    # MongoDB 날짜는 밀리초 단위로 저장되므로 비교가 어긋나지 않도록 맞춰 둠
+    # (범위를 정하기 전 시각이므로 집계 중에 들어온 문서는 다음 실행에서 다시 봄)
+    now = datetime.now(timezone.utc)
+    computed_at = now.replace(microsecond=now.microsecond // 1000 * 1000)
+
+    saved = None if full else state.find_one({"_id": config["target"]})
+    if saved is None or "computed_at" not in saved or "last_id" in saved:
+        # 처음 실행, --full, 또는 _id 기준으로 기록된 예전 상태
+        source_scope, target_scope = {}, {}
+        print(f"   - {config['collection']} → {config['target']}: 전체 집계")
+    else:
+        months = touched_months(source, saved["computed_at"] - WATERMARK_OVERLAP)
+        source_scope, target_scope = build_scope(months, revision_start(revision_months))
+        print(f"   - {config['collection']} → {config['target']}: 삽입/변경된 문서가 있는 계약월 {len(months)}개 + "
+              f"최근 {revision_months}개월 다시 집계")
+    source.aggregate(aggregate_pipeline(config, kind, source_scope, computed_at), allowDiskUse=True)
+    # 이번 범위에서 다시 만들어지지 않은 그룹(전부 해제된 단지 등)은 삭제
+    stale = target.delete_many({**target_scope, "computed_at": {"$lt": computed_at}}).deleted_count
+
+    target.create_index([("_id.region", 1), ("_id.month", 1)], name="region_month")
+    target.create_index([("_id.complex", 1), ("_id.month", 1)], name="complex_month")
+    state.replace_one({"_id": config["target"]}, {"computed_at": computed_at}, upsert=True)
+    print(f"   - 집계 완료: 그룹 {target.count_documents({'computed_at': computed_at})}개 갱신, "
+          f"사라진 그룹 {stale}개 삭제")
+
+
+def run_refresh(kinds: list, full: bool = False, revision_months: int = REVISION_MONTHS):
+    start_time = time.time()
+
+    try:
+        client = MongoClient(MONGO_URI, serverSelectionTimeoutMS=5000)
+        client.admin.command("ping")
+    except ServerSelectionTimeoutError as e:
+        print(f"❌ MongoDB 연결 실패: {e}")
+        return
+
+    for kind in kinds:
+        print(f"\n📊 {kind} 월간 집계 시작")
+        refresh_source(client, kind, full, revision_months)
+
+    client.close()
+    print(f"\n🎉 월간 집계 완료! 소요 시간: {time.time() - start_time:.2f}초")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="실거래가 월간 집계 컬렉션 갱신 ($merge)")
+    parser.add_argument("--sources", nargs="+", choices=list(SOURCES), default=list(SOURCES),
+                        help="집계할 원본 (기본: 전부)")
+    parser.add_argument("--full", action="store_true", help="증분 상태를 무시하고 전체 다시 집계")
+    parser.add_argument("--revision-months", type=int, default=REVISION_MONTHS,
+                        help=f"새 문서가 없어도 매번 다시 집계할 최근 개월 수 (기본 {REVISION_MONTHS})")
+    args = parser.parse_args()
+
+    run_refresh(args.sources, args.full, args.revision_months)
@@ -0,0 +1,88 @@
+# benchmark_document_conversion.py
+# fetch_and_insert_ticker 문서 변환 마이크로 벤치마크 (iterrows 루프 vs 컬럼 단위 변환)
+# 사용법: python benchmark_document_conversion.py [행 수] [반복 횟수]
+
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from mongo_utils import dataframe_to_documents
+
+
+def make_history_frame(rows: int) -> pd.DataFrame:
+    """yfinance history()와 같은 모양의 가짜 DataFrame 생성 (일부 Volume은 NaN)"""
+    rng = np.random.default_rng(0)
+    index = pd.date_range("1980-01-01", periods=rows, freq="B", tz="America/New_York", name="Date")
+    close = 100 + rng.standard_normal(rows).cumsum()
+    volume = rng.integers(0, 10_000_000, rows).astype("float64")
+    volume[::97] = np.nan
+    return pd.DataFrame({
+        "Open": close + rng.random(rows),
+        "High": close + 1,
+        "Low": close - 1,
+        "Close": close,
+        "Volume": volume,
+        "Dividends": np.zeros(rows),
+        "Stock Splits": np.zeros(rows),
+    }, index=index)
+
+
+def legacy_row_loop(symbol: str, df: pd.DataFrame) -> list:
+    """기존 fetch_and_insert_ticker의 iterrows() 변환 루프"""
+    df = df.reset_index()
+    documents = []
+
+    for _, row in df.iterrows():
+        try:
+            date_obj = pd.to_datetime(row['Date']).to_pydatetime()
+        except Exception:
+            continue
+
+        volume_value = int(row['Volume']) if not pd.isna(row['Volume']) else 0
+        doc = {
+            "symbol": symbol,
+            "date": date_obj,
+            "open": float(row["Open"]),
+            "high": float(row["High"]),
+            "low": float(row["Low"]),
+            "close": float(row["Close"]),
+            "volume": volume_value,
+        }
+
+        if "Dividends" in df.columns:
+            doc["dividends"] = float(row["Dividends"])
+        if "Stock Splits" in df.columns:
+            doc["stock_splits"] = float(row["Stock Splits"])
+
+        documents.append(doc)
+
+    return documents
+
+
+def best_of(func, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+if __name__ == "__main__":
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+    repeat = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+
+    df = make_history_frame(rows)
+
+    # 결과 동일성 확인
+    assert legacy_row_loop("TEST", df) == dataframe_to_documents("TEST", df)
+
+    legacy = best_of(lambda: legacy_row_loop("TEST", df), repeat)
+    vectorized = best_of(lambda: dataframe_to_documents("TEST", df), repeat)
+
+    print(f"행 수: {rows:,} / 반복: {repeat}회 (최솟값 기준)")
+    print(f"iterrows 루프   : {legacy * 1000:9.2f} ms")
+    print(f"컬럼 단위 변환  : {vectorized * 1000:9.2f} ms")
+    print(f"속도 향상       : {legacy / vectorized:9.1f}x")
@@ -0,0 +1,312 @@
+# mongo_utils.py
+# MongoDB 주가 컬렉션 공통 유틸리티 (업데이트/설정 스크립트에서 공유)
+
+import hashlib
+from datetime import datetime, timezone
+from itertools import repeat
+
+import pandas as pd
+from pymongo import UpdateOne
+
+# =========================================================
+# 1️⃣ DataFrame → MongoDB 문서 변환
+# =========================================================
+PRICE_COLUMNS = [
+    ("Open", "open"),
+    ("High", "high"),
+    ("Low", "low"),
+    ("Close", "close"),
+]
+
+OPTIONAL_COLUMNS = [
+    ("Dividends", "dividends"),
+    ("Stock Splits", "stock_splits"),
+]
+
+
+def dataframe_to_documents(symbol: str, df: pd.DataFrame) -> list:
+    """yfinance history() 결과를 컬럼 단위로 한 번에 변환해 MongoDB 문서 리스트를 만듭니다.
+
+    iterrows() 루프와 동일한 결과를 냅니다.
+    - 날짜 변환에 실패한 행은 건너뜀
+    - Volume이 NaN이면 0으로 저장
+    - Dividends / Stock Splits 컬럼은 있을 때만 포함
+    """
+    if df is None or df.empty:
+        return []
+
+    if "Date" not in df.columns:
+        df = df.reset_index()
+        df = df.rename(columns={df.columns[0]: "Date"})
+
+    dates = pd.to_datetime(df["Date"], errors="coerce")
+    valid = dates.notna().to_numpy()
+    if not valid.any():
+        return []
+
+    keys = ["symbol", "date"]
+    columns = [repeat(symbol), list(dates[valid].dt.to_pydatetime())]
+
+    for src, dst in PRICE_COLUMNS:
+        keys.append(dst)
+        columns.append(df[src].to_numpy(dtype="float64")[valid].tolist())
+
+    keys.append("volume")
+    columns.append(df["Volume"].fillna(0).to_numpy(dtype="int64")[valid].tolist())
+
+    for src, dst in OPTIONAL_COLUMNS:
+        if src in df.columns:
+            keys.append(dst)
+            columns.append(df[src].to_numpy(dtype="float64")[valid].tolist())
+
+    return [dict(zip(keys, values)) for values in zip(*columns)]
+
+
+# =========================================================
+# 2️⃣ (symbol, date) 유니크 인덱스 점검
+# =========================================================
+SYMBOL_DATE_INDEX_KEYS = [("symbol", 1), ("date", 1)]
+SYMBOL_DATE_INDEX_NAME = "symbol_date_unique_index"
+
+
+def ensure_symbol_date_index(collection) -> str:
+    """(symbol, date) 유니크 인덱스를 점검하고 필요한 경우에만 생성합니다.
+
+    - 같은 키의 유니크 인덱스가 이미 있으면 이름과 관계없이 그대로 둠 (재빌드 없음)
+    - 같은 키지만 unique가 아니거나, 같은 이름에 다른 키가 걸려 있으면 제거 후 생성
+    - 생성은 background=True 로 요청 (MongoDB 4.2+에서는 기본 최적화 빌드)
+    반환값: 사용 중인 인덱스 이름
+    """
+    for name, info in collection.index_information().items():
+        key = [tuple(k) for k in info.get("key", [])]
+        if key == SYMBOL_DATE_INDEX_KEYS and info.get("unique"):
+            return name
+        if key == SYMBOL_DATE_INDEX_KEYS or name == SYMBOL_DATE_INDEX_NAME:
+            print(f"⚙️ {collection.name}: 잘못된 인덱스 '{name}' 제거")
+            collection.drop_index(name)
+
+    print(f"⚙️ {collection.name}: 유니크 인덱스 '{SYMBOL_DATE_INDEX_NAME}' 생성")
+    return collection.create_index(
+        SYMBOL_DATE_INDEX_KEYS,
+        unique=True,
+        name=SYMBOL_DATE_INDEX_NAME,
+        background=True,
+    )
+
+
+# =========================================================
+# 3️⃣ 심볼별 수집 상태 (ingest_state)
+# =========================================================
+INGEST_STATE_COLLECTION = "ingest_state"
+
+
+def ensure_ingest_state_index(db):
+    """ingest_state의 (collection, symbol) 유니크 인덱스 준비 (이미 있으면 아무 작업 없음)"""
+    db[INGEST_STATE_COLLECTION].create_index(
+        [("collection", 1), ("symbol", 1)],
+        unique=True,
+        name="collection_symbol_unique_index",
+    )
+
+
+def trading_date(value: datetime) -> str:
+    """UTC로 저장된 거래소 현지 자정을 가장 가까운 날짜로 반올림 (KST 자정 = 전날 15:00 UTC 등)"""
+    return pd.Timestamp(value).round("D").strftime("%Y-%m-%d")
+
+
+def read_latest_dates(db, collection_name: str, symbols: list, as_trading_date: bool = False) -> dict:
+    """ingest_state에서 심볼별 마지막 날짜를 한 번의 인덱스 조회로 읽어 {symbol: "YYYY-MM-DD"} 반환
+
+    as_trading_date=True면 UTC 날짜 대신 거래일(trading_date)로 반환합니다.
+    """
+    wanted = set(symbols)
+    latest_dates = {}
+    cursor = db[INGEST_STATE_COLLECTION].find(
+        {"collection": collection_name, "last_date": {"$ne": None}},
+        {"_id": 0, "symbol": 1, "last_date": 1},
+    )
+    for doc in cursor:
+        if doc["symbol"] in wanted:
+            last_date = doc["last_date"]
+            latest_dates[doc["symbol"]] = trading_date(last_date) if as_trading_date else last_date.strftime("%Y-%m-%d")
+    return latest_dates
+
+
+def has_ingest_state(db, collection_name: str) -> bool:
+    """컬렉션의 ingest_state 문서가 하나라도 있는지 (없으면 최초 전환 / 상태 유실)"""
+    return db[INGEST_STATE_COLLECTION].find_one({"collection": collection_name}, {"_id": 1}) is not None
+
+
+def record_ingest_result(db, collection_name: str, symbol: str, status: str,
+                         last_date=None, inserted: int = 0, error: str = None):
+    """삽입 배치 직후 심볼 상태를 단일 문서 원자적 업데이트로 기록
+
+    last_date는 $max로만 올라가므로 재시도·중복 배치가 상태를 되돌리지 않습니다.
+    """
+    update = {
+        "$set": {
+            "last_status": status,
+            "last_error": error,
+            "updated_at": datetime.now(timezone.utc),
+        },
+        "$inc": {"row_count": inserted},
+    }
+    if last_date is not None:
+        update["$max"] = {"last_date": last_date}
+
+    db[INGEST_STATE_COLLECTION].update_one(
+        {"collection": collection_name, "symbol": symbol}, update, upsert=True
+    )
+
+
+def rebuild_ingest_state(db, collection_name: str, symbols: list = None) -> int:
+    """(복구용) 가격 컬렉션 전체를 집계해 ingest_state를 다시 만듭니다. 갱신한 심볼 수 반환"""
+    pipeline = []
+    if symbols:
+        pipeline.append({"$match": {"symbol": {"$in": symbols}}})
+    pipeline.append({"$group": {
+        "_id": "$symbol",
+        "max_date": {"$max": "$date"},
+        "row_count": {"$sum": 1},
+    }})
+
+    now = datetime.now(timezone.utc)
+    ops = []
+    for doc in db[collection_name].aggregate(pipeline, allowDiskUse=True):
+        ops.append(UpdateOne(
+            {"collection": collection_name, "symbol": doc["_id"]},
+            {"$set": {
+                "last_date": doc["max_date"],
+                "row_count": doc["row_count"],
+                "last_status": "rebuilt",
+                "last_error": None,
+                "updated_at": now,
+            }},
+            upsert=True,
+        ))
+
+    for i in range(0, len(ops), 1000):
+        db[INGEST_STATE_COLLECTION].bulk_write(ops[i:i + 1000], ordered=False)
+    return len(ops)
+
+
+# =========================================================
+# 4️⃣ 백필 체크포인트 (재시작 가능한 전체 수집)
+# =========================================================
+CHECKPOINT_COLLECTION = "backfill_checkpoint"
+
+CHECKPOINT_PENDING = "pending"
+CHECKPOINT_IN_PROGRESS = "in_progress"
+CHECKPOINT_DONE = "done"
+CHECKPOINT_FAILED = "failed"
+
+
+def symbol_shard(symbol: str, shard_count: int) -> int:
+    """프로세스/호스트가 달라도 같은 값이 나오는 심볼 샤드 번호 (내장 hash()는 실행마다 달라 사용 불가)"""
+    digest = hashlib.md5(symbol.encode("utf-8")).digest()
+    return int.from_bytes(digest[:8], "big") % shard_count
+
+
+def ensure_checkpoint_index(db):
+    db[CHECKPOINT_COLLECTION].create_index(
+        [("job_id", 1), ("collection", 1), ("symbol", 1)],
+        unique=True,
+        name="job_collection_symbol_unique_index",
+    )
+
+
+def seed_checkpoints(db, job_id: str, collection_name: str, symbols: list):
+    """아직 기록이 없는 심볼만 pending으로 등록 (기존 진행 상태는 건드리지 않음)"""
+    now = datetime.now(timezone.utc)
+    ops = [
+        UpdateOne(
+            {"job_id": job_id, "collection": collection_name, "symbol": symbol},
+            {"$setOnInsert": {"status": CHECKPOINT_PENDING, "attempts": 0, "created_at": now}},
+            upsert=True,
+        )
+        for symbol in symbols
+    ]
+    for i in range(0, len(ops), 1000):
+        db[CHECKPOINT_COLLECTION].bulk_write(ops[i:i + 1000], ordered=False)
+
+
+def load_checkpoint_status(db, job_id: str, collection_name: str) -> dict:
+    """{symbol: status} 반환"""
+    cursor = db[CHECKPOINT_COLLECTION].find(
+        {"job_id": job_id, "collection": collection_name},
+        {"_id": 0, "symbol": 1, "status": 1},
+    )
+    return {doc["symbol"]: doc["status"] for doc in cursor}
+
+
+def update_checkpoint(db, job_id: str, collection_name: str, symbol: str, status: str,
+                      owner: str = None, error: str = None):
+    update = {"$set": {
+        "status": status,
+        "owner": owner,
+        "last_error": error,
+        "updated_at": datetime.now(timezone.utc),
+    }}
+    if status == CHECKPOINT_IN_PROGRESS:
+        update["$inc"] = {"attempts": 1}
+    db[CHECKPOINT_COLLECTION].update_one(
+        {"job_id": job_id, "collection": collection_name, "symbol": symbol}, update, upsert=True
+    )
+
+
+# =========================================================
+# 5️⃣ 시계열(time-series) 컬렉션 저장 방식
+# =========================================================
+TIMESERIES_SUFFIX = "_ts"
+# 일봉이지만 "days"는 MongoDB가 지원하지 않음 (seconds / minutes / hours만 가능).
+# "hours"가 가장 큰 단위이고 버킷 하나가 최대 30일을 담으므로 일봉에 가장 가까운 설정
+TIMESERIES_GRANULARITY = "hours"
+
+
+def timeseries_name(collection_name: str) -> str:
+    return f"{collection_name}{TIMESERIES_SUFFIX}"
+
+
+def is_timeseries_collection(collection) -> bool:
+    return collection.name.endswith(TIMESERIES_SUFFIX)
+
+
+def ensure_timeseries_collection(db, collection_name: str):
+    """MongoDB 네이티브 시계열 컬렉션 준비 (metaField=symbol, timeField=date)
+
+    시계열 컬렉션은 symbol별로 날짜 구간을 버킷 하나에 압축 저장하므로
+    필드명이 반복되는 일반 컬렉션보다 저장 공간과 범위 조회 비용이 크게 줄어듭니다.
+    유니크 인덱스는 지원되지 않으므로 (symbol, date) 일반 인덱스만 만들고,
+    중복은 filter_new_documents()로 쓰기 전에 걸러냅니다.
+    """
+    if collection_name not in db.list_collection_names(filter={"name": collection_name}):
+        print(f"⚙️ 시계열 컬렉션 '{collection_name}' 생성")
+        db.create_collection(
+            collection_name,
+            timeseries={"timeField": "date", "metaField": "symbol", "granularity": TIMESERIES_GRANULARITY},
+        )
+    collection = db[collection_name]
+    collection.create_index([("symbol", 1), ("date", 1)], name="symbol_date_index")
+    return collection
+
+
+def filter_new_documents(collection, documents: list) -> list:
+    """시계열 컬렉션용: 심볼별로 이미 저장된 마지막 날짜 이후 문서만 남김"""
+    latest = {}
+    for symbol in {doc["symbol"] for doc in documents}:
+        last = collection.find_one({"symbol": symbol}, {"date": 1}, sort=[("date", -1)])
+        if last is not None:
+            latest[symbol] = last["date"]
+
+    if not latest:
+        return documents
+
+    def is_new(doc):
+        last = latest.get(doc["symbol"])
+        # 저장된 날짜는 UTC naive로 돌아오므로 비교 전에 맞춰 줌
+        date = doc["date"]
+        if date.tzinfo is not None:
+            date = date.astimezone(timezone.utc).replace(tzinfo=None)
+        return last is None or date > last
+
+    return [doc for doc in documents if is_new(doc)]
@@ -1,29 +1,22 @@
-import csv,glob
-import sqlite3
+# parser_real_estate.py
+# 아파트(매매) 실거래가 CSV → SQLite sale 테이블 일괄 적재 (공통 로직: real_estate_sqlite.py)
+# 사용법: python parser_real_estate.py ["아파트(매매)_*.csv"] [--processes 4]
 
-# SQLite 데이터베이스 파일 경로
-sqlite_file_path = "real_estate.db"
-
-for csv_file_path in glob.glob("아파트(매매)_*.csv"):
-    print (csv_file_path)
-    num = 0
-    with open(csv_file_path, newline="") as csvfile:
-        reader = csv.reader(csvfile, delimiter=",")
-        cursor = connection.cursor()
-        for row in reader:
-            if num < 16:
-                pass
+import argparse
 
-            else:
-                tmp = list()
-                for r in row[1:]:
-                    tmp.append(r.strip())
+from real_estate_sqlite import load_csv_glob, PARSE_PROCESSES
 
-                cursor.execute("""INSERT OR IGNORE INTO sale ("시군구","번지","본번","부번","단지명","전용면적","계약년월","계약일","거래금액","동","층","매수자","매도자","건축년도","도로명","해제사유발생일","거래유형","중개사소재지","등기일자") VALUES (?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?)""", (tmp),)
-
-            num+=1
+# SQLite 데이터베이스 파일 경로
+sqlite_file_path = "real_estate.db"
+CSV_PATTERN = "아파트(매매)_*.csv"
 
-    connection.commit()
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="아파트 매매 실거래가 CSV → SQLite(sale)")
+    parser.add_argument("pattern", nargs="?", default=CSV_PATTERN, help=f"CSV 파일 패턴 (기본 {CSV_PATTERN})")
+    parser.add_argument("--db", default=sqlite_file_path, help=f"SQLite 파일 경로 (기본 {sqlite_file_path})")
+    parser.add_argument("--processes", type=int, default=PARSE_PROCESSES,
+                        help=f"CSV 파싱 프로세스 수 (기본 CPU 코어 수 {PARSE_PROCESSES})")
+    args = parser.parse_args()
 
-# 연결 닫기
-connection.close()
+    if load_csv_glob(args.pattern, "sale", args.db, args.processes):
+        raise SystemExit(1)  # 파싱 실패 CSV가 있으면 0이 아닌 종료 코드
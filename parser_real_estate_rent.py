@@ -1,33 +1,22 @@
-import csv,glob,time
-import sqlite3
+# parser_real_estate_rent.py
+# 아파트(전월세) 실거래가 CSV → SQLite rent 테이블 일괄 적재 (공통 로직: real_estate_sqlite.py)
+# 사용법: python parser_real_estate_rent.py ["아파트(전월세)_실거래가_*.csv"] [--processes 4]
 
-# SQLite 데이터베이스 파일 경로
-sqlite_file_path = "real_estate.db"
-
-for csv_file_path in glob.glob("아파트(전월세)_실거래가_*.csv"):
-    print (csv_file_path)
-    num = 0
-    with open(csv_file_path, newline="") as csvfile:
-        
-        reader = csv.reader(csvfile, delimiter=",")
-
-        cursor = connection.cursor()
-        for row in reader:
-            
-            if num < 16:
-                pass
-
-            else:
-                tmp = list()
-                for r in row[1:]:
-                    tmp.append(r.strip())
+import argparse
 
-                cursor.execute("""INSERT OR IGNORE INTO rent ("시군구","번지","본번","부번","단지명","구분","전용면적","계약년월","계약일","보증금","월세금","층","건축년도","도로명","계약기간","계약구분","갱신요구권","종전계약보증금","종전계약월세","주택유형") VALUES (?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?)""", (tmp),)
-
-            num+=1
-
-      connection.commit()
-      
-# 연결 닫기
-connection.close()
+from real_estate_sqlite import load_csv_glob, PARSE_PROCESSES
 
+# SQLite 데이터베이스 파일 경로
+sqlite_file_path = "real_estate.db"
+CSV_PATTERN = "아파트(전월세)_실거래가_*.csv"
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="아파트 전월세 실거래가 CSV → SQLite(rent)")
+    parser.add_argument("pattern", nargs="?", default=CSV_PATTERN, help=f"CSV 파일 패턴 (기본 {CSV_PATTERN})")
+    parser.add_argument("--db", default=sqlite_file_path, help=f"SQLite 파일 경로 (기본 {sqlite_file_path})")
+    parser.add_argument("--processes", type=int, default=PARSE_PROCESSES,
+                        help=f"CSV 파싱 프로세스 수 (기본 CPU 코어 수 {PARSE_PROCESSES})")
+    args = parser.parse_args()
+
+    if load_csv_glob(args.pattern, "rent", args.db, args.processes):
+        raise SystemExit(1)  # 파싱 실패 CSV가 있으면 0이 아닌 종료 코드
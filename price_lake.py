@@ -0,0 +1,239 @@
+# price_lake.py
+# 주가 컬렉션을 market/symbol/year 로 나눈 Parquet 데이터셋(price lake)으로 내보내고 읽는 모듈
+#
+# 디렉터리 구조 (hive 파티션, 심볼은 URL 인코딩):
+#   price_lake/market=us_stocks/symbol=SPY/year=2024/data.parquet
+#   price_lake/market=currencies/symbol=KRW%3DX/year=2024/data.parquet
+#   price_lake/_watermarks.json   ← 시장/심볼별 마지막으로 내보낸 날짜
+#
+# 사용법:
+#   python price_lake.py                                   # MongoDB 4개 컬렉션 증분 내보내기
+#   python price_lake.py --collections us_stocks indices   # 일부 컬렉션만
+#   python price_lake.py --source finance_stock.db --collections stocks   # SQLite stocks 테이블
+#
+#   from price_lake import read_lake
+#   df = read_lake(["SPY", "QQQ"], "2015-01-01", "2024-12-31")
+
+import argparse
+import json
+import os
+import time
+from pathlib import Path
+from urllib.parse import quote
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from price_store import PriceStore, open_price_store
+
+# =========================================================
+# 1️⃣ 환경 설정
+# =========================================================
+LAKE_ROOT = "price_lake"
+MONGO_URI = "mongodb://localhost:27017/"
+WATERMARK_FILE = "_watermarks.json"
+WATERMARK_SAVE_EVERY = 200   # 심볼 몇 개마다 워터마크 파일을 저장할지
+
+COLLECTION_NAMES = {
+    "us_stocks": "us_stocks",
+    "korean_stocks": "korean_stocks",
+    "indices": "indices",
+    "currencies": "currencies",
+}
+
+# 모든 파일이 같은 스키마를 갖도록 고정 (파티션 컬럼 market/symbol/year는 경로에만 존재)
+LAKE_SCHEMA = pa.schema([
+    ("date", pa.timestamp("ms")),
+    ("open", pa.float64()),
+    ("high", pa.float64()),
+    ("low", pa.float64()),
+    ("close", pa.float64()),
+    ("volume", pa.int64()),
+    ("dividends", pa.float64()),
+    ("stock_splits", pa.float64()),
+])
+
+
+# =========================================================
+# 2️⃣ 경로 / 워터마크
+# =========================================================
+def partition_dir(root, market: str, symbol: str) -> Path:
+    return Path(root) / f"market={market}" / f"symbol={quote(symbol, safe='')}"
+
+
+def year_file(root, market: str, symbol: str, year: int) -> Path:
+    return partition_dir(root, market, symbol) / f"year={year}" / "data.parquet"
+
+
+def load_watermarks(root) -> dict:
+    """{market: {symbol: "YYYY-MM-DD"}} (아직 내보낸 적이 없으면 빈 dict)"""
+    path = Path(root) / WATERMARK_FILE
+    if not path.exists():
+        return {}
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_watermarks(root, watermarks: dict):
+    path = Path(root) / WATERMARK_FILE
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(".tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(watermarks, f, ensure_ascii=False, indent=1, sort_keys=True)
+    os.replace(tmp_path, path)
+
+
+# =========================================================
+# 3️⃣ 내보내기 (증분 추가)
+# =========================================================
+def bars_to_table(bars: pd.DataFrame) -> pa.Table:
+    """read_bars() 결과(한 심볼) → LAKE_SCHEMA 테이블"""
+    frame = pd.DataFrame({
+        "date": pd.to_datetime(bars["date"]),
+        "open": pd.to_numeric(bars["open"], errors="coerce"),
+        "high": pd.to_numeric(bars["high"], errors="coerce"),
+        "low": pd.to_numeric(bars["low"], errors="coerce"),
+        "close": pd.to_numeric(bars["close"], errors="coerce"),
+        # dataframe_to_documents와 같이 거래량 NaN은 0으로 저장
+        "volume": pd.to_numeric(bars["volume"], errors="coerce").fillna(0).astype("int64"),
+        "dividends": pd.to_numeric(bars["dividends"], errors="coerce").fillna(0.0),
+        "stock_splits": pd.to_numeric(bars["stock_splits"], errors="coerce").fillna(0.0),
+    })
+    return pa.Table.from_pandas(frame, schema=LAKE_SCHEMA, preserve_index=False)
+
+
+def write_year(path: Path, new_rows: pa.Table):
+    """연도 파일에 새 행을 합쳐 다시 씀 (같은 날짜는 새 값 우선, 임시 파일 → 교체로 원자적 저장)"""
+    if path.exists():
+        merged = pa.concat_tables([pq.read_table(path, memory_map=True), new_rows]).to_pandas()
+        merged = merged.drop_duplicates("date", keep="last").sort_values("date")
+        table = pa.Table.from_pandas(merged, schema=LAKE_SCHEMA, preserve_index=False)
+    else:
+        table = new_rows.sort_by("date")
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(".tmp")
+    pq.write_table(table, tmp_path, compression="zstd")
+    os.replace(tmp_path, path)
+
+
+def export_symbol(store: PriceStore, root, market: str, symbol: str, after: str = None) -> str:
+    """after 이후 일봉을 읽어 연도별 파일에 추가하고, 새 워터마크(마지막 날짜)를 반환 (새 데이터 없으면 None)"""
+    start = pd.Timestamp(after) + pd.Timedelta(days=1) if after else None
+    bars = store.read_bars([symbol], start=start)
+    if bars.empty:
+        return None
+
+    table = bars_to_table(bars)
+    years = pd.to_datetime(bars["date"]).dt.year.to_numpy()
+    for year in sorted(set(years)):
+        mask = pa.array(years == year)
+        write_year(year_file(root, market, symbol, int(year)), table.filter(mask))
+
+    return pd.to_datetime(bars["date"]).max().strftime("%Y-%m-%d")
+
+
+def export_market(store: PriceStore, root, market: str, watermarks: dict) -> int:
+    """저장소 워터마크(ingest_state/MAX(date))가 lake 워터마크보다 앞선 심볼만 내보냄. 내보낸 심볼 수 반환"""
+    lake_marks = watermarks.setdefault(market, {})
+    source_marks = store.latest_dates(store.symbols())
+    pending = [symbol for symbol, last in source_marks.items() if last > lake_marks.get(symbol, "")]
+    print(f"📦 {market}: {len(source_marks)}개 심볼 중 {len(pending)}개 내보내기")
+
+    exported = 0
+    for i, symbol in enumerate(pending, 1):
+        try:
+            last = export_symbol(store, root, market, symbol, lake_marks.get(symbol))
+        except Exception as e:
+            print(f"[{market}/{symbol}] ❗ 내보내기 실패: {e}")
+            continue
+        if last:
+            lake_marks[symbol] = last
+            exported += 1
+        if i % WATERMARK_SAVE_EVERY == 0:
+            save_watermarks(root, watermarks)
+            print(f"   - {market}: {i}/{len(pending)} 심볼 완료")
+
+    save_watermarks(root, watermarks)
+    return exported
+
+
+def run_export(source: str, collection_names: list, root=LAKE_ROOT):
+    start_time = time.time()
+    watermarks = load_watermarks(root)
+
+    for collection_name in collection_names:
+        store = open_price_store(source, collection_name)
+        try:
+            # 시계열 컬렉션(_ts)도 같은 market 이름으로 내보냄
+            market = collection_name.removesuffix("_ts")
+            exported = export_market(store, root, market, watermarks)
+            print(f"✅ {market}: {exported}개 심볼 갱신")
+        except Exception as e:
+            print(f"❌ {collection_name} 내보내기 실패: {e}")
+        finally:
+            store.close()
+
+    print(f"🎉 내보내기 완료! 소요 시간: {time.time() - start_time:.2f}초")
+
+
+# =========================================================
+# 4️⃣ 읽기 API (memory-mapped Arrow)
+# =========================================================
+def list_markets(root=LAKE_ROOT) -> list:
+    return sorted(p.name.split("=", 1)[1] for p in Path(root).glob("market=*") if p.is_dir())
+
+
+def read_lake_table(symbols: list, start=None, end=None, market: str = None, root=LAKE_ROOT) -> pa.Table:
+    """심볼 여러 개의 start~end(포함) 구간을 Arrow 테이블로 읽음 (symbol 컬럼 포함)
+
+    필요한 연도 파일만 골라 memory_map으로 열기 때문에 DB 조회나 전체 데이터셋 탐색 없이 읽습니다.
+    market을 지정하지 않으면 모든 시장에서 심볼을 찾습니다.
+    """
+    start = pd.Timestamp(start) if start is not None else None
+    end = pd.Timestamp(end) if end is not None else None
+    markets = [market] if market else list_markets(root)
+
+    filters = []
+    if start is not None:
+        filters.append(("date", ">=", start.to_pydatetime()))
+    if end is not None:
+        filters.append(("date", "<=", end.to_pydatetime()))
+
+    tables = []
+    for symbol in symbols:
+        for market_name in markets:
+            base = partition_dir(root, market_name, symbol)
+            if not base.is_dir():
+                continue
+            for year_dir in sorted(base.glob("year=*")):
+                year = int(year_dir.name.split("=", 1)[1])
+                if (start is not None and year < start.year) or (end is not None and year > end.year):
+                    continue
+                table = pq.read_table(year_dir / "data.parquet", memory_map=True, filters=filters or None)
+                if table.num_rows:
+                    tables.append(table.append_column("symbol", pa.array([symbol] * table.num_rows, pa.string())))
+
+    if not tables:
+        return LAKE_SCHEMA.append(pa.field("symbol", pa.string())).empty_table()
+    return pa.concat_tables(tables)
+
+
+def read_lake(symbols: list, start=None, end=None, market: str = None, root=LAKE_ROOT) -> pd.DataFrame:
+    """read_lake_table() 결과를 PriceStore.read_bars()와 같은 형태의 DataFrame으로 반환"""
+    df = read_lake_table(symbols, start, end, market, root).to_pandas()
+    columns = ["symbol"] + [name for name in LAKE_SCHEMA.names]
+    return df[columns].sort_values(["symbol", "date"], ignore_index=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="주가 컬렉션 → Parquet price lake 증분 내보내기")
+    parser.add_argument("--source", default=MONGO_URI,
+                        help=f"mongodb:// URI 또는 SQLite DB 경로 (기본 {MONGO_URI})")
+    parser.add_argument("--collections", nargs="+", default=list(COLLECTION_NAMES.values()),
+                        help="내보낼 컬렉션/테이블 (기본: MongoDB 4개 컬렉션)")
+    parser.add_argument("--root", default=LAKE_ROOT, help=f"price lake 디렉터리 (기본 {LAKE_ROOT})")
+    args = parser.parse_args()
+
+    run_export(args.source, args.collections, args.root)
@@ -0,0 +1,314 @@
+# price_store.py
+# SQLite stocks 테이블 / MongoDB 주가 컬렉션을 같은 방식으로 읽고 쓰는 저장소 인터페이스
+#
+# 사용 예:
+#   store = open_price_store("finance_stock.db")                               # SQLite
+#   store = open_price_store("mongodb://localhost:27017/", "us_stocks")        # MongoDB
+#   store.latest_dates(["SPY", "QQQ"])   → {"SPY": "2024-05-31", ...}
+#   store.write_bars("SPY", history_df)  → 새로 저장된 행 수
+#   store.read_bars(["SPY"], "2020-01-01") → symbol, date, open, high, low, close, volume, ... DataFrame
+#   store.read_bars(["SPY"], columns=["close"]) → symbol, date, close 만 읽은 DataFrame
+
+import sqlite3
+from abc import ABC, abstractmethod
+from itertools import repeat
+
+import pandas as pd
+from pymongo import MongoClient
+from pymongo.errors import BulkWriteError
+
+from mongo_utils import (dataframe_to_documents, ensure_symbol_date_index, ensure_ingest_state_index,
+                         read_latest_dates, record_ingest_result, rebuild_ingest_state, has_ingest_state,
+                         is_timeseries_collection, ensure_timeseries_collection, filter_new_documents)
+
+BAR_COLUMNS = ["symbol", "date", "open", "high", "low", "close", "volume", "dividends", "stock_splits"]
+MONGO_DATABASE_NAME = "finance_db"
+SQLITE_MAX_PARAMS = 900   # IN (...) 한 번에 넣을 최대 파라미터 수 (SQLite 기본 한도 999)
+
+
+# =========================================================
+# 1️⃣ 공통 인터페이스
+# =========================================================
+class PriceStore(ABC):
+    """일봉 저장소 인터페이스 (SQLite / MongoDB 구현이 같은 메서드를 제공)"""
+
+    @abstractmethod
+    def symbols(self) -> list:
+        """저장된 심볼 목록"""
+
+    @abstractmethod
+    def latest_dates(self, symbols: list) -> dict:
+        """심볼별 마지막 저장 날짜 {symbol: "YYYY-MM-DD"} (데이터가 없는 심볼은 빠짐)"""
+
+    @abstractmethod
+    def write_bars(self, symbol: str, frame: pd.DataFrame) -> int:
+        """yfinance history() 형태 DataFrame을 저장하고 새로 들어간 행 수를 반환 (중복 날짜는 건너뜀)"""
+
+    def write_many(self, items) -> dict:
+        """[(symbol, frame), ...] 를 한꺼번에 저장하고 {symbol: 삽입 건수} 반환"""
+        return {symbol: self.write_bars(symbol, frame) for symbol, frame in items}
+
+    @abstractmethod
+    def read_bars(self, symbols: list, start=None, end=None, columns=None) -> pd.DataFrame:
+        """start~end(포함) 구간의 일봉을 symbol, date 순으로 정렬한 DataFrame으로 반환
+
+        columns(예: ["close"])를 주면 symbol, date와 그 컬럼만 읽습니다 (기본: BAR_COLUMNS 전부).
+        """
+
+    def close(self):
+        pass
+
+
+def open_price_store(target: str, name: str = None) -> PriceStore:
+    """target이 mongodb:// URI면 MongoPriceStore(name=컬렉션), 아니면 SQLite 파일(name=테이블)"""
+    if target.startswith(("mongodb://", "mongodb+srv://")):
+        return MongoPriceStore(target, name or "us_stocks")
+    return SQLitePriceStore(target, name or "stocks")
+
+
+def bar_columns(columns=None) -> list:
+    """read_bars()가 읽을 컬럼 목록 - symbol, date는 항상 포함"""
+    if columns is None:
+        return BAR_COLUMNS
+    unknown = [column for column in columns if column not in BAR_COLUMNS]
+    if unknown:
+        raise ValueError(f"알 수 없는 컬럼: {unknown} (사용 가능: {BAR_COLUMNS})")
+    return ["symbol", "date", *(column for column in dict.fromkeys(columns) if column not in ("symbol", "date"))]
+
+
+def frame_to_rows(symbol: str, frame: pd.DataFrame) -> list:
+    """history() DataFrame → stocks 테이블 행 튜플 리스트 (컬럼 단위 변환)"""
+    dividends = frame["Dividends"].tolist() if "Dividends" in frame.columns else repeat(0.0)
+    splits = frame["Stock Splits"].tolist() if "Stock Splits" in frame.columns else repeat(0.0)
+    return list(zip(
+        repeat(symbol),
+        [idx.strftime("%Y-%m-%d") for idx in frame.index],
+        frame["Open"].tolist(), frame["High"].tolist(), frame["Low"].tolist(), frame["Close"].tolist(),
+        frame["Volume"].tolist(), dividends, splits,
+    ))
+
+
+# =========================================================
+# 2️⃣ SQLite 구현
+# =========================================================
+def ensure_sqlite_symbol_date_index(conn, table: str = "stocks"):
+    """(symbol, date) 유니크 인덱스 준비 - 중복 확인을 전체 테이블 스캔 대신 인덱스로 처리 (이미 있으면 아무 작업 없음)
+
+    update_stock.py / update_stock.KR.py / SQLitePriceStore가 같은 인덱스 이름을 사용합니다.
+    """
+    index_name = f"{table}_symbol_date_unique"
+    exists = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type='index' AND name=?", (index_name,)
+    ).fetchone()
+    if exists:
+        return
+
+    # 기존 중복 행이 있으면 유니크 인덱스를 만들 수 없으므로 먼저 정리 (먼저 들어간 행 유지)
+    with conn:
+        conn.execute(f'''
+        DELETE FROM {table} WHERE rowid NOT IN (
+            SELECT MIN(rowid) FROM {table} GROUP BY symbol, date
+        )
+        ''')
+        conn.execute(f"CREATE UNIQUE INDEX {index_name} ON {table} (symbol, date)")
+
+
+class SQLitePriceStore(PriceStore):
+    """update_stock.py와 같은 stocks 테이블 구조를 사용하는 SQLite 저장소
+
+    읽기 전용으로만 쓰면 스키마를 건드리지 않고, 첫 쓰기 때 테이블과 (symbol, date) 유니크 인덱스를 준비합니다.
+    """
+
+    def __init__(self, db_path: str, table: str = "stocks"):
+        self.table = table
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._prepared = False
+
+    def _prepare(self):
+        if self._prepared:
+            return
+        # WAL은 DB 파일에 남는 설정이므로 쓰기 때만 전환 (strategy_*.py처럼 읽기만 하면 그대로 둠)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(f'''
+        CREATE TABLE IF NOT EXISTS {self.table} (
+            symbol TEXT,
+            date DATE,
+            open REAL,
+            high REAL,
+            low REAL,
+            close REAL,
+            volume INTEGER,
+            dividends REAL,
+            stock_splits TEXT
+        )
+        ''')
+        ensure_sqlite_symbol_date_index(self.conn, self.table)
+        self._prepared = True
+
+    def _has_table(self) -> bool:
+        return self.conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type='table' AND name=?", (self.table,)
+        ).fetchone() is not None
+
+    def symbols(self) -> list:
+        if not self._has_table():
+            return []
+        return [row[0] for row in self.conn.execute(f"SELECT DISTINCT symbol FROM {self.table} ORDER BY symbol")]
+
+    def latest_dates(self, symbols: list) -> dict:
+        if not self._has_table():
+            return {}
+        latest = {}
+        symbols = list(symbols)
+        for i in range(0, len(symbols), SQLITE_MAX_PARAMS):
+            chunk = symbols[i:i + SQLITE_MAX_PARAMS]
+            cursor = self.conn.execute(
+                f"SELECT symbol, MAX(date) FROM {self.table} "
+                f"WHERE symbol IN ({','.join('?' * len(chunk))}) GROUP BY symbol",
+                chunk,
+            )
+            latest.update((symbol, max_date) for symbol, max_date in cursor if max_date)
+        return latest
+
+    def _insert(self, symbol: str, frame: pd.DataFrame) -> int:
+        rows = frame_to_rows(symbol, frame)
+        before = self.conn.total_changes
+        self.conn.executemany(f'''
+        INSERT INTO {self.table} (symbol, date, open, high, low, close, volume, dividends, stock_splits)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT(symbol, date) DO NOTHING
+        ''', rows)
+        return self.conn.total_changes - before
+
+    def write_bars(self, symbol: str, frame: pd.DataFrame) -> int:
+        return self.write_many([(symbol, frame)]).get(symbol, 0)
+
+    def write_many(self, items) -> dict:
+        """여러 심볼을 한 트랜잭션으로 저장 (실패 시 전체 롤백)"""
+        self._prepare()
+        inserted = {}
+        with self.conn:
+            for symbol, frame in items:
+                if frame is None or frame.empty:
+                    inserted[symbol] = 0
+                    continue
+                inserted[symbol] = self._insert(symbol, frame)
+        return inserted
+
+    def read_bars(self, symbols: list, start=None, end=None, columns=None) -> pd.DataFrame:
+        columns = bar_columns(columns)
+        if not self._has_table():
+            return pd.DataFrame(columns=columns)
+
+        frames = []
+        symbols = list(symbols)
+        for i in range(0, len(symbols), SQLITE_MAX_PARAMS):
+            chunk = symbols[i:i + SQLITE_MAX_PARAMS]
+            query = f"SELECT {', '.join(columns)} FROM {self.table} WHERE symbol IN ({','.join('?' * len(chunk))})"
+            params = list(chunk)
+            if start is not None:
+                query += " AND date >= ?"
+                params.append(pd.Timestamp(start).strftime("%Y-%m-%d"))
+            if end is not None:
+                query += " AND date <= ?"
+                params.append(pd.Timestamp(end).strftime("%Y-%m-%d"))
+            frames.append(pd.read_sql_query(query, self.conn, params=params))
+
+        df = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=columns)
+        df["date"] = pd.to_datetime(df["date"])
+        return df.sort_values(["symbol", "date"], ignore_index=True)
+
+    def close(self):
+        self.conn.close()
+
+
+# =========================================================
+# 3️⃣ MongoDB 구현
+# =========================================================
+class MongoPriceStore(PriceStore):
+    """02.mongodb_update.py와 같은 문서 구조(symbol/date/open/...)와 ingest_state를 사용하는 저장소
+
+    컬렉션 이름이 _ts로 끝나면 시계열 컬렉션으로 다룹니다.
+    """
+
+    def __init__(self, uri: str, collection_name: str, database_name: str = None, client: MongoClient = None):
+        self.client = client or MongoClient(uri, serverSelectionTimeoutMS=5000)
+        self._owns_client = client is None
+        # database_name을 주면 URI에 적힌 DB보다 우선, 없으면 URI의 DB → MONGO_DATABASE_NAME 순
+        if database_name:
+            self.db = self.client[database_name]
+        else:
+            self.db = self.client.get_default_database(MONGO_DATABASE_NAME)
+        self.collection = self.db[collection_name]
+        self._prepared = False
+
+    def _prepare(self):
+        if self._prepared:
+            return
+        ensure_ingest_state_index(self.db)
+        if is_timeseries_collection(self.collection):
+            ensure_timeseries_collection(self.db, self.collection.name)
+        else:
+            ensure_symbol_date_index(self.collection)
+        self._prepared = True
+
+    def symbols(self) -> list:
+        return sorted(self.collection.distinct("symbol"))
+
+    def latest_dates(self, symbols: list) -> dict:
+        """ingest_state의 마지막 날짜를 거래일 기준으로 반환 (read_bars()의 날짜와 같은 기준)"""
+        latest = read_latest_dates(self.db, self.collection.name, symbols, as_trading_date=True)
+        if (symbols and not has_ingest_state(self.db, self.collection.name)
+                and self.collection.find_one({}, {"_id": 1}) is not None):
+            # 상태 문서가 하나도 없는 기존 컬렉션이면 한 번 집계해 채움 (get_latest_dates_from_mongo와 같은 처리)
+            rebuild_ingest_state(self.db, self.collection.name)
+            latest = read_latest_dates(self.db, self.collection.name, symbols, as_trading_date=True)
+        return latest
+
+    def write_bars(self, symbol: str, frame: pd.DataFrame) -> int:
+        self._prepare()
+        documents = dataframe_to_documents(symbol, frame)
+        if is_timeseries_collection(self.collection) and documents:
+            documents = filter_new_documents(self.collection, documents)
+        if not documents:
+            return 0
+
+        try:
+            inserted = len(self.collection.insert_many(documents, ordered=False).inserted_ids)
+        except BulkWriteError as bwe:
+            errors = bwe.details.get("writeErrors", [])
+            if any(e.get("code") != 11000 for e in errors):
+                record_ingest_result(self.db, self.collection.name, symbol, "error",
+                                     inserted=bwe.details.get("nInserted", 0), error=str(errors[:1]))
+                raise
+            inserted = bwe.details.get("nInserted", 0)
+
+        last_date = max(doc["date"] for doc in documents)
+        record_ingest_result(self.db, self.collection.name, symbol, "ok", last_date=last_date, inserted=inserted)
+        return inserted
+
+    def read_bars(self, symbols: list, start=None, end=None, columns=None) -> pd.DataFrame:
+        columns = bar_columns(columns)
+        query = {"symbol": {"$in": list(symbols)}}
+        date_range = {}
+        # 저장된 날짜는 거래소 현지 자정의 UTC 값이므로 하루 여유를 두고 조회한 뒤 날짜로 맞춰 자름
+        if start is not None:
+            date_range["$gte"] = (pd.Timestamp(start) - pd.Timedelta(days=1)).to_pydatetime()
+        if end is not None:
+            date_range["$lte"] = (pd.Timestamp(end) + pd.Timedelta(days=1)).to_pydatetime()
+        if date_range:
+            query["date"] = date_range
+
+        projection = {"_id": 0, **{column: 1 for column in columns}}
+        df = pd.DataFrame(list(self.collection.find(query, projection)), columns=columns)
+        # UTC로 바뀐 현지 자정을 가장 가까운 날짜로 반올림 (KST 자정 = 전날 15:00 UTC 등)
+        df["date"] = pd.to_datetime(df["date"]).dt.round("D")
+        if start is not None:
+            df = df[df["date"] >= pd.Timestamp(start)]
+        if end is not None:
+            df = df[df["date"] <= pd.Timestamp(end)]
+        return df.sort_values(["symbol", "date"], ignore_index=True)
+
+    def close(self):
+        if self._owns_client:
+            self.client.close()
@@ -0,0 +1,180 @@
+# rate_limit.py
+# Yahoo 요청용 적응형 토큰 버킷 + 재시도(지수 백오프/지터) 대기열
+
+import asyncio
+import heapq
+import itertools
+import random
+import threading
+import time
+from collections import namedtuple
+
+# 실패 유형
+THROTTLED = "throttled"   # 429 / rate limit
+EMPTY = "empty"           # 빈 응답 (잘못된 심볼이거나 조용한 차단)
+ERROR = "error"           # 그 외 예외
+
+FetchFailure = namedtuple("FetchFailure", ["kind", "message"])
+
+
+def classify_error(exc: Exception) -> str:
+    """예외를 THROTTLED / ERROR 로 분류
+
+    예외 메시지에는 심볼/URL(…/chart/429000.KS 등)이 들어가므로 문자열 검색 대신
+    예외 타입(YFRateLimitError 등)과 HTTP 응답 코드로만 판단 (원인 예외까지 확인)
+    """
+    seen = set()
+    while exc is not None and id(exc) not in seen:
+        seen.add(id(exc))
+        if any("RateLimit" in cls.__name__ for cls in type(exc).__mro__):
+            return THROTTLED
+        response = getattr(exc, "response", None)
+        if getattr(response, "status_code", None) == 429:
+            return THROTTLED
+        exc = exc.__cause__ or exc.__context__
+    return ERROR
+
+
+# =========================================================
+# 1️⃣ 적응형 토큰 버킷
+# =========================================================
+class AdaptiveRateLimiter:
+    """여러 작업자(스레드/코루틴)가 공유하는 토큰 버킷
+
+    - 성공할 때마다 초당 요청 수를 조금씩 올림 (additive increase)
+    - 429 응답 시 절반으로 줄이고 잠시 토큰을 비움 (multiplicative decrease)
+    - 빈 응답이 연속으로 empty_threshold회 나오면 차단으로 간주
+    """
+
+    def __init__(self, rate: float = 5.0, min_rate: float = 0.5, max_rate: float = 20.0,
+                 burst: float = 5.0, increase_step: float = 0.05,
+                 cooldown: float = 5.0, empty_threshold: int = 5):
+        self.rate = rate
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.burst = burst
+        self.increase_step = increase_step
+        self.cooldown = cooldown
+        self.empty_threshold = empty_threshold
+
+        self._tokens = burst
+        self._updated = time.monotonic()
+        self._last_decrease = 0.0
+        self._consecutive_empty = 0
+        self._lock = threading.Lock()
+
+    def _reserve(self) -> float:
+        """토큰 1개를 예약하고 사용 가능해질 때까지 기다릴 시간(초)을 반환"""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            return 0.0 if self._tokens >= 0 else -self._tokens / self.rate
+
+    def acquire(self):
+        wait = self._reserve()
+        if wait > 0:
+            time.sleep(wait)
+
+    async def acquire_async(self):
+        wait = self._reserve()
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    def on_success(self):
+        with self._lock:
+            self._consecutive_empty = 0
+            self.rate = min(self.max_rate, self.rate + self.increase_step)
+
+    def on_throttle(self):
+        with self._lock:
+            self._consecutive_empty = 0
+            self._decrease()
+
+    def on_empty(self):
+        with self._lock:
+            self._consecutive_empty += 1
+            if self._consecutive_empty >= self.empty_threshold:
+                self._consecutive_empty = 0
+                self._decrease()
+
+    def _decrease(self):
+        # 동시에 들어온 429 여러 건으로 속도가 연쇄적으로 줄지 않도록 cooldown 동안 1회만 감소
+        now = time.monotonic()
+        if now - self._last_decrease < self.cooldown:
+            return
+        self._last_decrease = now
+        self.rate = max(self.min_rate, self.rate / 2)
+        self._tokens = min(self._tokens, 0.0)
+        print(f"🐢 요청 속도 감소 → 초당 {self.rate:.2f}회")
+
+
+# =========================================================
+# 2️⃣ 재시도 대기열 (지수 백오프 + 지터)
+# =========================================================
+class RetryQueue:
+    """실패한 작업을 지수 백오프 후 다시 꺼내 주고, 한도를 넘긴 작업은 영구 실패로 기록"""
+
+    def __init__(self, max_attempts: int = 4, empty_max_attempts: int = 2,
+                 base_delay: float = 2.0, max_delay: float = 120.0):
+        self.max_attempts = max_attempts
+        self.empty_max_attempts = empty_max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+        self.attempts = {}
+        self.permanent_failures = {}
+        self._heap = []
+        self._counter = itertools.count()
+
+    def __len__(self):
+        return len(self._heap)
+
+    def backoff(self, attempts: int) -> float:
+        delay = min(self.max_delay, self.base_delay * 2 ** (attempts - 1))
+        return random.uniform(delay / 2, delay)
+
+    def record_failure(self, key, failure: FetchFailure):
+        """실패 횟수를 기록하고 다음 재시도까지의 대기 시간을 반환 (한도 초과 시 None)"""
+        attempts = self.attempts[key] = self.attempts.get(key, 0) + 1
+        limit = self.empty_max_attempts if failure.kind == EMPTY else self.max_attempts
+        if attempts >= limit:
+            self.permanent_failures[key] = failure
+            return None
+        delay = self.backoff(attempts)
+        print(f"[{key}] 🔁 {delay:.1f}초 후 재시도 ({attempts}회 실패: {failure.kind})")
+        return delay
+
+    def push(self, key, job, failure: FetchFailure) -> bool:
+        """실패한 작업을 백오프 시간 뒤에 꺼낼 수 있도록 대기열에 넣음 (한도 초과 시 False)"""
+        delay = self.record_failure(key, failure)
+        if delay is None:
+            return False
+        heapq.heappush(self._heap, (time.monotonic() + delay, next(self._counter), key, job))
+        return True
+
+    def pop_ready(self) -> list:
+        """재시도 시각이 된 (key, job) 목록을 꺼냄"""
+        ready = []
+        now = time.monotonic()
+        while self._heap and self._heap[0][0] <= now:
+            _, _, key, job = heapq.heappop(self._heap)
+            ready.append((key, job))
+        return ready
+
+    def next_ready_in(self):
+        """다음 재시도까지 남은 시간(초), 대기 중인 작업이 없으면 None"""
+        if not self._heap:
+            return None
+        return max(0.0, self._heap[0][0] - time.monotonic())
+
+    def print_report(self):
+        print("\n=======================================================")
+        if not self.permanent_failures:
+            print("✅ 영구 실패 없음")
+        else:
+            print(f"❌ 영구 실패 {len(self.permanent_failures)}건")
+            for key, failure in sorted(self.permanent_failures.items(), key=lambda kv: str(kv[0])):
+                print(f"   - {key} [{failure.kind}] {failure.message}")
+        print("=======================================================")
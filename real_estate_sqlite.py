@@ -0,0 +1,312 @@
+# real_estate_sqlite.py
+# 국토교통부 실거래가(매매/전월세) CSV → SQLite 일괄 적재
+# 파일마다 별도 스테이징 DB에 병렬로 적재한 뒤, 본 DB에는 파일 단위 트랜잭션으로 병합합니다.
+
+import csv
+import os
+import shutil
+import sqlite3
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from glob import glob
+from operator import itemgetter
+
+from real_estate_utils import detect_encoding, find_csv_header
+
+# =========================================================
+# 1️⃣ 환경 설정
+# =========================================================
+BATCH_SIZE = 50000                    # executemany 한 번에 넣을 행 수
+CACHE_SIZE_KB = 200 * 1024            # 적재 중 SQLite 페이지 캐시 (KB)
+PARSE_PROCESSES = os.cpu_count() or 1
+
+# CSV 헤더 → SQLite 컬럼 (같은 컬럼에 여러 헤더가 매핑되면 파일에 있는 헤더 사용)
+SALE_COLUMNS = {
+    "시군구": "시군구",
+    "번지": "번지",
+    "본번": "본번",
+    "부번": "부번",
+    "단지명": "단지명",
+    "전용면적(㎡)": "전용면적",
+    "계약년월": "계약년월",
+    "계약일": "계약일",
+    "거래금액(만원)": "거래금액",
+    "동": "동",
+    "층": "층",
+    "매수자": "매수자",
+    "매도자": "매도자",
+    "건축년도": "건축년도",
+    "도로명": "도로명",
+    "해제사유발생일": "해제사유발생일",
+    "거래유형": "거래유형",
+    "중개사소재지": "중개사소재지",
+    "등기일자": "등기일자",
+}
+
+RENT_COLUMNS = {
+    "시군구": "시군구",
+    "번지": "번지",
+    "본번": "본번",
+    "부번": "부번",
+    "단지명": "단지명",
+    "전월세구분": "구분",
+    "전용면적(㎡)": "전용면적",
+    "계약년월": "계약년월",
+    "계약일": "계약일",
+    "보증금(만원)": "보증금",
+    "월세금(만원)": "월세금",          # 구버전
+    "월세(만원)": "월세금",            # 신버전
+    "층": "층",
+    "건축년도": "건축년도",
+    "도로명": "도로명",
+    "계약기간": "계약기간",
+    "계약구분": "계약구분",
+    "갱신요구권 사용": "갱신요구권",
+    "종전계약 보증금(만원)": "종전계약보증금",
+    "종전계약 월세(만원)": "종전계약월세",
+    "주택유형": "주택유형",
+}
+
+# 테이블별 설정: 컬럼 매핑, 적재 후 만드는 조회용 인덱스
+TABLES = {
+    "sale": {"columns": SALE_COLUMNS, "indexes": [("시군구", "계약년월"), ("단지명", "계약년월")]},
+    "rent": {"columns": RENT_COLUMNS, "indexes": [("시군구", "계약년월"), ("단지명", "계약년월")]},
+}
+
+STAGING_TABLE = "stage"
+
+
+def table_columns(table: str) -> list:
+    return list(dict.fromkeys(TABLES[table]["columns"].values()))
+
+
+def quoted(columns) -> str:
+    return ",".join(f'"{col}"' for col in columns)
+
+
+def unique_index_name(table: str) -> str:
+    return f"{table}_unique"
+
+
+# =========================================================
+# 2️⃣ CSV → 스테이징 DB (프로세스별)
+# =========================================================
+def build_row_picker(header: list, column_map: dict, columns: list):
+    """헤더로 SQLite 컬럼 순서의 CSV 위치 목록을 한 번 만들고, 행 → 값 튜플 변환 함수를 반환"""
+    positions = {col: i for i, col in enumerate(header)}
+    indexes = []
+    for column in columns:
+        found = [positions[csv_col] for csv_col, target in column_map.items()
+                 if target == column and csv_col in positions]
+        indexes.append(found[0] if found else None)  # 파일에 없는 컬럼은 빈 문자열
+
+    width = len(header)
+    strip = str.strip
+
+    if None not in indexes:
+        # 모든 컬럼이 파일에 있으면 itemgetter로 한 번에 꺼냄
+        getter = itemgetter(*indexes)
+
+        def pick(row: list) -> tuple:
+            if len(row) < width:
+                row = row + [""] * (width - len(row))
+            return tuple(map(strip, getter(row)))
+
+        return pick
+
+    def pick(row: list) -> tuple:
+        if len(row) < width:
+            row = row + [""] * (width - len(row))
+        return tuple(row[i].strip() if i is not None else "" for i in indexes)
+
+    return pick
+
+
+def load_staging(csv_file_path: str, staging_path: str, table: str) -> tuple:
+    """CSV 한 파일을 스테이징 DB에 적재하고 (CSV 경로, 스테이징 경로, 행 수) 반환"""
+    columns = table_columns(table)
+    placeholders = ",".join("?" * len(columns))
+
+    # 버려질 DB이므로 저널/동기화 없이 기록
+    connection = sqlite3.connect(staging_path)
+    connection.execute("PRAGMA journal_mode=OFF")
+    connection.execute("PRAGMA synchronous=OFF")
+    connection.execute(f"DROP TABLE IF EXISTS {STAGING_TABLE}")
+    connection.execute(f"CREATE TABLE {STAGING_TABLE} ({quoted(columns)})")
+
+    rows = 0
+    with open(csv_file_path, encoding=detect_encoding(csv_file_path), newline="") as csv_file:
+        reader = csv.reader(csv_file)
+        pick = build_row_picker(find_csv_header(reader, csv_file_path), TABLES[table]["columns"], columns)
+
+        insert = f"INSERT INTO {STAGING_TABLE} VALUES ({placeholders})"
+        batch = []
+        for row in reader:
+            if not row:
+                continue
+            batch.append(pick(row))
+            if len(batch) >= BATCH_SIZE:
+                connection.executemany(insert, batch)
+                rows += len(batch)
+                batch = []
+        if batch:
+            connection.executemany(insert, batch)
+            rows += len(batch)
+
+    connection.commit()
+    connection.close()
+    return csv_file_path, staging_path, rows
+
+
+# =========================================================
+# 3️⃣ 본 DB 병합
+# =========================================================
+def connect(db_path: str):
+    """본 DB 연결 (WAL, 임시 저장소 메모리, 큰 페이지 캐시)"""
+    connection = sqlite3.connect(db_path, isolation_level=None)
+    connection.execute("PRAGMA journal_mode=WAL")
+    connection.execute("PRAGMA temp_store=MEMORY")
+    connection.execute(f"PRAGMA cache_size=-{CACHE_SIZE_KB}")
+    return connection
+
+
+def ensure_table(connection, table: str):
+    connection.execute(f'CREATE TABLE IF NOT EXISTS {table} ({quoted(table_columns(table))})')
+
+
+def create_indexes(connection, table: str):
+    """중복 방지 유니크 인덱스 + 조회용 인덱스 (이미 있으면 아무 작업 없음)"""
+    connection.execute(f"CREATE UNIQUE INDEX IF NOT EXISTS {unique_index_name(table)} "
+                       f"ON {table} ({quoted(table_columns(table))})")
+    for columns in TABLES[table]["indexes"]:
+        connection.execute(f"CREATE INDEX IF NOT EXISTS {table}_{'_'.join(columns)} ON {table} ({quoted(columns)})")
+
+
+def remove_duplicates(connection, table: str) -> int:
+    """인덱스 없이 적재한 뒤 같은 행 중 하나만 남김"""
+    cursor = connection.execute(
+        f"DELETE FROM {table} WHERE rowid NOT IN "
+        f"(SELECT MIN(rowid) FROM {table} GROUP BY {quoted(table_columns(table))})"
+    )
+    return cursor.rowcount
+
+
+def has_index(connection, name: str) -> bool:
+    return connection.execute("SELECT 1 FROM sqlite_master WHERE type = 'index' AND name = ?",
+                              (name,)).fetchone() is not None
+
+
+def merge_staging(connection, table: str, staging_path: str) -> int:
+    """스테이징 DB 한 개를 본 테이블에 INSERT OR IGNORE (파일 단위 트랜잭션). 추가된 행 수 반환
+
+    SQLite는 트랜잭션 안에서 DETACH할 수 없으므로 ATTACH → BEGIN → INSERT → COMMIT → DETACH 순서
+    """
+    connection.execute("ATTACH DATABASE ? AS staging", (staging_path,))
+    try:
+        columns = quoted(table_columns(table))
+        connection.execute("BEGIN")
+        try:
+            cursor = connection.execute(
+                f"INSERT OR IGNORE INTO {table} ({columns}) SELECT {columns} FROM staging.{STAGING_TABLE}"
+            )
+            connection.execute("COMMIT")
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+        return cursor.rowcount
+    finally:
+        connection.execute("DETACH DATABASE staging")
+
+
+def finish_load(connection, table: str, deferred: bool) -> int:
+    """인덱스 생성 (한 트랜잭션). 미뤄 둔 유니크 인덱스가 중복 행 때문에 실패하면 중복 제거 후 다시 생성
+
+    삭제한 중복 행 수 반환
+    """
+    connection.execute("BEGIN")
+    try:
+        removed = 0
+        try:
+            create_indexes(connection, table)
+        except sqlite3.IntegrityError:
+            if not deferred:
+                raise
+            removed = remove_duplicates(connection, table)
+            create_indexes(connection, table)
+        connection.execute("COMMIT")
+    except BaseException:
+        connection.execute("ROLLBACK")
+        raise
+    return removed
+
+
+# =========================================================
+# 4️⃣ 실행
+# =========================================================
+def load_csv_files(csv_files: list, table: str, db_path: str, processes: int = PARSE_PROCESSES) -> list:
+    """CSV 여러 개를 프로세스 풀로 스테이징 DB에 적재하고, 끝나는 순서대로 본 DB에 병합. 파싱에 실패한 CSV 경로 목록 반환
+
+    - 유니크 인덱스가 아직 없으면(첫 적재 또는 지난 적재 중단) 인덱스 없이 넣은 뒤 인덱스 생성
+      (행마다 인덱스를 갱신하지 않고 마지막에 한 번 정렬해 만듦, 파일 간 중복 행이 있으면 그때만 제거)
+    - 유니크 인덱스가 있으면 그대로 두고 INSERT OR IGNORE
+    - 스테이징 적재는 파일마다 executemany(BATCH_SIZE행) 한 트랜잭션, 본 DB 병합은 파일마다 한 트랜잭션
+    - 적재 중에는 synchronous=OFF
+    """
+    start_time = time.time()
+    if not csv_files:
+        print("❗ 적재할 CSV 파일이 없습니다.")
+        return []
+
+    # 실행마다 본 DB 옆에 새 스테이징 디렉터리 (같은 DB에 동시에 적재해도 서로의 파일을 지우지 않음)
+    staging_dir = tempfile.mkdtemp(dir=os.path.dirname(db_path) or ".", prefix=f"{table}.")
+
+    connection = connect(db_path)
+    ensure_table(connection, table)
+    deferred = not has_index(connection, unique_index_name(table))
+    if deferred:
+        # 조회용 인덱스도 적재 후 한 번에 생성
+        for columns in TABLES[table]["indexes"]:
+            connection.execute(f"DROP INDEX IF EXISTS {table}_{'_'.join(columns)}")
+
+    print(f"🚀 CSV {len(csv_files)}개 → {db_path} [{table}] 적재 시작 (파싱 프로세스 {processes}개, "
+          f"{'인덱스는 마지막에 생성' if deferred else '기존 유니크 인덱스로 중복 건너뜀'})")
+
+    connection.execute("PRAGMA synchronous=OFF")
+    inserted = 0
+    failed = []
+    try:
+        with ProcessPoolExecutor(max_workers=processes) as pool:
+            futures = {pool.submit(load_staging, path, os.path.join(staging_dir, f"{i}.db"), table): path
+                       for i, path in enumerate(csv_files)}
+            for future in as_completed(futures):
+                try:
+                    csv_file_path, staging_path, rows = future.result()
+                except Exception as e:
+                    print(f"❌ 파싱 실패: {e}")
+                    failed.append(futures[future])
+                    continue
+                added = merge_staging(connection, table, staging_path)
+                inserted += added
+                os.remove(staging_path)
+                print(f"[{csv_file_path}] {rows}행 → 추가 {added}건")
+
+        removed = finish_load(connection, table, deferred)
+        if removed:
+            inserted -= removed
+            print(f"🧹 중복 행 {removed}건 삭제")
+    finally:
+        connection.execute("PRAGMA synchronous=NORMAL")
+        connection.close()
+        shutil.rmtree(staging_dir, ignore_errors=True)
+
+    if failed:
+        print(f"❗ 파싱 실패 CSV {len(failed)}개 (적재되지 않음, 고친 뒤 다시 실행하세요):")
+        for path in sorted(failed):
+            print(f"   - {path}")
+    print(f"🎉 적재 완료! 추가 {inserted}건, 소요 시간: {time.time() - start_time:.2f}초")
+    return failed
+
+
+def load_csv_glob(pattern: str, table: str, db_path: str, processes: int = PARSE_PROCESSES) -> list:
+    return load_csv_files(sorted(glob(pattern)), table, db_path, processes)
@@ -0,0 +1,483 @@
+# real_estate_utils.py
+# 국토교통부 실거래가(매매/전월세) MongoDB 적재 공통 유틸리티
+
+import codecs
+import csv
+import hashlib
+from datetime import datetime, timezone
+
+from pymongo import InsertOne, UpdateOne, DeleteMany
+from pymongo.errors import BulkWriteError
+
+from region_codes import region_code
+
+# =========================================================
+# 0️⃣ CSV 컬럼 매핑
+# =========================================================
+# 매매: CSV 헤더 → MongoDB 필드 매핑
+# NO는 제외 (식별자 역할 없음)
+SALE_FIELD_MAPPING = {
+    "시군구": "sigungu",
+    "번지": "bunji",
+    "본번": "bonbun",
+    "부번": "bubun",
+    "단지명": "complex_name",
+    "전용면적(㎡)": "exclusive_area",
+    "계약년월": "contract_year_month",
+    "계약일": "contract_day",
+    "거래금액(만원)": "transaction_amount",
+    "동": "dong",
+    "층": "floor",
+    "매수자": "buyer",
+    "매도자": "seller",
+    "건축년도": "construction_year",
+    "도로명": "road_name",
+    "해제사유발생일": "cancellation_date",
+    "거래유형": "transaction_type",
+    "중개사소재지": "broker_location",
+    "등기일자": "registration_date"
+}
+
+# 중복 판단에 사용될 주요 필드 목록 (해제사유발생일 제외) - 이 필드들의 해시를 fingerprint로 저장
+SALE_KEY_FIELDS = [SALE_FIELD_MAPPING[col] for col in SALE_FIELD_MAPPING if col != "해제사유발생일"]
+
+# 숫자로 변환할 필드들
+SALE_NUMERIC_FIELDS = ["exclusive_area", "transaction_amount", "floor", "construction_year"]
+
+# 전월세: 컬럼 매핑 (모든 연도 호환)
+RENT_FIELD_MAPPING = {
+    "시군구": "sigungu",
+    "번지": "bunji",
+    "본번": "bonbun",
+    "부번": "bubun",
+    "단지명": "complex_name",
+    "전월세구분": "rent_type",                # 전세 / 월세
+    "전용면적(㎡)": "exclusive_area",
+    "계약년월": "contract_year_month",
+    "계약일": "contract_day",
+    "보증금(만원)": "deposit",
+    "월세금(만원)": "monthly_rent",            # 구버전
+    "월세(만원)": "monthly_rent",              # 신버전
+    "층": "floor",
+    "건축년도": "construction_year",
+    "도로명": "road_name",
+    "계약기간": "contract_period",
+    "계약구분": "contract_category",
+    "갱신요구권 사용": "renewal_right_used",
+    "종전계약 보증금(만원)": "previous_deposit",
+    "종전계약 월세(만원)": "previous_monthly_rent",
+    "주택유형": "housing_type",
+}
+
+# 숫자로 변환할 필드들
+RENT_NUMERIC_FIELDS = [
+    "exclusive_area", "deposit", "monthly_rent",
+    "floor", "construction_year",
+    "previous_deposit", "previous_monthly_rent"
+]
+
+# 전월세는 해제사유발생일이 없으므로 모든 필드를 fingerprint로 묶어 유니크 인덱스
+# (monthly_rent처럼 두 컬럼이 같은 필드로 매핑되는 경우 한 번만 사용)
+RENT_KEY_FIELDS = list(dict.fromkeys(RENT_FIELD_MAPPING.values()))
+
+
+# =========================================================
+# 1️⃣ 거래 지문(fingerprint) - 중복 판단용 단일 키
+# =========================================================
+FINGERPRINT_FIELD = "fingerprint"
+FINGERPRINT_INDEX_NAME = "fingerprint_unique_index"
+
+
+def normalize_key_value(value) -> str:
+    """지문 계산용 값 정규화 (None/빈 문자열 동일 취급, 84.0과 84는 같은 값)"""
+    if value is None:
+        return ""
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value).strip()
+
+
+def transaction_fingerprint(doc: dict, key_fields: list) -> str:
+    """주요 필드를 순서대로 이어 붙인 값의 해시 (필드 18~21개 복합 인덱스 대신 사용)"""
+    joined = "\x1f".join(normalize_key_value(doc.get(field)) for field in key_fields)
+    return hashlib.blake2b(joined.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def ensure_fingerprint_index(collection) -> str:
+    """fingerprint 유니크 인덱스 준비
+
+    마이그레이션 전 문서(fingerprint 없음)가 있어도 만들 수 있도록 필드가 있는 문서에만 적용합니다.
+    """
+    return collection.create_index(
+        [(FINGERPRINT_FIELD, 1)],
+        unique=True,
+        name=FINGERPRINT_INDEX_NAME,
+        partialFilterExpression={FINGERPRINT_FIELD: {"$exists": True}},
+    )
+
+
+# =========================================================
+# 2️⃣ 기존 문서 마이그레이션
+# =========================================================
+def backfill_fingerprints(collection, key_fields: list, chunk_size: int = 5000) -> int:
+    """fingerprint가 없는 문서에 값을 채움. 갱신한 문서 수 반환"""
+    projection = {field: 1 for field in key_fields}
+    cursor = collection.find({FINGERPRINT_FIELD: {"$exists": False}}, projection).batch_size(chunk_size)
+
+    updated = 0
+    ops = []
+    for doc in cursor:
+        ops.append(UpdateOne({"_id": doc["_id"]},
+                             {"$set": {FINGERPRINT_FIELD: transaction_fingerprint(doc, key_fields)}}))
+        if len(ops) >= chunk_size:
+            updated += collection.bulk_write(ops, ordered=False).modified_count
+            ops = []
+            print(f"   - {collection.name}: {updated}건 fingerprint 기록")
+    if ops:
+        updated += collection.bulk_write(ops, ordered=False).modified_count
+    return updated
+
+
+def remove_duplicate_fingerprints(collection, merge_fields: tuple = ()) -> int:
+    """같은 fingerprint 문서 중 하나만 남기고 삭제. 삭제한 문서 수 반환
+
+    merge_fields에 값이 있는 중복 문서가 있으면 남기는 문서에 그 값을 옮겨 둡니다 (예: 해제사유발생일).
+    """
+    pipeline = [
+        {"$match": {FINGERPRINT_FIELD: {"$exists": True}}},
+        {"$group": {"_id": f"${FINGERPRINT_FIELD}", "ids": {"$push": "$_id"}, "count": {"$sum": 1},
+                    **{field: {"$max": f"${field}"} for field in merge_fields}}},
+        {"$match": {"count": {"$gt": 1}}},
+    ]
+
+    now = datetime.now(timezone.utc)
+    ops = []
+    for group in collection.aggregate(pipeline, allowDiskUse=True):
+        keep, *duplicates = sorted(group["ids"])
+        merged = {field: group[field] for field in merge_fields if group.get(field)}
+        # 삭제는 updated_at으로 남지 않으므로 남기는 문서에 표시 (같은 fingerprint = 같은 집계 그룹)
+        ops.append(UpdateOne({"_id": keep}, {"$set": {**merged, UPDATED_AT_FIELD: now}}))
+        ops.append(DeleteMany({"_id": {"$in": duplicates}}))
+
+    deleted = 0
+    for i in range(0, len(ops), 1000):
+        deleted += collection.bulk_write(ops[i:i + 1000], ordered=False).deleted_count
+    return deleted
+
+
+def drop_compound_unique_indexes(collection) -> list:
+    """fingerprint로 대체된 여러 필드 유니크 인덱스 삭제. 삭제한 인덱스 이름 목록 반환"""
+    dropped = []
+    for name, info in collection.index_information().items():
+        if info.get("unique") and len(info["key"]) > 1:
+            collection.drop_index(name)
+            dropped.append(name)
+    return dropped
+
+
+# =========================================================
+# 3️⃣ CSV 읽기 / 문서 변환 (스트리밍)
+# =========================================================
+ENCODING_SAMPLE_BYTES = 1 << 20   # 인코딩 판별에 읽는 앞부분 크기 (1MB)
+
+
+def detect_encoding(csv_file_path) -> str:
+    """파일 앞부분으로 utf-8 / cp949 를 한 번만 판별 (국토교통부 CSV는 보통 cp949)"""
+    with open(csv_file_path, "rb") as f:
+        sample = f.read(ENCODING_SAMPLE_BYTES)
+    if sample.startswith(codecs.BOM_UTF8):
+        return "utf-8-sig"
+    try:
+        # 잘린 마지막 글자는 final=False로 허용
+        codecs.getincrementaldecoder("utf-8")().decode(sample, final=False)
+        return "utf-8"
+    except UnicodeDecodeError:
+        return "cp949"
+
+
+def _number(value: str):
+    """쉼표 제거 후 정수/실수로 변환 (실패 시 쉼표를 뺀 문자열 그대로)"""
+    value = value.replace(",", "")
+    try:
+        return float(value) if "." in value else int(value)
+    except ValueError:
+        return value
+
+
+def _number_or_none(value: str):
+    return _number(value) if value else None
+
+
+def _text(value: str):
+    return value
+
+
+def _text_or_none(value: str):
+    return value if value else None
+
+
+def build_row_decoder(header: list, field_mapping: dict, numeric_fields: list, key_fields: list,
+                      empty_as_none: bool = False, amount_field: str = None):
+    """헤더로 (컬럼 위치, 필드, 변환 함수) 표를 한 번 만들고, 행 리스트 → 문서 변환 함수를 반환
+
+    같은 필드에 여러 헤더가 매핑된 경우(월세금(만원) / 월세(만원)) 파일에 있는 헤더를 사용하고,
+    파일에 없는 필드는 빈 값("" 또는 None)으로 채웁니다.
+    amount_field를 주면 계약일 / ㎡당 가격 / 지역 파생 필드도 채웁니다.
+    """
+    positions = {col: i for i, col in enumerate(header)}
+    number = _number_or_none if empty_as_none else _number
+    text = _text_or_none if empty_as_none else _text
+    empty = None if empty_as_none else ""
+
+    columns = []
+    missing = {}
+    for csv_col, mongo_field in field_mapping.items():
+        if any(field == mongo_field for _, field, _ in columns):
+            continue  # 이미 다른 헤더 이름으로 찾은 필드
+        if csv_col in positions:
+            columns.append((positions[csv_col], mongo_field, number if mongo_field in numeric_fields else text))
+            missing.pop(mongo_field, None)
+        else:
+            missing[mongo_field] = empty
+
+    width = len(header)
+
+    def decode(row: list) -> dict:
+        if len(row) < width:
+            row = row + [""] * (width - len(row))
+        doc = {field: convert(row[i].strip()) for i, field, convert in columns}
+        doc.update(missing)
+        doc[FINGERPRINT_FIELD] = transaction_fingerprint(doc, key_fields)
+        if amount_field:
+            doc.update(derived_fields(doc, amount_field))
+        return doc
+
+    return decode
+
+
+def find_csv_header(reader, csv_file_path) -> list:
+    """CSV 앞부분 안내문을 건너뛰고 "NO"로 시작하는 헤더 행을 반환 (앞뒤 공백 무시, 없으면 ValueError)"""
+    for row in reader:
+        if row and row[0].strip() == "NO":
+            return [col.strip() for col in row]
+    raise ValueError(f"[{csv_file_path}] 헤더 행을 찾을 수 없습니다. 'NO'로 시작하는 헤더가 필요합니다.")
+
+
+def read_csv_documents(csv_file_path, field_mapping: dict, numeric_fields: list, key_fields: list,
+                       empty_as_none: bool = False, amount_field: str = None):
+    """CSV에서 "NO" 헤더 행을 찾은 뒤 데이터 행을 문서로 하나씩 반환 (인코딩 자동 판별)"""
+    with open(csv_file_path, encoding=detect_encoding(csv_file_path), newline="") as csv_file:
+        reader = csv.reader(csv_file)
+        header = find_csv_header(reader, csv_file_path)
+
+        decode = build_row_decoder(header, field_mapping, numeric_fields, key_fields, empty_as_none, amount_field)
+        for row in reader:
+            if row:
+                yield decode(row)
+
+
+def read_sale_documents(csv_file_path):
+    """매매 CSV → 문서 (빈 값은 "", 숫자 변환 실패 시 문자열 유지)"""
+    return read_csv_documents(csv_file_path, SALE_FIELD_MAPPING, SALE_NUMERIC_FIELDS, SALE_KEY_FIELDS,
+                              amount_field=SALE_AMOUNT_FIELD)
+
+
+def read_rent_documents(csv_file_path):
+    """전월세 CSV → 문서 (빈 값은 None)"""
+    return read_csv_documents(csv_file_path, RENT_FIELD_MAPPING, RENT_NUMERIC_FIELDS, RENT_KEY_FIELDS,
+                              empty_as_none=True, amount_field=RENT_AMOUNT_FIELD)
+
+
+# =========================================================
+# 4️⃣ bulk_write 적재
+# =========================================================
+UPDATED_AT_FIELD = "updated_at"   # 삽입 / 내용이 바뀐 시각 (월간 집계 증분 갱신 기준)
+
+
+def sale_operation(doc, updated_at=None):
+    """매매 문서 → bulk_write 작업 (행 단위 parse_csv_to_mongo와 같은 의미)
+
+    - 해제사유발생일이 있으면 기존 거래에 $set, 없던 거래면 upsert로 삽입
+      (이미 같은 해제사유발생일이면 필터가 맞지 않아 upsert가 유니크 인덱스 중복 오류 → 스킵, updated_at 유지)
+    - 해제사유발생일이 없으면 InsertOne (이미 있으면 유니크 인덱스 중복 오류 → 스킵)
+    """
+    doc[UPDATED_AT_FIELD] = updated_at or datetime.now(timezone.utc)
+    if doc.get("cancellation_date"):
+        insert_fields = {k: v for k, v in doc.items()
+                         if k not in (FINGERPRINT_FIELD, "cancellation_date", UPDATED_AT_FIELD)}
+        return UpdateOne(
+            {FINGERPRINT_FIELD: doc[FINGERPRINT_FIELD], "cancellation_date": {"$ne": doc["cancellation_date"]}},
+            {"$set": {"cancellation_date": doc["cancellation_date"], UPDATED_AT_FIELD: doc[UPDATED_AT_FIELD]},
+             "$setOnInsert": insert_fields},
+            upsert=True,
+        )
+    return InsertOne(doc)
+
+
+def rent_operation(doc, updated_at=None):
+    """전월세 문서 → InsertOne (중복은 fingerprint 유니크 인덱스에서 스킵)"""
+    doc[UPDATED_AT_FIELD] = updated_at or datetime.now(timezone.utc)
+    return InsertOne(doc)
+
+
+def write_operations(collection, operations):
+    """bulk_write(ordered=False) 한 번 실행 후 (삽입, 업데이트, 스킵, 실패) 건수 반환
+
+    중복 키 오류(11000)는 스킵으로 세고, 나머지 작업은 계속 진행됩니다.
+    """
+    try:
+        result = collection.bulk_write(operations, ordered=False)
+        details = result.bulk_api_result
+    except BulkWriteError as bwe:
+        details = bwe.details
+
+    errors = details.get("writeErrors", [])
+    skipped = sum(1 for e in errors if e.get("code") == 11000)
+    failed = len(errors) - skipped
+    if failed:
+        print(f"❗ bulk_write 실패 {failed}건 (예: {errors[0].get('errmsg')})")
+
+    inserted = details.get("nInserted", 0) + details.get("nUpserted", 0)
+    return inserted, details.get("nMatched", 0), skipped, failed
+
+
+# =========================================================
+# 5️⃣ 분석용 파생 필드 (계약일 / ㎡당 가격 / 지역)
+# =========================================================
+CONTRACT_DATE_FIELD = "contract_date"   # datetime (계약년월 + 계약일)
+PRICE_PER_M2_FIELD = "price_per_m2"     # 만원/㎡ (매매: 거래금액, 전월세: 보증금 기준)
+REGION_FIELD = "region"                 # 시군구 코드 5자리 (API sggCd와 같은 값, CSV는 이름으로 찾은 코드)
+REGION_NAME_FIELD = "region_name"       # "서울특별시 강남구" (시도 + 시군구)
+DERIVED_FIELDS = (CONTRACT_DATE_FIELD, PRICE_PER_M2_FIELD, REGION_FIELD, REGION_NAME_FIELD)
+
+SALE_AMOUNT_FIELD = "transaction_amount"
+RENT_AMOUNT_FIELD = "deposit"
+
+# 시군구 문자열에서 시도 다음에 지역으로 남길 단위 (읍/면/동/리/가 앞까지)
+REGION_SUFFIXES = ("시", "군", "구")
+
+
+def contract_date(year_month, day):
+    """'200501', '15' → datetime(2005, 1, 15) (형식이 맞지 않으면 None)"""
+    try:
+        year_month = str(year_month).strip()
+        return datetime(int(year_month[:4]), int(year_month[4:6]), int(str(day).strip()))
+    except (TypeError, ValueError):
+        return None
+
+
+def price_per_m2(amount, area):
+    """금액(만원) / 전용면적(㎡), 소수 둘째 자리까지 (숫자가 아니거나 면적이 0이면 None)"""
+    if not isinstance(amount, (int, float)) or not isinstance(area, (int, float)) or area <= 0:
+        return None
+    return round(amount / area, 2)
+
+
+def region_from_sigungu(sigungu):
+    """'경기도 성남시 분당구 정자동' → '경기도 성남시 분당구'"""
+    if not sigungu or not sigungu.strip():
+        return None
+    sido, *rest = sigungu.split()
+    parts = [sido]
+    for part in rest:
+        if not part.endswith(REGION_SUFFIXES):
+            break
+        parts.append(part)
+    return " ".join(parts)
+
+
+def derived_fields(doc: dict, amount_field: str) -> dict:
+    """CSV 문서 → 계약일 / ㎡당 가격 / 지역 코드·이름 (코드 표에 없는 지역은 코드 None)"""
+    name = region_from_sigungu(doc.get("sigungu"))
+    return {
+        CONTRACT_DATE_FIELD: contract_date(doc.get("contract_year_month"), doc.get("contract_day")),
+        PRICE_PER_M2_FIELD: price_per_m2(doc.get(amount_field), doc.get("exclusive_area")),
+        REGION_FIELD: region_code(name),
+        REGION_NAME_FIELD: name,
+    }
+
+
+def backfill_derived_fields(collection, amount_field: str, chunk_size: int = 5000) -> int:
+    """파생 필드가 없는 기존 문서에 값을 채움 (적재 시와 같은 함수로 계산). 갱신한 문서 수 반환"""
+    projection = {"contract_year_month": 1, "contract_day": 1, "exclusive_area": 1, "sigungu": 1, amount_field: 1}
+    # 지역 이름 필드가 없는 문서는 region에 이름이 들어 있던 예전 형식이므로 다시 계산
+    missing = {"$or": [{CONTRACT_DATE_FIELD: {"$exists": False}}, {REGION_NAME_FIELD: {"$exists": False}}]}
+    cursor = collection.find(missing, projection).batch_size(chunk_size)
+
+    now = datetime.now(timezone.utc)
+    updated = 0
+    ops = []
+    for doc in cursor:
+        ops.append(UpdateOne({"_id": doc["_id"]}, {"$set": {**derived_fields(doc, amount_field),
+                                                            UPDATED_AT_FIELD: now}}))
+        if len(ops) >= chunk_size:
+            updated += collection.bulk_write(ops, ordered=False).modified_count
+            ops = []
+            print(f"   - {collection.name}: {updated}건 파생 필드 기록")
+    if ops:
+        updated += collection.bulk_write(ops, ordered=False).modified_count
+    return updated
+
+
+# =========================================================
+# 6️⃣ 조회 인덱스 / 조회 API
+# =========================================================
+def ensure_query_indexes(collection, complex_field: str = "complex_name") -> list:
+    """지역·기간 / 단지·기간 조회용 복합 인덱스 ((region, contract_date), (단지명, contract_date))
+    + 월간 집계 증분 갱신용 updated_at 인덱스"""
+    return [
+        collection.create_index([(REGION_FIELD, 1), (CONTRACT_DATE_FIELD, 1)],
+                                name=f"{REGION_FIELD}_{CONTRACT_DATE_FIELD}"),
+        collection.create_index([(complex_field, 1), (CONTRACT_DATE_FIELD, 1)],
+                                name=f"{complex_field}_{CONTRACT_DATE_FIELD}"),
+        collection.create_index([(UPDATED_AT_FIELD, 1)], name=UPDATED_AT_FIELD),
+    ]
+
+
+def to_datetime(value):
+    """datetime 또는 'YYYYMM' / 'YYYYMMDD' / 'YYYY-MM-DD' 문자열 → datetime"""
+    if value is None or isinstance(value, datetime):
+        return value
+    text = str(value).replace("-", "")
+    return datetime(int(text[:4]), int(text[4:6]), int(text[6:8]) if len(text) >= 8 else 1)
+
+
+def transaction_filter(start=None, end=None, region=None, complex_name=None,
+                       complex_field: str = "complex_name") -> dict:
+    """기간 [start, end) / 지역 / 단지 조건 → MongoDB 필터 (지역·단지는 목록이면 $in)
+
+    지역은 시군구 코드("11680") 또는 이름("서울특별시 강남구"). 이름은 코드로 바꿔 region 인덱스로 찾고,
+    코드 표에 없는 이름이 섞여 있으면 region_name으로 찾습니다.
+    """
+    query = {}
+    if region is not None:
+        regions = list(region) if isinstance(region, (list, tuple, set)) else [region]
+        codes = [value if str(value).isdigit() else region_code(value) for value in regions]
+        if None in codes:
+            field, values = REGION_NAME_FIELD, regions
+        else:
+            field, values = REGION_FIELD, codes
+        query[field] = {"$in": values} if len(values) > 1 else values[0]
+    if complex_name is not None:
+        query[complex_field] = ({"$in": list(complex_name)} if isinstance(complex_name, (list, tuple, set))
+                                else complex_name)
+    date_range = {}
+    if start is not None:
+        date_range["$gte"] = to_datetime(start)
+    if end is not None:
+        date_range["$lt"] = to_datetime(end)
+    if date_range:
+        query[CONTRACT_DATE_FIELD] = date_range
+    return query
+
+
+def find_transactions(collection, start=None, end=None, region=None, complex_name=None,
+                      complex_field: str = "complex_name", projection=None):
+    """기간·지역·단지로 거래 조회 (계약일 순)
+
+    예: find_transactions(db.apartment_transactions, "202301", "202401", region="11680")
+        find_transactions(db.apartment_transactions, "202301", "202401", region="서울특별시 강남구")
+        find_transactions(db.apartment_transactions, "2023-01-01", complex_name="래미안대치팰리스")
+    """
+    query = transaction_filter(start, end, region, complex_name, complex_field)
+    return collection.find(query, projection).sort(CONTRACT_DATE_FIELD, 1)
@@ -0,0 +1,101 @@
+# region_codes.py
+# 시군구 이름("서울특별시 강남구") ↔ 5자리 시군구 코드(법정동코드 앞 5자리, RTMS API의 LAWD_CD / sggCd)
+#
+# 기본 표는 수도권(서울/인천/경기)만 담고 있습니다. 행정안전부 "법정동코드 전체자료.txt"
+# (법정동코드<TAB>법정동명<TAB>폐지여부)를 REGION_CODE_FILE 경로에 두면 처음 조회할 때 전국 코드를 읽어 합칩니다.
+
+import os
+
+REGION_CODE_FILE = "법정동코드 전체자료.txt"
+
+# 시군구 코드 → 이름 (같은 이름에 코드가 여러 개면 앞의 것이 현재 코드)
+REGION_NAMES = {
+    # 서울특별시
+    "11110": "서울특별시 종로구", "11140": "서울특별시 중구", "11170": "서울특별시 용산구",
+    "11200": "서울특별시 성동구", "11215": "서울특별시 광진구", "11230": "서울특별시 동대문구",
+    "11260": "서울특별시 중랑구", "11290": "서울특별시 성북구", "11305": "서울특별시 강북구",
+    "11320": "서울특별시 도봉구", "11350": "서울특별시 노원구", "11380": "서울특별시 은평구",
+    "11410": "서울특별시 서대문구", "11440": "서울특별시 마포구", "11470": "서울특별시 양천구",
+    "11500": "서울특별시 강서구", "11530": "서울특별시 구로구", "11545": "서울특별시 금천구",
+    "11560": "서울특별시 영등포구", "11590": "서울특별시 동작구", "11620": "서울특별시 관악구",
+    "11650": "서울특별시 서초구", "11680": "서울특별시 강남구", "11710": "서울특별시 송파구",
+    "11740": "서울특별시 강동구",
+    # 인천광역시 (28170 남구 → 2018년 28177 미추홀구)
+    "28110": "인천광역시 중구", "28140": "인천광역시 동구", "28177": "인천광역시 미추홀구",
+    "28170": "인천광역시 남구", "28185": "인천광역시 연수구", "28200": "인천광역시 남동구",
+    "28237": "인천광역시 부평구", "28245": "인천광역시 계양구", "28260": "인천광역시 서구",
+    "28710": "인천광역시 강화군", "28720": "인천광역시 옹진군",
+    # 경기도 (부천시: 2016~2023년은 구 없이 41190, 2024년부터 41192/41194/41196)
+    "41111": "경기도 수원시 장안구", "41113": "경기도 수원시 권선구", "41115": "경기도 수원시 팔달구",
+    "41117": "경기도 수원시 영통구", "41131": "경기도 성남시 수정구", "41133": "경기도 성남시 중원구",
+    "41135": "경기도 성남시 분당구", "41150": "경기도 의정부시", "41171": "경기도 안양시 만안구",
+    "41173": "경기도 안양시 동안구", "41190": "경기도 부천시", "41192": "경기도 부천시 원미구",
+    "41194": "경기도 부천시 소사구", "41196": "경기도 부천시 오정구", "41195": "경기도 부천시 원미구",
+    "41197": "경기도 부천시 소사구", "41199": "경기도 부천시 오정구", "41210": "경기도 광명시",
+    "41220": "경기도 평택시", "41250": "경기도 동두천시", "41271": "경기도 안산시 상록구",
+    "41273": "경기도 안산시 단원구", "41281": "경기도 고양시 덕양구", "41285": "경기도 고양시 일산동구",
+    "41287": "경기도 고양시 일산서구", "41290": "경기도 과천시", "41310": "경기도 구리시",
+    "41360": "경기도 남양주시", "41370": "경기도 오산시", "41390": "경기도 시흥시",
+    "41410": "경기도 군포시", "41430": "경기도 의왕시", "41450": "경기도 하남시",
+    "41461": "경기도 용인시 처인구", "41463": "경기도 용인시 기흥구", "41465": "경기도 용인시 수지구",
+    "41480": "경기도 파주시", "41500": "경기도 이천시", "41550": "경기도 안성시",
+    "41570": "경기도 김포시", "41590": "경기도 화성시", "41610": "경기도 광주시",
+    "41630": "경기도 양주시", "41650": "경기도 포천시", "41670": "경기도 여주시",
+    "41800": "경기도 연천군", "41820": "경기도 가평군", "41830": "경기도 양평군",
+}
+
+# 이름 → 코드 (같은 이름이면 먼저 나온 현재 코드)
+REGION_CODES = {}
+for _code, _name in REGION_NAMES.items():
+    REGION_CODES.setdefault(_name, _code)
+
+_file_loaded = False
+
+
+def load_region_code_file(path: str = REGION_CODE_FILE) -> int:
+    """법정동코드 전체자료(탭 구분, cp949)에서 시군구 단위(읍면동 코드 00000) 행을 읽어 표에 합침. 읽은 코드 수 반환
+
+    폐지된 코드도 과거 거래를 위해 코드 → 이름에는 넣고, 이름 → 코드는 존재하는 코드를 우선합니다.
+    """
+    loaded = 0
+    with open(path, encoding="cp949") as f:
+        next(f, None)  # 헤더
+        for line in f:
+            parts = line.rstrip("\r\n").split("\t")
+            if len(parts) < 3:
+                continue
+            code, name, status = parts[0].strip(), parts[1].strip(), parts[2].strip()
+            if len(code) != 10 or code[5:] != "00000" or code[2:5] == "000":
+                continue  # 시도 / 읍면동 행
+            sgg_code = code[:5]
+            REGION_NAMES.setdefault(sgg_code, name)
+            if status == "존재":
+                REGION_CODES[name] = sgg_code
+            else:
+                REGION_CODES.setdefault(name, sgg_code)
+            loaded += 1
+    return loaded
+
+
+def _ensure_file_loaded():
+    global _file_loaded
+    if not _file_loaded:
+        _file_loaded = True
+        if os.path.exists(REGION_CODE_FILE):
+            load_region_code_file(REGION_CODE_FILE)
+
+
+def region_code(name):
+    """'서울특별시 강남구' → '11680' (표에 없으면 None)"""
+    if not name:
+        return None
+    _ensure_file_loaded()
+    return REGION_CODES.get(name)
+
+
+def region_name(code):
+    """'11680' → '서울특별시 강남구' (표에 없으면 None)"""
+    if not code:
+        return None
+    _ensure_file_loaded()
+    return REGION_NAMES.get(str(code))
@@ -1,4 +1,4 @@
-import sqlite3
+from price_store import open_price_store
 import pandas as pd
 import numpy as np
 
@@ -8,14 +8,10 @@ defensive_assets = ['LQD', 'IEF', 'SHY']  # 방어 자산
 
 # SQLite3에서 월말 종가 데이터를 불러오는 함수
 def load_monthly_data(symbols):
-    conn = sqlite3.connect('finance_stock.db')
-    query = f"""
-    SELECT symbol, date, close FROM stocks
-    WHERE symbol IN ({','.join('?' for _ in symbols)})
-    """
-    params = symbols
-    df = pd.read_sql_query(query, conn, params=params)
-    conn.close()
+    # 경로를 mongodb:// URI로 바꾸면 MongoDB 주가 컬렉션에서 같은 형태로 읽음
+    store = open_price_store('finance_stock.db')
+    df = store.read_bars(symbols, columns=['close'])
+    store.close()
     
     df['date'] = pd.to_datetime(df['date'])
     
@@ -0,0 +1,135 @@
+# symbol_resolver.py
+# 한국 6자리 종목코드 → yfinance 접미사(.KS 코스피 / .KQ 코스닥) 캐시
+
+import sqlite3
+import threading
+from datetime import datetime, timedelta
+
+RESOLVER_DB_PATH = "symbol_suffix.db"
+KOREAN_SUFFIXES = (".KS", ".KQ")
+NOT_FOUND_RETRY_DAYS = 7   # 두 접미사 모두 데이터가 없던 코드는 이 기간 동안 다시 확인하지 않음
+
+
+def is_korean_code(symbol: str) -> bool:
+    """접미사 없는 6자리 한국 종목코드인지 확인 (예: 005930, 0000D0)"""
+    return len(symbol) == 6 and symbol[:4].isdigit()
+
+
+class SymbolResolver:
+    """종목코드별 거래소 접미사를 SQLite 테이블에 저장해 두고 재사용
+
+    여러 스레드에서 함께 사용할 수 있습니다.
+    """
+
+    def __init__(self, db_path: str = RESOLVER_DB_PATH):
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock, self._conn:
+            self._conn.execute('''
+            CREATE TABLE IF NOT EXISTS symbol_suffix (
+                code TEXT PRIMARY KEY,
+                suffix TEXT,
+                checked_at TEXT
+            )
+            ''')
+
+    def close(self):
+        self._conn.close()
+
+    def lookup(self, code: str):
+        """캐시된 접미사 반환 (미확인이면 None, 최근에 두 접미사 모두 실패했으면 "")"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT suffix, checked_at FROM symbol_suffix WHERE code = ?", (code,)
+            ).fetchone()
+        if row is None:
+            return None
+
+        suffix, checked_at = row
+        if suffix:
+            return suffix
+        if datetime.fromisoformat(checked_at) < datetime.now() - timedelta(days=NOT_FOUND_RETRY_DAYS):
+            return None
+        return ""
+
+    def load_all(self) -> dict:
+        """캐시 전체를 {코드: 접미사} 로 반환 (최근에 두 접미사 모두 실패한 코드는 "", 기간이 지난 실패는 제외)"""
+        expires = (datetime.now() - timedelta(days=NOT_FOUND_RETRY_DAYS)).isoformat(timespec="seconds")
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT code, suffix FROM symbol_suffix WHERE suffix != '' OR checked_at >= ?", (expires,)
+            ).fetchall()
+        return dict(rows)
+
+    def save(self, code: str, suffix: str):
+        self.save_many([(code, suffix)])
+
+    def save_many(self, items):
+        checked_at = datetime.now().isoformat(timespec="seconds")
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO symbol_suffix (code, suffix, checked_at) VALUES (?, ?, ?)",
+                [(code, suffix, checked_at) for code, suffix in items],
+            )
+
+    def prefill(self, codes, probe, batch_size: int = 100) -> dict:
+        """캐시에 없는 코드를 묶음으로 확인해 한 번에 저장
+
+        probe(yahoo_symbols)는 데이터가 있는 심볼 집합을 반환해야 합니다.
+        .KS로 먼저 확인하고 나머지만 .KQ로 확인하므로, 요청 수는 코드 수가 아니라 묶음 수에 비례합니다.
+        하나도 찾지 못한 묶음은 차단/네트워크 문제일 수 있으므로, 그 묶음에 있던 코드는 없음으로 캐시하지 않습니다.
+        반환값은 이번에 확인한 {코드: 접미사} (두 시장 모두 없으면 "")
+        """
+        cached = self.load_all()
+        remaining = [code for code in dict.fromkeys(codes) if code not in cached]
+        resolved = {}
+        unconfirmed = set()   # 결과가 하나도 없던 묶음에 들어 있던 코드
+
+        for suffix in KOREAN_SUFFIXES:
+            if not remaining:
+                break
+            not_found = []
+            for i in range(0, len(remaining), batch_size):
+                chunk = remaining[i:i + batch_size]
+                found = probe([f"{code}{suffix}" for code in chunk])
+                hits = [(code, suffix) for code in chunk if f"{code}{suffix}" in found]
+                if not hits:
+                    unconfirmed.update(chunk)
+                self.save_many(hits)
+                resolved.update(hits)
+                not_found.extend(code for code in chunk if f"{code}{suffix}" not in found)
+            remaining = not_found
+
+        # .KS/.KQ 확인 때 모두 결과가 있던 묶음에서 빠진 코드만 없음으로 저장 (나머지는 다음 실행에서 다시 확인)
+        missing = [(code, "") for code in remaining if code not in unconfirmed]
+        self.save_many(missing)
+        resolved.update(missing)
+        return resolved
+
+    def fetch_with_suffix(self, code: str, fetch, remember_missing: bool = True):
+        """접미사를 붙여 fetch(yahoo_symbol)를 호출하고 (yahoo_symbol, 결과 DataFrame)를 반환
+
+        캐시된 접미사가 있으면 한 번만 요청하고, 없으면 .KS → .KQ 순서로 시도해
+        데이터가 나온 접미사를 저장합니다. 둘 다 비어 있으면 (None, 빈 결과)를 반환합니다.
+        증분 조회처럼 빈 결과가 "신규 데이터 없음"일 수 있으면 remember_missing=False로
+        호출해 실패를 캐시하지 않습니다.
+        """
+        suffix = self.lookup(code)
+        if suffix:
+            return f"{code}{suffix}", fetch(f"{code}{suffix}")
+        if suffix == "":
+            return None, None
+
+        data = None
+        for suffix in KOREAN_SUFFIXES:
+            try:
+                data = fetch(f"{code}{suffix}")
+            except Exception:
+                continue
+            if data is not None and not data.empty:
+                self.save(code, suffix)
+                return f"{code}{suffix}", data
+
+        if remember_missing:
+            self.save(code, "")
+        return None, data
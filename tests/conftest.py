@@ -0,0 +1,5 @@
+# 저장소 루트의 스크립트 모듈(rate_limit, real_estate_utils 등)을 테스트에서 import할 수 있도록 경로 추가
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
@@ -0,0 +1,43 @@
+# mongo_utils.dataframe_to_documents() 테스트 (yfinance history() DataFrame → MongoDB 문서)
+
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from mongo_utils import dataframe_to_documents
+
+
+def history_frame(**extra):
+    index = pd.DatetimeIndex(["2024-01-02", "2024-01-03"], name="Date")
+    return pd.DataFrame({"Open": [1.0, 2.0], "High": [1.5, 2.5], "Low": [0.5, 1.5], "Close": [1.2, 2.2],
+                         "Volume": [100, np.nan], **extra}, index=index)
+
+
+def test_dataframe_to_documents_converts_columns_to_plain_python_values():
+    documents = dataframe_to_documents("SPY", history_frame(Dividends=[0.0, 0.5]))
+
+    assert documents == [
+        {"symbol": "SPY", "date": datetime(2024, 1, 2), "open": 1.0, "high": 1.5, "low": 0.5, "close": 1.2,
+         "volume": 100, "dividends": 0.0},
+        {"symbol": "SPY", "date": datetime(2024, 1, 3), "open": 2.0, "high": 2.5, "low": 1.5, "close": 2.2,
+         "volume": 0, "dividends": 0.5},
+    ]
+    # BSON으로 바로 쓸 수 있도록 numpy 타입이 남지 않아야 함
+    assert type(documents[0]["volume"]) is int
+    assert type(documents[0]["close"]) is float
+
+
+def test_dataframe_to_documents_skips_rows_with_invalid_dates():
+    frame = history_frame().reset_index()
+    frame["Date"] = ["2024-01-02", "not a date"]
+
+    documents = dataframe_to_documents("SPY", frame)
+
+    assert [doc["date"] for doc in documents] == [datetime(2024, 1, 2)]
+    assert "stock_splits" not in documents[0]
+
+
+def test_dataframe_to_documents_returns_empty_list_for_missing_data():
+    assert dataframe_to_documents("SPY", None) == []
+    assert dataframe_to_documents("SPY", pd.DataFrame()) == []
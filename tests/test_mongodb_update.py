@@ -0,0 +1,133 @@
+# 02.mongodb_update.py 테스트 (배치 다운로드 분리 / DB 쓰기 실패 재시도 / 백필 체크포인트)
+# yf.download, ingest_state 기록, 체크포인트 기록은 가짜로 바꿔 MongoDB·네트워크 없이 실행
+
+import contextlib
+import importlib.util
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from rate_limit import EMPTY, ERROR, AdaptiveRateLimiter, FetchFailure, RetryQueue
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+@pytest.fixture(scope="module")
+def update(tmp_path_factory):
+    # import 시 현재 디렉터리에 symbol_suffix.db를 만들므로 임시 디렉터리에서 불러옴
+    with contextlib.chdir(tmp_path_factory.mktemp("update")):
+        spec = importlib.util.spec_from_file_location("mongodb_update", ROOT / "02.mongodb_update.py")
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+    yield module
+    module.suffix_resolver.close()
+
+
+@pytest.fixture
+def states(update, monkeypatch):
+    """record_ingest_result 대신 (심볼, 상태)를 기록"""
+    recorded = []
+    monkeypatch.setattr(update, "record_ingest_result",
+                        lambda db, collection_name, symbol, status, **kwargs: recorded.append((symbol, status)))
+    monkeypatch.setattr(update, "rate_limiter", AdaptiveRateLimiter(rate=1000, burst=1000))
+    return recorded
+
+
+class FakeCollection:
+    """insert_many만 흉내 내고, fail_symbols에 있는 심볼은 fail_times번 쓰기 오류"""
+
+    name = "us_stocks"
+    database = None
+
+    def __init__(self, fail_symbols=(), fail_times=1):
+        self.documents = []
+        self.failures_left = {symbol: fail_times for symbol in fail_symbols}
+
+    def insert_many(self, documents, ordered=True):
+        symbol = documents[0]["symbol"]
+        if self.failures_left.get(symbol):
+            self.failures_left[symbol] -= 1
+            raise ConnectionError("connection reset")
+        self.documents.extend(documents)
+
+
+def download_frame(symbols, dates=("2024-01-02", "2024-01-03")):
+    """yf.download(group_by="ticker") 형태의 MultiIndex DataFrame"""
+    fields = ["Open", "High", "Low", "Close", "Volume", "Dividends", "Stock Splits"]
+    columns = pd.MultiIndex.from_product([symbols, fields])
+    data = np.tile([1.0, 2.0, 0.5, 1.5, 100.0, np.nan, 0.0], (len(dates), len(symbols)))
+    return pd.DataFrame(data, index=pd.DatetimeIndex(dates, name="Date"), columns=columns)
+
+
+def test_split_download_frame_drops_union_rows_and_fills_actions(update):
+    df = download_frame(["SPY", "QQQ"], dates=("2024-01-02", "2024-01-03"))
+    df.loc["2024-01-03", "QQQ"] = np.nan   # QQQ만 없는 날짜
+
+    qqq = update.split_download_frame(df, "QQQ")
+
+    assert list(qqq.index) == [pd.Timestamp("2024-01-02")]
+    assert qqq["Dividends"].tolist() == [0.0]
+    assert update.split_download_frame(df, "IWM").empty
+
+
+def test_group_symbols_by_start_date_batches_symbols_with_the_same_start(update):
+    latest = {"SPY": "2024-01-02", "QQQ": "2024-01-02", "IWM": "2024-01-02", "DIA": "2999-01-01"}
+
+    batches = update.group_symbols_by_start_date(["SPY", "QQQ", "IWM", "DIA", "NEW"], latest, batch_size=2)
+
+    assert batches == [("2024-01-03", ["SPY", "QQQ"]), ("2024-01-03", ["IWM"]), ("1900-01-01", ["NEW"])]
+
+
+def test_fetch_and_insert_batch_returns_failure_for_db_write_errors(update, states, monkeypatch):
+    monkeypatch.setattr(update.yf, "download", lambda symbols, **kwargs: download_frame(["SPY", "QQQ"]))
+    collection = FakeCollection(fail_symbols=["QQQ"])
+
+    failure = update.fetch_and_insert_batch(["SPY", "QQQ", "IWM"], "2024-01-02", collection)
+
+    assert failure.kind == ERROR and "QQQ" in failure.message
+    assert {doc["symbol"] for doc in collection.documents} == {"SPY"}
+    assert states == [("SPY", "ok"), ("QQQ", "db_error"), ("IWM", EMPTY)]
+
+
+def test_batches_with_db_write_errors_are_retried_until_stored(update, states, monkeypatch):
+    monkeypatch.setattr(update.yf, "download", lambda symbols, **kwargs: download_frame(symbols))
+    collection = FakeCollection(fail_symbols=["QQQ"])
+    retry_queue = RetryQueue(base_delay=0.0)
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        update.run_jobs_with_retries(executor, [("batch", update.fetch_and_insert_batch,
+                                                 (["SPY", "QQQ"], "2024-01-02", collection))], retry_queue)
+
+    assert retry_queue.attempts == {"batch": 1}
+    assert retry_queue.permanent_failures == {}
+    assert sum(doc["symbol"] == "QQQ" for doc in collection.documents) == 2
+    assert ("QQQ", "ok") in states
+
+
+def test_backfill_symbol_moves_checkpoint_to_done_or_failed(update, monkeypatch):
+    checkpoints = []
+    monkeypatch.setattr(update, "update_checkpoint",
+                        lambda db, job_id, collection_name, symbol, status, owner=None, error=None:
+                        checkpoints.append((symbol, status, error)))
+    results = {"SPY": None, "QQQ": FetchFailure(ERROR, "timeout")}
+    monkeypatch.setattr(update, "fetch_and_insert_ticker", lambda symbol, collection, latest: results[symbol])
+
+    assert update.backfill_symbol("SPY", FakeCollection(), {}, "job", "host:1") is None
+    assert update.backfill_symbol("QQQ", FakeCollection(), {}, "job", "host:1") == results["QQQ"]
+
+    assert checkpoints == [
+        ("SPY", update.CHECKPOINT_IN_PROGRESS, None), ("SPY", update.CHECKPOINT_DONE, None),
+        ("QQQ", update.CHECKPOINT_IN_PROGRESS, None), ("QQQ", update.CHECKPOINT_FAILED, "error: timeout"),
+    ]
+
+
+def test_symbol_shard_is_stable_and_covers_every_shard(update):
+    symbols = [f"SYM{i}" for i in range(200)]
+    shards = [update.symbol_shard(symbol, 4) for symbol in symbols]
+
+    assert shards == [update.symbol_shard(symbol, 4) for symbol in symbols]
+    assert set(shards) == {0, 1, 2, 3}
+    assert update.symbol_shard("SPY", 1) == 0
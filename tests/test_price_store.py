@@ -0,0 +1,72 @@
+# price_store.py 테스트 (SQLitePriceStore 읽기/쓰기, 인터페이스)
+
+import sqlite3
+
+import pandas as pd
+import pytest
+
+from price_store import BAR_COLUMNS, PriceStore, SQLitePriceStore, bar_columns, open_price_store
+
+
+def history(dates, closes):
+    index = pd.DatetimeIndex(dates, name="Date")
+    return pd.DataFrame({"Open": closes, "High": closes, "Low": closes, "Close": closes,
+                         "Volume": [100] * len(dates), "Dividends": [0.0] * len(dates)}, index=index)
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = SQLitePriceStore(str(tmp_path / "finance_stock.db"))
+    yield store
+    store.close()
+
+
+def test_price_store_is_abstract():
+    with pytest.raises(TypeError):
+        PriceStore()
+
+
+def test_open_price_store_picks_sqlite_for_file_paths(tmp_path):
+    store = open_price_store(str(tmp_path / "stock.db"))
+    assert isinstance(store, SQLitePriceStore) and store.table == "stocks"
+    store.close()
+
+
+def test_reading_an_empty_database_does_not_create_the_table(store, tmp_path):
+    assert store.symbols() == []
+    assert store.latest_dates(["SPY"]) == {}
+    assert list(store.read_bars(["SPY"]).columns) == BAR_COLUMNS
+
+    connection = sqlite3.connect(str(tmp_path / "finance_stock.db"))
+    assert connection.execute("SELECT name FROM sqlite_master").fetchall() == []
+    connection.close()
+
+
+def test_write_bars_skips_dates_already_stored(store):
+    assert store.write_bars("SPY", history(["2024-01-02", "2024-01-03"], [1.0, 2.0])) == 2
+    assert store.write_bars("SPY", history(["2024-01-03", "2024-01-04"], [2.0, 3.0])) == 1
+    assert store.write_many([("QQQ", history(["2024-01-02"], [5.0])), ("IWM", None)]) == {"QQQ": 1, "IWM": 0}
+
+    assert store.symbols() == ["QQQ", "SPY"]
+    assert store.latest_dates(["SPY", "QQQ", "IWM"]) == {"SPY": "2024-01-04", "QQQ": "2024-01-02"}
+
+
+def test_read_bars_filters_dates_and_selects_columns(store):
+    store.write_many([("SPY", history(["2024-01-02", "2024-01-03", "2024-01-04"], [1.0, 2.0, 3.0])),
+                      ("QQQ", history(["2024-01-03"], [5.0]))])
+
+    bars = store.read_bars(["SPY", "QQQ"], start="2024-01-03", end="2024-01-04", columns=["close"])
+
+    assert list(bars.columns) == ["symbol", "date", "close"]
+    assert bars.values.tolist() == [
+        ["QQQ", pd.Timestamp("2024-01-03"), 5.0],
+        ["SPY", pd.Timestamp("2024-01-03"), 2.0],
+        ["SPY", pd.Timestamp("2024-01-04"), 3.0],
+    ]
+
+
+def test_bar_columns_always_include_keys_and_reject_unknown_names():
+    assert bar_columns() == BAR_COLUMNS
+    assert bar_columns(["close", "date", "close"]) == ["symbol", "date", "close"]
+    with pytest.raises(ValueError):
+        bar_columns(["close; DROP TABLE stocks"])
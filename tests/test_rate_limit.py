@@ -0,0 +1,82 @@
+# rate_limit.py 테스트 (classify_error / AdaptiveRateLimiter / RetryQueue)
+
+import pytest
+
+from rate_limit import EMPTY, ERROR, THROTTLED, AdaptiveRateLimiter, FetchFailure, RetryQueue, classify_error
+
+
+class YFRateLimitError(Exception):
+    pass
+
+
+class HTTPError(Exception):
+    def __init__(self, status_code):
+        super().__init__(f"HTTP {status_code}")
+        self.response = type("Response", (), {"status_code": status_code})()
+
+
+def test_classify_error_uses_exception_type_and_status_code():
+    assert classify_error(YFRateLimitError("Too Many Requests")) == THROTTLED
+    assert classify_error(HTTPError(429)) == THROTTLED
+    assert classify_error(HTTPError(500)) == ERROR
+    # 심볼/URL에 429가 들어 있어도 메시지로는 판단하지 않음
+    assert classify_error(ValueError("no data for 429000.KS")) == ERROR
+
+
+def test_classify_error_follows_the_cause_chain():
+    try:
+        try:
+            raise HTTPError(429)
+        except HTTPError as e:
+            raise RuntimeError("download failed") from e
+    except RuntimeError as e:
+        assert classify_error(e) == THROTTLED
+
+
+def test_rate_limiter_increases_on_success_and_halves_on_throttle_once_per_cooldown():
+    limiter = AdaptiveRateLimiter(rate=4.0, max_rate=4.1, increase_step=0.05, cooldown=60)
+
+    limiter.on_success()
+    limiter.on_success()
+    assert limiter.rate == pytest.approx(4.1)   # max_rate에서 멈춤
+
+    limiter.on_throttle()
+    limiter.on_throttle()   # cooldown 안의 두 번째 429는 무시
+    assert limiter.rate == pytest.approx(2.05)
+
+
+def test_rate_limiter_treats_consecutive_empty_responses_as_throttling():
+    limiter = AdaptiveRateLimiter(rate=4.0, empty_threshold=3, cooldown=0)
+
+    limiter.on_empty()
+    limiter.on_empty()
+    limiter.on_success()   # 연속이 끊기면 다시 셈
+    limiter.on_empty()
+    limiter.on_empty()
+    assert limiter.rate == pytest.approx(4.05)
+
+    limiter.on_empty()
+    assert limiter.rate == pytest.approx(2.025)
+
+
+def test_retry_queue_backs_off_then_gives_up_per_failure_kind():
+    queue = RetryQueue(max_attempts=3, empty_max_attempts=1, base_delay=0.0)
+
+    assert queue.push("SPY", "job", FetchFailure(THROTTLED, "429"))
+    assert queue.pop_ready() == [("SPY", "job")]
+    assert queue.push("SPY", "job", FetchFailure(ERROR, "timeout"))
+    assert queue.pop_ready() == [("SPY", "job")]
+    assert not queue.push("SPY", "job", FetchFailure(ERROR, "timeout"))
+    assert queue.permanent_failures == {"SPY": FetchFailure(ERROR, "timeout")}
+
+    # 빈 응답은 더 빨리 포기
+    assert not queue.push("XXXX", "job", FetchFailure(EMPTY, "no data"))
+    assert set(queue.permanent_failures) == {"SPY", "XXXX"}
+    assert len(queue) == 0 and queue.next_ready_in() is None
+
+
+def test_retry_queue_backoff_grows_exponentially_with_jitter_and_cap():
+    queue = RetryQueue(base_delay=2.0, max_delay=10.0)
+
+    for attempts, delay in [(1, 2.0), (2, 4.0), (3, 8.0), (4, 10.0), (8, 10.0)]:
+        assert delay / 2 <= queue.backoff(attempts) <= delay
@@ -0,0 +1,74 @@
+# real_estate_sqlite.py 테스트 (CSV → 스테이징 DB → 본 DB 병합 / 중복 제거)
+
+import sqlite3
+
+from real_estate_sqlite import build_row_picker, load_csv_files, table_columns, unique_index_name
+
+HEADER = "NO,시군구,단지명,전용면적(㎡),계약년월,계약일,거래금액(만원),층"
+
+
+def write_csv(path, *rows, encoding="cp949"):
+    # 국토교통부 CSV처럼 앞부분 안내문 + "NO" 헤더
+    path.write_text("\n".join(["□ 본 서비스에서 제공하는 정보는 참고용입니다.", HEADER, *rows]) + "\n", encoding=encoding)
+    return str(path)
+
+
+def read_rows(db_path, table="sale"):
+    connection = sqlite3.connect(db_path)
+    try:
+        return connection.execute(f"SELECT 단지명, 계약일, 거래금액 FROM {table} ORDER BY 단지명, 계약일").fetchall()
+    finally:
+        connection.close()
+
+
+def test_row_picker_orders_columns_and_fills_missing_ones():
+    header = ["NO", "단지명", "월세(만원)", "보증금(만원)"]
+    column_map = {"단지명": "단지명", "보증금(만원)": "보증금", "월세금(만원)": "월세금", "월세(만원)": "월세금",
+                  "층": "층"}
+
+    pick = build_row_picker(header, column_map, ["보증금", "월세금", "단지명", "층"])
+
+    assert pick(["1", " 은마 ", "100", "5,000"]) == ("5,000", "100", "은마", "")
+    assert pick(["1", "은마"]) == ("", "", "은마", "")   # 짧은 행은 빈 값으로 채움
+
+
+def test_first_load_builds_indexes_after_merging_and_removes_cross_file_duplicates(tmp_path):
+    db_path = str(tmp_path / "real_estate.db")
+    files = [
+        write_csv(tmp_path / "a.csv", '1,서울특별시 강남구 대치동,은마,76.79,202001,10,"200,000",5',
+                  '2,서울특별시 강남구 대치동,은마,76.79,202001,11,"201,000",7'),
+        # 같은 행이 다른 파일(UTF-8)에도 있음
+        write_csv(tmp_path / "b.csv", '1,서울특별시 강남구 대치동,은마,76.79,202001,10,"200,000",5',
+                  '2,서울특별시 강남구 개포동,개포자이,84.97,202001,12,"215,000",3', encoding="utf-8"),
+    ]
+
+    failed = load_csv_files(files, "sale", db_path, processes=2)
+
+    assert failed == []
+    assert read_rows(db_path) == [("개포자이", "12", "215,000"), ("은마", "10", "200,000"), ("은마", "11", "201,000")]
+    connection = sqlite3.connect(db_path)
+    indexes = {row[0] for row in connection.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+    connection.close()
+    assert {unique_index_name("sale"), "sale_시군구_계약년월", "sale_단지명_계약년월"} <= indexes
+    # 실행마다 만든 스테이징 디렉터리는 지워짐
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["a.csv", "b.csv", "real_estate.db"]
+
+
+def test_reload_skips_existing_rows_and_reports_failed_files(tmp_path):
+    db_path = str(tmp_path / "real_estate.db")
+    first = write_csv(tmp_path / "a.csv", '1,서울특별시 강남구 대치동,은마,76.79,202001,10,"200,000",5')
+    load_csv_files([first], "sale", db_path, processes=1)
+
+    second = write_csv(tmp_path / "b.csv", '1,서울특별시 강남구 대치동,은마,76.79,202001,10,"200,000",5',
+                       '2,서울특별시 강남구 대치동,은마,76.79,202002,3,"205,000",9')
+    broken = tmp_path / "broken.csv"
+    broken.write_text("헤더 없는 파일\n", encoding="utf-8")
+
+    failed = load_csv_files([second, str(broken)], "sale", db_path, processes=2)
+
+    assert failed == [str(broken)]
+    assert read_rows(db_path) == [("은마", "10", "200,000"), ("은마", "3", "205,000")]
+
+
+def test_rent_table_maps_old_and_new_monthly_rent_headers_to_one_column():
+    assert table_columns("rent").count("월세금") == 1
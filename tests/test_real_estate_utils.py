@@ -0,0 +1,106 @@
+# real_estate_utils.py 테스트 (거래 지문 / bulk_write 작업 / 파생 필드와 조회 필터)
+
+from datetime import datetime, timezone
+
+from pymongo import InsertOne, UpdateOne
+
+from real_estate_utils import (CONTRACT_DATE_FIELD, FINGERPRINT_FIELD, PRICE_PER_M2_FIELD, REGION_FIELD,
+                               REGION_NAME_FIELD, SALE_KEY_FIELDS, UPDATED_AT_FIELD, derived_fields,
+                               region_from_sigungu, rent_operation, sale_operation, transaction_filter,
+                               transaction_fingerprint)
+
+NOW = datetime(2024, 6, 1, tzinfo=timezone.utc)
+
+
+def sale_doc(**overrides):
+    doc = {"sigungu": "서울특별시 강남구 대치동", "complex_name": "은마", "exclusive_area": 76.79,
+           "contract_year_month": "202401", "contract_day": "15", "transaction_amount": 200000, "floor": 5,
+           "cancellation_date": ""}
+    doc.update(overrides)
+    doc[FINGERPRINT_FIELD] = transaction_fingerprint(doc, SALE_KEY_FIELDS)
+    return doc
+
+
+def test_fingerprint_ignores_formatting_differences():
+    fields = ["complex_name", "exclusive_area", "floor"]
+    base = transaction_fingerprint({"complex_name": "은마", "exclusive_area": 84, "floor": None}, fields)
+
+    assert transaction_fingerprint({"complex_name": " 은마 ", "exclusive_area": 84.0, "floor": ""}, fields) == base
+    assert transaction_fingerprint({"complex_name": "은마", "exclusive_area": 84.5, "floor": None}, fields) != base
+    # 값이 다른 필드로 옮겨 가면 다른 거래
+    assert transaction_fingerprint({"complex_name": "", "exclusive_area": 84, "floor": "은마"}, fields) != base
+
+
+def test_fingerprint_does_not_depend_on_cancellation_date():
+    assert "cancellation_date" not in SALE_KEY_FIELDS
+    assert sale_doc()[FINGERPRINT_FIELD] == sale_doc(cancellation_date="24.02.01")[FINGERPRINT_FIELD]
+
+
+def test_sale_operation_inserts_transactions_without_cancellation():
+    doc = sale_doc()
+
+    assert sale_operation(doc, NOW) == InsertOne(doc)
+    assert doc[UPDATED_AT_FIELD] == NOW
+
+
+def test_sale_operation_upserts_cancellation_onto_existing_transaction():
+    doc = sale_doc(cancellation_date="24.02.01")
+    fingerprint = doc[FINGERPRINT_FIELD]
+
+    operation = sale_operation(doc, NOW)
+
+    # 같은 해제사유발생일이 이미 있으면 필터가 맞지 않아 upsert가 유니크 인덱스 중복으로 스킵됨
+    insert_fields = {k: v for k, v in doc.items()
+                     if k not in (FINGERPRINT_FIELD, "cancellation_date", UPDATED_AT_FIELD)}
+    assert operation == UpdateOne(
+        {FINGERPRINT_FIELD: fingerprint, "cancellation_date": {"$ne": "24.02.01"}},
+        {"$set": {"cancellation_date": "24.02.01", UPDATED_AT_FIELD: NOW}, "$setOnInsert": insert_fields},
+        upsert=True,
+    )
+    assert "complex_name" in insert_fields and "transaction_amount" in insert_fields
+
+
+def test_rent_operation_stamps_updated_at():
+    doc = {"complex_name": "은마", "deposit": 50000}
+
+    assert rent_operation(doc, NOW) == InsertOne({"complex_name": "은마", "deposit": 50000, UPDATED_AT_FIELD: NOW})
+
+
+def test_region_from_sigungu_keeps_sido_and_district_units():
+    assert region_from_sigungu("서울특별시 강남구 대치동") == "서울특별시 강남구"
+    assert region_from_sigungu("경기도 성남시 분당구 정자동") == "경기도 성남시 분당구"
+    assert region_from_sigungu("경기도 양평군 양평읍 양근리") == "경기도 양평군"
+    assert region_from_sigungu("  ") is None
+
+
+def test_derived_fields_store_the_same_region_code_as_the_api():
+    fields = derived_fields(sale_doc(sigungu="경기도 성남시 분당구 정자동", exclusive_area=100.0), "transaction_amount")
+
+    assert fields == {
+        CONTRACT_DATE_FIELD: datetime(2024, 1, 15),
+        PRICE_PER_M2_FIELD: 2000.0,
+        REGION_FIELD: "41135",
+        REGION_NAME_FIELD: "경기도 성남시 분당구",
+    }
+
+
+def test_derived_fields_keep_the_name_when_the_code_is_unknown():
+    fields = derived_fields(sale_doc(sigungu="없는도 없는시 어딘가동", contract_day="", transaction_amount=""),
+                            "transaction_amount")
+
+    assert fields == {CONTRACT_DATE_FIELD: None, PRICE_PER_M2_FIELD: None,
+                      REGION_FIELD: None, REGION_NAME_FIELD: "없는도 없는시"}
+
+
+def test_transaction_filter_accepts_region_codes_or_names():
+    assert transaction_filter(region="서울특별시 강남구") == {REGION_FIELD: "11680"}
+    assert transaction_filter(region=["11680", "서울특별시 서초구"]) == {REGION_FIELD: {"$in": ["11680", "11650"]}}
+    # 코드 표에 없는 이름이 있으면 이름으로 찾음
+    assert transaction_filter(region="없는도 없는시") == {REGION_NAME_FIELD: "없는도 없는시"}
+
+
+def test_transaction_filter_builds_half_open_date_range():
+    assert transaction_filter("202401", "2024-02-01", complex_name=["은마", "개포자이"]) == {
+        "complex_name": {"$in": ["은마", "개포자이"]},
+        CONTRACT_DATE_FIELD: {"$gte": datetime(2024, 1, 1), "$lt": datetime(2024, 2, 1)},
+    }
@@ -0,0 +1,140 @@
+# 01.mongodb_realEstage.py crawl() 테스트
+# 녹화해 둔 RTMS XML 응답을 로컬 http.server로 내려주고 페이지 분할 / 일일 한도 중단 / 페이지 해시 건너뛰기를 확인
+
+import importlib.util
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+FIXTURES = Path(__file__).resolve().parent / "fixtures" / "rtms"
+
+QUOTA_LAWD_CD = "99999"  # 이 지역 코드로 요청하면 한도 초과(코드 22) 응답
+
+
+def load_module():
+    # 파일 이름이 숫자로 시작하므로 경로로 불러옴 (MongoClient는 연결을 미루므로 서버 없이 import 가능)
+    spec = importlib.util.spec_from_file_location("mongodb_realestage", ROOT / "01.mongodb_realEstage.py")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+realestage = load_module()
+
+
+class RecordedRTMS(BaseHTTPRequestHandler):
+    """pageNo별로 녹화된 XML을 돌려주고 받은 요청을 기록"""
+
+    pages = {}
+    requests = []
+
+    def do_GET(self):
+        query = parse_qs(urlparse(self.path).query)
+        lawd_cd, page_no = query["LAWD_CD"][0], int(query["pageNo"][0])
+        self.requests.append((lawd_cd, query["DEAL_YMD"][0], page_no))
+
+        body = (FIXTURES / "quota_exceeded.xml").read_bytes() if lawd_cd == QUOTA_LAWD_CD else self.pages[page_no]
+        self.send_response(200)
+        self.send_header("Content-Type", "text/xml;charset=UTF-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class FakeStateCollection:
+    """SyncState가 쓰는 find / update_one만 흉내 낸 상태 컬렉션"""
+
+    def __init__(self):
+        self.docs = {}
+
+    def find(self, query):
+        return [doc for _id, doc in self.docs.items() if _id in query["_id"]["$in"]]
+
+    def update_one(self, query, update, upsert=False):
+        self.docs.setdefault(query["_id"], {"_id": query["_id"]}).update(update["$set"])
+
+
+@pytest.fixture
+def server(tmp_path, monkeypatch):
+    # 일일 한도 사용량 파일(rtms_quota.json)은 임시 디렉터리에 기록
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(RecordedRTMS, "pages", {1: (FIXTURES / "page1.xml").read_bytes(),
+                                                2: (FIXTURES / "page2.xml").read_bytes()})
+    monkeypatch.setattr(RecordedRTMS, "requests", [])
+
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), RecordedRTMS)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}/rtms?"
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def crawl(base_url, saved, gu_codes=("11680",), **kwargs):
+    return realestage.crawl(list(gu_codes), ["202001"], "test-key", workers=2, num_of_rows=2,
+                            save=saved.extend, base_url=base_url, **kwargs)
+
+
+def test_crawl_fetches_remaining_pages_from_total_count(server):
+    saved = []
+    unfinished = crawl(server, saved)
+
+    assert unfinished == []
+    assert sorted(page for _, _, page in RecordedRTMS.requests) == [1, 2]
+    assert sorted(doc["aptNm"] for doc in saved) == ["개포자이", "래미안대치팰리스", "은마"]
+
+    # 타입 변환 / 파생 필드
+    first = next(doc for doc in saved if doc["aptNm"] == "래미안대치팰리스")
+    assert first["dealAmount"] == 265000
+    assert first["excluUseAr"] == 84.97
+    assert first["region"] == "11680"
+
+
+def test_crawl_stops_when_server_reports_quota_exceeded(server):
+    saved = []
+    unfinished = crawl(server, saved, gu_codes=(QUOTA_LAWD_CD,), daily_quota=100)
+
+    assert unfinished == [(QUOTA_LAWD_CD, "202001")]
+    assert saved == []
+    # 코드 22는 재시도하지 않고, 남은 한도를 0으로 저장
+    assert len(RecordedRTMS.requests) == 1
+    assert json.loads(Path(realestage.QUOTA_FILE).read_text(encoding="utf-8"))["used"] == 100
+
+
+def test_crawl_refuses_requests_once_daily_quota_is_used(server):
+    saved = []
+    unfinished = crawl(server, saved, daily_quota=1)
+
+    # 1페이지만 받고 2페이지는 한도 때문에 요청하지 않음
+    assert unfinished == [("11680", "202001")]
+    assert [page for _, _, page in RecordedRTMS.requests] == [1]
+    assert len(saved) == 2
+
+
+def test_sync_state_skips_pages_with_unchanged_hash(server, monkeypatch):
+    state = realestage.SyncState(FakeStateCollection())
+
+    first = []
+    assert crawl(server, first, sync_state=state) == []
+    assert len(first) == 3
+    assert len(state.collection.docs["11680-202001"]["page_hashes"]) == 2
+
+    # 같은 응답이면 저장하지 않음
+    second = []
+    assert crawl(server, second, sync_state=state) == []
+    assert second == []
+
+    # 2페이지만 바뀌면 2페이지만 저장
+    changed = RecordedRTMS.pages[2].replace(b"<dealAmount>215,000</dealAmount>", b"<dealAmount>216,000</dealAmount>")
+    monkeypatch.setitem(RecordedRTMS.pages, 2, changed)
+    third = []
+    assert crawl(server, third, sync_state=state) == []
+    assert [(doc["aptNm"], doc["dealAmount"]) for doc in third] == [("개포자이", 216000)]
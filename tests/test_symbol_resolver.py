@@ -0,0 +1,86 @@
+# symbol_resolver.SymbolResolver 테스트 (yfinance 대신 가짜 probe 사용)
+
+import pytest
+
+from symbol_resolver import SymbolResolver, is_korean_code
+
+KOSPI = {"005930", "000660"}
+KOSDAQ = {"035720", "091990"}
+
+
+class FakeProbe:
+    """요청받은 심볼 중 데이터가 있는 것만 돌려주고, 요청 묶음을 기록"""
+
+    def __init__(self, blocked_suffixes=()):
+        self.blocked_suffixes = blocked_suffixes
+        self.calls = []
+
+    def __call__(self, yahoo_symbols):
+        self.calls.append(list(yahoo_symbols))
+        found = set()
+        for symbol in yahoo_symbols:
+            code, suffix = symbol.split(".")
+            if f".{suffix}" in self.blocked_suffixes:
+                continue
+            if (suffix == "KS" and code in KOSPI) or (suffix == "KQ" and code in KOSDAQ):
+                found.add(symbol)
+        return found
+
+
+@pytest.fixture
+def resolver(tmp_path):
+    resolver = SymbolResolver(str(tmp_path / "symbol_suffix.db"))
+    yield resolver
+    resolver.close()
+
+
+def test_is_korean_code():
+    assert is_korean_code("005930")
+    assert is_korean_code("0000D0")
+    assert not is_korean_code("SPY")
+    assert not is_korean_code("005930.KS")
+
+
+def test_prefill_checks_ks_first_then_only_the_rest_as_kq(resolver):
+    probe = FakeProbe()
+
+    resolved = resolver.prefill(["005930", "035720", "000660", "999999", "005930"], probe, batch_size=10)
+
+    assert resolved == {"005930": ".KS", "000660": ".KS", "035720": ".KQ", "999999": ""}
+    assert probe.calls == [["005930.KS", "035720.KS", "000660.KS", "999999.KS"], ["035720.KQ", "999999.KQ"]]
+    assert resolver.load_all() == resolved
+
+    # 캐시된 코드는 다시 묻지 않음
+    probe.calls.clear()
+    assert resolver.prefill(["005930", "999999"], probe) == {}
+    assert probe.calls == []
+
+
+def test_prefill_does_not_cache_misses_when_nothing_was_found(resolver):
+    probe = FakeProbe(blocked_suffixes=(".KS", ".KQ"))
+
+    assert resolver.prefill(["005930", "035720"], probe) == {}
+    assert resolver.load_all() == {}
+
+
+def test_prefill_does_not_cache_misses_from_blocked_kq_batches(resolver):
+    # .KS는 응답하지만 .KQ는 차단된 상황: 코스닥 종목을 "없음"으로 캐시하면 안 됨
+    probe = FakeProbe(blocked_suffixes=(".KQ",))
+
+    resolved = resolver.prefill(["005930", "035720", "091990"], probe, batch_size=10)
+
+    assert resolved == {"005930": ".KS"}
+    assert resolver.lookup("035720") is None
+    assert resolver.lookup("091990") is None
+
+
+def test_prefill_guards_each_batch_separately(resolver):
+    # .KS 묶음 [005930, 999999]와 .KQ 묶음 [999999, 035720]은 결과가 있으므로 999999는 없음으로 저장,
+    # 999998은 .KS / .KQ 묶음 모두 결과가 없었으므로 다음 실행에서 다시 확인
+    probe = FakeProbe()
+
+    resolved = resolver.prefill(["005930", "999999", "035720", "999998"], probe, batch_size=2)
+
+    assert resolved == {"005930": ".KS", "035720": ".KQ", "999999": ""}
+    assert resolver.lookup("999999") == ""
+    assert resolver.lookup("999998") is None
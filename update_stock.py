@@ -3,7 +3,9 @@ import sqlite3
 import yfinance as yf
 from datetime import datetime, timedelta
 import time
+from itertools import repeat
 from curl_cffi import requests
+from price_store import ensure_sqlite_symbol_date_index
 
 # 세션 생성 및 User-Agent 설정
 headers = {'user-agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/136.0.0.0 Safari/537.36'}
@@ -28,6 +30,12 @@ CREATE TABLE IF NOT EXISTS stocks (
 )
 ''')
 
+# WAL 모드: 쓰기 중에도 읽기가 막히지 않고 커밋 비용이 줄어듦
+cursor.execute("PRAGMA journal_mode=WAL")
+
+# (symbol, date) 유니크 인덱스 - 중복 확인을 전체 테이블 스캔 대신 인덱스로 처리 (price_store와 공유)
+ensure_sqlite_symbol_date_index(conn)
+
 
 # 현재 날짜와 어제 날짜 계산
 today = datetime.now().date()
@@ -48,38 +56,30 @@ def fetch_stock_data(symbol, start_date):
     hist = stock.history(start=start_date, end=today)
     return hist
 
-# 주식 데이터를 테이블에 삽입하는 함수
+# 주식 데이터를 테이블에 삽입하는 함수 (이미 있는 (symbol, date)는 건너뜀)
 def insert_stock_data(symbol, data):
-    for idx, row in data.iterrows():
-        date = idx.date()
-        
-        # 중복이 없을 때만 INSERT
-        cursor.execute('''
+    if data.empty:
+        return 0
+
+    rows = list(zip(
+        repeat(symbol),
+        [idx.strftime("%Y-%m-%d") for idx in data.index],
+        data['Open'].tolist(), data['High'].tolist(), data['Low'].tolist(), data['Close'].tolist(),
+        data['Volume'].tolist(), data['Dividends'].tolist(), data['Stock Splits'].tolist(),
+    ))
+
+    # 심볼 하나를 한 트랜잭션 + executemany로 일괄 삽입 (중복 확인은 유니크 인덱스가 처리)
+    with conn:
+        before = conn.total_changes
+        cursor.executemany('''
         INSERT INTO stocks (symbol, date, open, high, low, close, volume, dividends, stock_splits)
         VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-        ''', (symbol, date, row['Open'], row['High'], row['Low'], row['Close'], row['Volume'], row['Dividends'], row['Stock Splits']))
-        #print(f"{symbol} {date} 데이터가 업데이트 되었습니다.")
-        
-# 주식 데이터를 테이블에 삽입하는 함수
-def insert_stock_data1(symbol, data):
-    for idx, row in data.iterrows():
-        date = idx.date()
-        # 중복 여부 확인 쿼리
-        cursor.execute('''
-        SELECT COUNT(*) FROM stocks WHERE symbol = ? AND date = ?
-        ''', (symbol, date))
-        count = cursor.fetchone()[0]
-
-        if count == 0:
-            # 중복이 없을 때만 INSERT
-            cursor.execute('''
-            INSERT INTO stocks (symbol, date, open, high, low, close, volume, dividends, stock_splits)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (symbol, date, row['Open'], row['High'], row['Low'], row['Close'], row['Volume'], row['Dividends'], row['Stock Splits']))
-            #print(f"{symbol} {date} 데이터가 업데이트 되었습니다.")
-        else:
-            print(f"{symbol} {date} 데이터가 이미 존재합니다. 업데이트되지 않았습니다.")
+        ON CONFLICT(symbol, date) DO NOTHING
+        ''', rows)
+        inserted = conn.total_changes - before
 
+    print(f"{symbol} {inserted}건 삽입, {len(rows) - inserted}건 중복")
+    return inserted
 
 # 업데이트 함수
 def update_stock_data(symbol):
@@ -101,7 +101,7 @@ def update_stock_data(symbol):
         stock_data = fetch_stock_data(symbol, start_date)
         
         # 데이터를 DB에 삽입
-        insert_stock_data1(symbol, stock_data)
+        insert_stock_data(symbol, stock_data)
         
     else:
         print("DB가 이미 최신 상태입니다.")
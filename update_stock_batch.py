@@ -0,0 +1,177 @@
+# -*- coding:utf-8 -*-
+# update_stock_batch.py
+# 여러 심볼을 한 프로세스에서 업데이트하는 주가 저장소(SQLite stocks / MongoDB) 일괄 업데이트 스크립트
+# (update_stock.py / update_stock.KR.py 를 심볼마다 따로 실행하지 않도록)
+#
+# 사용법:
+#   python update_stock_batch.py --symbols-file symbols.txt   # 파일의 심볼 목록 (한 줄에 하나, # 주석 허용)
+#   python update_stock_batch.py --db stocks.db               # DB에 이미 있는 심볼 전체
+#   python update_stock_batch.py --db mongodb://localhost:27017/ --collection us_stocks   # MongoDB에 저장
+#   6자리 한국 종목코드는 .KS/.KQ 접미사를 자동으로 찾아 symbol_suffix.db에 캐시합니다.
+
+import argparse
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timedelta
+
+import yfinance as yf
+from curl_cffi import requests
+
+from price_store import PriceStore, open_price_store
+from symbol_resolver import SymbolResolver, is_korean_code
+
+# =========================================================
+# 1️⃣ 환경 설정
+# =========================================================
+DB_PATH = "stocks.db"        # SQLite 파일 경로 또는 mongodb:// URI
+MAX_WORKERS = 8              # 동시 다운로드 스레드 수
+WRITER_QUEUE_SIZE = 64       # 다운로드 → SQLite 쓰기 대기열 최대 길이 (심볼 단위)
+WRITER_COMMIT_SYMBOLS = 20   # 한 트랜잭션으로 묶을 최대 심볼 수
+
+# 세션 생성 및 User-Agent 설정 (모든 다운로드 스레드가 공유)
+headers = {'user-agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/136.0.0.0 Safari/537.36'}
+session = requests.Session(impersonate="chrome", headers=headers, verify=False)
+
+
+# =========================================================
+# 2️⃣ 심볼 목록 / 시작일
+# =========================================================
+def load_symbols(store: PriceStore, symbols_file: str = None) -> list:
+    """심볼 목록 파일을 읽거나, 파일이 없으면 저장소에 있는 심볼 전체를 반환"""
+    if symbols_file:
+        with open(symbols_file, encoding="utf-8") as f:
+            symbols = [line.split("#")[0].strip() for line in f]
+        return list(dict.fromkeys(s for s in symbols if s))
+
+    return store.symbols()
+
+
+def load_latest_dates(store: PriceStore, symbols: list) -> dict:
+    """심볼별 최신 날짜를 한 번에 조회"""
+    return {symbol: datetime.strptime(date, "%Y-%m-%d").date()
+            for symbol, date in store.latest_dates(symbols).items()}
+
+
+# =========================================================
+# 3️⃣ 다운로드 (여러 스레드)
+# =========================================================
+def fetch_stock_data(symbol, start_date, end_date):
+    stock = yf.Ticker(symbol, session=session)
+    return stock.history(start=start_date, end=end_date)
+
+
+def fetch_symbol(symbol: str, latest_date, resolver: SymbolResolver, write_queue):
+    """한 심볼을 다운로드해 쓰기 대기열에 넣음 (한국 종목코드는 캐시된 접미사 사용)"""
+    today = datetime.now().date()
+    yesterday = today - timedelta(days=1)
+
+    if latest_date is None:
+        print(f"DB에 저장된 {symbol} 데이터가 없습니다. 전체 데이터를 가져옵니다.")
+        start_date = "1900-01-01"
+    elif latest_date < yesterday:
+        print(f"{latest_date} 이후로 {symbol} 데이터를 업데이트합니다.")
+        start_date = latest_date + timedelta(days=1)
+    else:
+        print(f"{symbol} DB가 이미 최신 상태입니다.")
+        return
+
+    if is_korean_code(symbol):
+        # 전체 조회에서 두 접미사 모두 비어 있을 때만 "없는 코드"로 캐시
+        yahoo_symbol, data = resolver.fetch_with_suffix(
+            symbol, lambda s: fetch_stock_data(s, start_date, today), remember_missing=latest_date is None
+        )
+    else:
+        data = fetch_stock_data(symbol, start_date, today)
+
+    if data is None or data.empty:
+        print(f"{symbol} 데이터 없음")
+        return
+
+    write_queue.put((symbol, data))
+
+
+# =========================================================
+# 4️⃣ 단일 쓰기 스레드
+# =========================================================
+def store_writer(store: PriceStore, write_queue):
+    """대기열의 심볼 데이터를 최대 WRITER_COMMIT_SYMBOLS개씩 한 트랜잭션으로 저장"""
+    while True:
+        item = write_queue.get()
+        if item is None:
+            return
+
+        batch = [item]
+        finished = False
+        while len(batch) < WRITER_COMMIT_SYMBOLS:
+            try:
+                item = write_queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is None:
+                finished = True
+                break
+            batch.append(item)
+
+        try:
+            inserted = store.write_many(batch)
+            for symbol, data in batch:
+                print(f"{symbol} {inserted[symbol]}건 삽입, {len(data) - inserted[symbol]}건 중복")
+        except Exception as e:
+            print(f"❗ 저장 오류 ({len(batch)}개 심볼): {e}")
+
+        if finished:
+            return
+
+
+# =========================================================
+# 5️⃣ 실행
+# =========================================================
+def run_batch_update(db_path: str = DB_PATH, symbols_file: str = None, workers: int = MAX_WORKERS,
+                     collection: str = None):
+    start_time = time.time()
+
+    store = open_price_store(db_path, collection)
+    symbols = load_symbols(store, symbols_file)
+    latest_dates = load_latest_dates(store, symbols)
+    resolver = SymbolResolver()
+    print(f"🚀 {len(symbols)}개 심볼 업데이트 시작 (다운로드 스레드 {workers}개)")
+
+    write_queue = queue.Queue(maxsize=WRITER_QUEUE_SIZE)
+    writer = threading.Thread(target=store_writer, args=(store, write_queue))
+    writer.start()
+
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = {
+                executor.submit(fetch_symbol, symbol, latest_dates.get(symbol), resolver, write_queue): symbol
+                for symbol in symbols
+            }
+            for future in as_completed(futures):
+                try:
+                    future.result()
+                except Exception as e:
+                    print(f"{futures[future]} 다운로드 실패: {e}")
+    finally:
+        write_queue.put(None)
+        writer.join()
+        store.close()
+        resolver.close()
+        session.close()
+
+    print(f"🎉 전체 업데이트 완료! 소요 시간: {time.time() - start_time:.2f}초")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="주가 저장소(SQLite/MongoDB) 다중 심볼 업데이트")
+    parser.add_argument("--db", default=DB_PATH,
+                        help=f"SQLite DB 경로 또는 mongodb:// URI (기본 {DB_PATH})")
+    parser.add_argument("--collection",
+                        help="SQLite 테이블(기본 stocks) 또는 MongoDB 컬렉션(기본 us_stocks) 이름")
+    parser.add_argument("--symbols-file", help="심볼 목록 파일 (없으면 DB에 있는 심볼 전체)")
+    parser.add_argument("--workers", type=int, default=MAX_WORKERS,
+                        help=f"동시 다운로드 스레드 수 (기본 {MAX_WORKERS})")
+    args = parser.parse_args()
+
+    run_batch_update(args.db, args.symbols_file, args.workers, args.collection)
@@ -0,0 +1,92 @@
+# yahoo_chart.py
+# Yahoo Finance v8 chart API 직접 호출용 헬퍼
+# (yfinance는 비동기 세션을 지원하지 않으므로 asyncio 경로에서 사용)
+
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+import pandas as pd
+
+CHART_URL = "https://query2.finance.yahoo.com/v8/finance/chart/{symbol}"
+
+OHLC_COLUMNS = ["Open", "High", "Low", "Close"]
+
+
+def chart_request(symbol: str, start_date: str, end_date: str):
+    """chart API 요청 URL과 파라미터 생성 (start_date ~ end_date, 일봉)
+
+    거래소 시간대를 요청 전에는 알 수 없으므로 시작 시각을 하루 앞당겨 요청하고,
+    응답 변환 시 start_date 이전 행을 잘라냅니다.
+    """
+    start = datetime.strptime(start_date, "%Y-%m-%d").replace(tzinfo=timezone.utc) - timedelta(days=1)
+    end = datetime.strptime(end_date, "%Y-%m-%d").replace(tzinfo=timezone.utc)
+    params = {
+        "period1": int(start.timestamp()),
+        "period2": int(end.timestamp()),
+        "interval": "1d",
+        "includePrePost": "false",
+        "events": "div,splits",
+    }
+    return CHART_URL.format(symbol=symbol), params
+
+
+def chart_json_to_frame(payload: dict, start_date: str = None) -> pd.DataFrame:
+    """chart API JSON을 Ticker.history(auto_adjust=True)와 같은 모양의 DataFrame으로 변환"""
+    chart = (payload or {}).get("chart") or {}
+    if chart.get("error"):
+        raise ValueError(chart["error"].get("description") or chart["error"])
+
+    results = chart.get("result") or []
+    if not results or not results[0].get("timestamp"):
+        return pd.DataFrame()
+
+    result = results[0]
+    tz = result.get("meta", {}).get("exchangeTimezoneName") or "UTC"
+    index = pd.to_datetime(result["timestamp"], unit="s", utc=True).tz_convert(tz).normalize()
+    index.name = "Date"
+
+    quote = result["indicators"]["quote"][0]
+    df = pd.DataFrame({
+        "Open": np.asarray(quote.get("open"), dtype="float64"),
+        "High": np.asarray(quote.get("high"), dtype="float64"),
+        "Low": np.asarray(quote.get("low"), dtype="float64"),
+        "Close": np.asarray(quote.get("close"), dtype="float64"),
+        "Volume": np.asarray(quote.get("volume"), dtype="float64"),
+    }, index=index)
+
+    # auto_adjust: 수정종가 비율로 시가/고가/저가 보정, 종가는 수정종가로 대체
+    adjclose = (result["indicators"].get("adjclose") or [{}])[0].get("adjclose")
+    if adjclose:
+        adjclose = np.asarray(adjclose, dtype="float64")
+        ratio = adjclose / df["Close"].to_numpy()
+        for column in ("Open", "High", "Low"):
+            df[column] = df[column].to_numpy() * ratio
+        df["Close"] = adjclose
+
+    events = result.get("events") or {}
+    df["Dividends"] = _event_series(events.get("dividends"), tz, index, lambda e: e.get("amount"))
+    df["Stock Splits"] = _event_series(
+        events.get("splits"), tz, index,
+        lambda e: e["numerator"] / e["denominator"] if e.get("denominator") else None,
+    )
+
+    # 장중 조회 시 마지막 행이 중복되는 경우가 있어 마지막 값만 유지
+    df = df[~df.index.duplicated(keep="last")]
+    df = df.dropna(subset=OHLC_COLUMNS, how="all")
+
+    if start_date:
+        df = df[df.index >= pd.Timestamp(start_date).tz_localize(tz)]
+    return df
+
+
+def _event_series(events: dict, tz: str, index: pd.DatetimeIndex, value_of) -> np.ndarray:
+    """배당/분할 이벤트를 가격 인덱스에 맞춘 배열로 변환 (이벤트 없는 날은 0)"""
+    values = pd.Series(0.0, index=index)
+    for event in (events or {}).values():
+        value = value_of(event)
+        if value is None:
+            continue
+        day = pd.Timestamp(event["date"], unit="s", tz="UTC").tz_convert(tz).normalize()
+        if day in values.index:
+            values.loc[day] = float(value)
+    return values.to_numpy()